@@ -1,9 +1,12 @@
 package main
 
 import (
+	"bytes"
 	"context"
+	"encoding/json"
 	"fmt"
 	"log"
+	"net/http"
 	"os"
 	"os/signal"
 	"syscall"
@@ -45,6 +48,10 @@ func main() {
 
 	metricsStore := storage.NewMetricsStore(db)
 
+	// Optional: push each tick to the ML API so it scores points as they land
+	mlAPIURL := os.Getenv("ML_API_URL")
+	httpClient := &http.Client{Timeout: 5 * time.Second}
+
 	// Start collection loop
 	ticker := time.NewTicker(30 * time.Second)
 	defer ticker.Stop()
@@ -54,7 +61,7 @@ func main() {
 	for {
 		select {
 		case <-ticker.C:
-			if err := collectMetrics(ctx, promClient, metricsStore); err != nil {
+			if err := collectMetrics(ctx, promClient, metricsStore, httpClient, mlAPIURL); err != nil {
 				log.Printf("Error collecting metrics: %v", err)
 			}
 		case <-sigChan:
@@ -64,7 +71,8 @@ func main() {
 	}
 }
 
-func collectMetrics(ctx context.Context, promClient *metrics.PrometheusClient, store *storage.MetricsStore) error {
+func collectMetrics(ctx context.Context, promClient *metrics.PrometheusClient, store *storage.MetricsStore,
+	httpClient *http.Client, mlAPIURL string) error {
 	// For now, hardcode pod to collect metrics from
 	// In production, this would query k8s API for all pods with label
 	podName := "leaky-app"
@@ -96,5 +104,48 @@ func collectMetrics(ctx context.Context, promClient *metrics.PrometheusClient, s
 	log.Printf("Collected metrics for %s: Memory=%.2f bytes, CPU=%.4f cores",
 		podName, memory, cpu)
 
+	if mlAPIURL != "" {
+		// The rows are already stored, so a failed push only delays scoring
+		if err := pushToMLAPI(ctx, httpClient, mlAPIURL, podMetrics); err != nil {
+			log.Printf("Error pushing metrics to ML API: %v", err)
+		}
+	}
+
+	return nil
+}
+
+// pushToMLAPI sends the points just saved to the ML API ingest endpoint
+func pushToMLAPI(ctx context.Context, client *http.Client, baseURL string, m *metrics.PodMetrics) error {
+	type point struct {
+		PodName     string    `json:"pod_name"`
+		Namespace   string    `json:"namespace"`
+		MetricName  string    `json:"metric_name"`
+		MetricValue float64   `json:"metric_value"`
+		Timestamp   time.Time `json:"timestamp"`
+	}
+
+	body, err := json.Marshal(map[string][]point{"points": {
+		{m.PodName, m.Namespace, "memory_usage_mb", m.MemoryUsage, m.Timestamp},
+		{m.PodName, m.Namespace, "cpu_usage", m.CPUUsage, m.Timestamp},
+	}})
+	if err != nil {
+		return fmt.Errorf("error marshaling points: %w", err)
+	}
+
+	req, err := http.NewRequestWithContext(ctx, http.MethodPost, baseURL+"/ingest", bytes.NewReader(body))
+	if err != nil {
+		return fmt.Errorf("error creating request: %w", err)
+	}
+	req.Header.Set("Content-Type", "application/json")
+
+	resp, err := client.Do(req)
+	if err != nil {
+		return fmt.Errorf("error sending request: %w", err)
+	}
+	defer resp.Body.Close()
+
+	if resp.StatusCode != http.StatusOK {
+		return fmt.Errorf("unexpected status: %s", resp.Status)
+	}
 	return nil
 }
@@ -12,9 +12,137 @@ CREATE TABLE IF NOT EXISTS metrics (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX IF NOT EXISTS idx_pod_time ON metrics (pod_name, "timestamp");
 CREATE INDEX IF NOT EXISTS idx_metric_time ON metrics (metric_name, "timestamp");
 
+-- Per-series reads (DataLoader.load_metrics/fetch_metrics_arrays, the Go
+-- metrics store) filter on all four columns and only need metric_value, so
+-- they are index-only scans. Supersedes the old (pod_name, timestamp) index.
+CREATE INDEX IF NOT EXISTS idx_series_time
+    ON metrics (pod_name, namespace, metric_name, "timestamp") INCLUDE (metric_value);
+DROP INDEX IF EXISTS idx_pod_time;
+
+-- Rows arrive in timestamp order, so a BRIN index of a few pages covers the
+-- whole table for retention deletes and corpus-wide time-range scans
+CREATE INDEX IF NOT EXISTS idx_metrics_time_brin ON metrics USING brin ("timestamp");
+
+-- Insert-only tables are vacuumed by insert count (PostgreSQL 13+); doing it
+-- more often keeps the visibility map current for index-only scans
+ALTER TABLE metrics SET (autovacuum_vacuum_insert_scale_factor = 0.05);
+
+-- Metric rollups: one row per series and bucket, maintained on insert so
+-- long lookbacks read buckets instead of raw 30s samples. Buckets use
+-- date_bin with the 2000-01-01 origin (same as DataLoader).
+CREATE TABLE IF NOT EXISTS metrics_rollup_5m (
+    pod_name VARCHAR(255) NOT NULL,
+    namespace VARCHAR(255) NOT NULL,
+    metric_name VARCHAR(255) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    min_value DOUBLE PRECISION NOT NULL,
+    max_value DOUBLE PRECISION NOT NULL,
+    sum_value DOUBLE PRECISION NOT NULL,
+    sample_count INTEGER NOT NULL,
+    last_value DOUBLE PRECISION NOT NULL,
+    last_timestamp TIMESTAMP NOT NULL,
+    PRIMARY KEY (pod_name, namespace, metric_name, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS metrics_rollup_1h (LIKE metrics_rollup_5m INCLUDING ALL);
+
+CREATE OR REPLACE FUNCTION rollup_metric() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO metrics_rollup_5m AS r
+    VALUES (NEW.pod_name, NEW.namespace, NEW.metric_name,
+            date_bin('5 minutes', NEW."timestamp", TIMESTAMP '2000-01-01'),
+            NEW.metric_value, NEW.metric_value, NEW.metric_value, 1,
+            NEW.metric_value, NEW."timestamp")
+    ON CONFLICT (pod_name, namespace, metric_name, bucket) DO UPDATE SET
+        min_value = LEAST(r.min_value, EXCLUDED.min_value),
+        max_value = GREATEST(r.max_value, EXCLUDED.max_value),
+        sum_value = r.sum_value + EXCLUDED.sum_value,
+        sample_count = r.sample_count + 1,
+        last_value = CASE WHEN EXCLUDED.last_timestamp >= r.last_timestamp
+                          THEN EXCLUDED.last_value ELSE r.last_value END,
+        last_timestamp = GREATEST(r.last_timestamp, EXCLUDED.last_timestamp);
+
+    INSERT INTO metrics_rollup_1h AS r
+    VALUES (NEW.pod_name, NEW.namespace, NEW.metric_name,
+            date_bin('1 hour', NEW."timestamp", TIMESTAMP '2000-01-01'),
+            NEW.metric_value, NEW.metric_value, NEW.metric_value, 1,
+            NEW.metric_value, NEW."timestamp")
+    ON CONFLICT (pod_name, namespace, metric_name, bucket) DO UPDATE SET
+        min_value = LEAST(r.min_value, EXCLUDED.min_value),
+        max_value = GREATEST(r.max_value, EXCLUDED.max_value),
+        sum_value = r.sum_value + EXCLUDED.sum_value,
+        sample_count = r.sample_count + 1,
+        last_value = CASE WHEN EXCLUDED.last_timestamp >= r.last_timestamp
+                          THEN EXCLUDED.last_value ELSE r.last_value END,
+        last_timestamp = GREATEST(r.last_timestamp, EXCLUDED.last_timestamp);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER metrics_rollup
+    AFTER INSERT ON metrics
+    FOR EACH ROW EXECUTE FUNCTION rollup_metric();
+
+-- Backfill rows that existed before the trigger (no-op on a fresh database)
+INSERT INTO metrics_rollup_5m
+SELECT pod_name, namespace, metric_name,
+       date_bin('5 minutes', "timestamp", TIMESTAMP '2000-01-01') AS bucket,
+       MIN(metric_value), MAX(metric_value), SUM(metric_value), COUNT(*),
+       (ARRAY_AGG(metric_value ORDER BY "timestamp" DESC))[1], MAX("timestamp")
+FROM metrics
+GROUP BY pod_name, namespace, metric_name, bucket
+ON CONFLICT DO NOTHING;
+
+INSERT INTO metrics_rollup_1h
+SELECT pod_name, namespace, metric_name,
+       date_bin('1 hour', "timestamp", TIMESTAMP '2000-01-01') AS bucket,
+       MIN(metric_value), MAX(metric_value), SUM(metric_value), COUNT(*),
+       (ARRAY_AGG(metric_value ORDER BY "timestamp" DESC))[1], MAX("timestamp")
+FROM metrics
+GROUP BY pod_name, namespace, metric_name, bucket
+ON CONFLICT DO NOTHING;
+
+-- Retention: raw samples are only read for recent windows (long lookbacks
+-- come from the rollups), so they are deleted after a week, 5 minute buckets
+-- after 30 days and hourly buckets after a year. Deletes run in batches with
+-- a commit in between, so locks and WAL stay bounded and concurrent inserts
+-- are never blocked for long. Run VACUUM (ANALYZE) metrics afterwards to
+-- make the space reusable, e.g. from the metrics-retention CronJob:
+--   CALL prune_metrics();
+CREATE OR REPLACE PROCEDURE prune_metrics(
+    raw_retention INTERVAL DEFAULT '7 days',
+    rollup_5m_retention INTERVAL DEFAULT '30 days',
+    rollup_1h_retention INTERVAL DEFAULT '365 days',
+    batch_size INTEGER DEFAULT 50000
+) AS $$
+DECLARE
+    deleted BIGINT;
+    total BIGINT := 0;
+BEGIN
+    LOOP
+        DELETE FROM metrics
+        WHERE id IN (
+            SELECT id FROM metrics
+            WHERE "timestamp" < NOW() - raw_retention
+            LIMIT batch_size
+        );
+        GET DIAGNOSTICS deleted = ROW_COUNT;
+        total := total + deleted;
+        COMMIT;
+        EXIT WHEN deleted < batch_size;
+    END LOOP;
+
+    DELETE FROM metrics_rollup_5m WHERE bucket < NOW() - rollup_5m_retention;
+    DELETE FROM metrics_rollup_1h WHERE bucket < NOW() - rollup_1h_retention;
+    COMMIT;
+
+    RAISE NOTICE 'prune_metrics: deleted % raw rows', total;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Anomalies table
 CREATE TABLE IF NOT EXISTS anomalies (
     id SERIAL PRIMARY KEY,
@@ -27,12 +155,20 @@ CREATE TABLE IF NOT EXISTS anomalies (
     detected_at TIMESTAMP NOT NULL,
     resolved_at TIMESTAMP,
     status VARCHAR(50) DEFAULT 'detected',
+    onset_window TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX IF NOT EXISTS idx_pod_status ON anomalies (pod_name, status);
 CREATE INDEX IF NOT EXISTS idx_detected_time ON anomalies (detected_at);
 
+-- Each API worker detects onsets on its own; the ML API writes with
+-- ON CONFLICT DO NOTHING on the 5-minute bin of the onset so an incident
+-- is one row. Rows without an onset (NULL) are never deduplicated.
+ALTER TABLE anomalies ADD COLUMN IF NOT EXISTS onset_window TIMESTAMP;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_anomaly_onset
+    ON anomalies (pod_name, namespace, anomaly_type, onset_window);
+
 -- Healing actions table
 CREATE TABLE IF NOT EXISTS healing_actions (
     id SERIAL PRIMARY KEY,
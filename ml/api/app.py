@@ -3,16 +3,61 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from model.lstm_model import LSTMPredictor
-from model.data_loader import DataLoader
+from model.data_loader import DataLoader, resample_windows, resolution_for
+from model.window_cache import WindowCache
+from model.numpy_inference import NumpyLSTMPredictor, weights_path_for
+from model.model_registry import ModelWatcher, model_version
+from model.streaming_detector import StreamingDetector
+from model.result_writer import ResultWriter
+from model.micro_batcher import MicroBatcher
+from result_cache import ResultCache
+from instrumentation import (
+    finish_request, metrics_response, observe_batch, observe_microbatch,
+    refresh_gauges, stage, start_request
+)
 import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 
 app = Flask(__name__)
 
-# Global model instance
+# Global model instance; replaced atomically on hot reload, so request
+# handlers take one reference up front and use it throughout
 predictor = None
+predictor_version = None
+model_watcher = None
 data_loader = None
+result_writer = None
+
+# Forward passes are cached per (series, last sample, model version), so
+# repeated /predict calls within one collection interval skip the model
+result_cache = ResultCache(max_entries=int(os.getenv('RESULT_CACHE_SIZE', 4096)))
+
+def prediction_key(pod_name, namespace, metric_name, last_timestamp, version):
+    return (pod_name, namespace, metric_name, np.datetime64(last_timestamp, 'ns'), version)
+
+# Concurrent /predict windows arriving within MICROBATCH_MAX_WAIT_MS share one
+# forward pass of up to MICROBATCH_MAX_SIZE windows (0 ms disables batching)
+MICROBATCH_MAX_WAIT_MS = float(os.getenv('MICROBATCH_MAX_WAIT_MS', 2))
+micro_batcher = MicroBatcher(
+    max_batch_size=int(os.getenv('MICROBATCH_MAX_SIZE', 32)),
+    max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+    on_batch=observe_microbatch
+) if MICROBATCH_MAX_WAIT_MS > 0 else None
+
+# Model input windows are cut from the 30s collection grid: double writes
+# collapse and up to WINDOW_MAX_FILL missed ticks are interpolated, longer
+# gaps make the window unusable
+WINDOW_MAX_FILL = int(os.getenv('WINDOW_MAX_FILL', 4))
+
+# Anomaly detection keeps incremental per-series statistics across requests
+ANOMALY_LOOKBACK_HOURS = 2
+# Longest baseline /detect-anomaly accepts; hourly rollups are kept a year
+ANOMALY_CONTEXT_MAX_HOURS = 365 * 24
+detector = StreamingDetector(
+    horizon=int(os.getenv('DETECTOR_HORIZON', 240)),
+    max_series=int(os.getenv('DETECTOR_SERIES', 4096))
+)
 
 # Configuration
 DB_CONFIG = {
@@ -25,24 +70,315 @@ DB_CONFIG = {
 
 MODEL_PATH = os.getenv('MODEL_PATH', '../model/saved_models/lstm_predictor.keras')
 
+# 'numpy' serves exported .npz weights without importing TensorFlow,
+# 'keras' uses the compiled TensorFlow path, 'auto' prefers numpy when
+# the exported weights exist
+MODEL_BACKEND = os.getenv('MODEL_BACKEND', 'auto')
+
+def resolve_backend() -> str:
+    """Return the inference backend that load_model() will use"""
+    if MODEL_BACKEND == 'auto':
+        return 'numpy' if os.path.exists(weights_path_for(MODEL_PATH)) else 'keras'
+    return MODEL_BACKEND
+
+# Seconds between checks for a new model on disk (0 disables hot reload)
+MODEL_RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', 30))
+
+def build_predictor():
+    """Load a predictor from MODEL_PATH with the configured backend"""
+    backend = resolve_backend()
+        
+    if backend == 'numpy':
+        model = NumpyLSTMPredictor()
+        model.load_model(MODEL_PATH)
+    else:
+        # Imported lazily so the numpy backend never loads TensorFlow
+        from model.lstm_model import LSTMPredictor
+        model = LSTMPredictor()
+        model.load_model(MODEL_PATH)
+        model.enable_serving_mode()
+    return model
+
+def swap_predictor(model, version):
+    """Publish a new predictor; in-flight requests keep the one they started with"""
+    global predictor, predictor_version
+    predictor, predictor_version = model, version
+
 def load_model():
     """Load the trained model"""
-    global predictor
-    predictor = LSTMPredictor()
-    predictor.load_model(MODEL_PATH)
-    print(f"Model loaded from {MODEL_PATH}")
+    version = model_version(MODEL_PATH)
+    swap_predictor(build_predictor(), version)
+    print(f"Model loaded from {MODEL_PATH} ({resolve_backend()} backend, version {version})")
+
+def start_model_watcher():
+    """Reload the model in the background when a new version lands on disk"""
+    global model_watcher
+    if MODEL_RELOAD_INTERVAL <= 0 or model_watcher is not None:
+        return
+    model_watcher = ModelWatcher(
+        MODEL_PATH, build_predictor, swap_predictor,
+        interval=MODEL_RELOAD_INTERVAL, current_version=predictor_version
+    )
+    model_watcher.start()
 
 def init_data_loader():
     """Initialize data loader"""
     global data_loader
-    data_loader = DataLoader(DB_CONFIG)
-    data_loader.connect()
-    print("Data loader initialized")
+    window_cache = WindowCache(
+        max_series=int(os.getenv('WINDOW_CACHE_SERIES', 2048)),
+        capacity=int(os.getenv('WINDOW_CACHE_POINTS', 1024)),
+        ttl_seconds=float(os.getenv('WINDOW_CACHE_TTL', 300))
+    )
+    # The pool closes returned connections beyond its minimum, so keep one
+    # per request thread or concurrent requests reconnect every time
+    data_loader = DataLoader(
+        DB_CONFIG,
+        window_cache=window_cache,
+        min_connections=int(os.getenv('DB_POOL_MIN', os.getenv('WEB_THREADS', 8))),
+        max_connections=int(os.getenv('DB_POOL_MAX', 10)),
+        use_rollup_tables=os.getenv('ROLLUP_TABLES', 'true').lower() in ('1', 'true', 'yes')
+    )
+    try:
+        data_loader.connect()
+        print("Data loader initialized")
+    except Exception as e:
+        # Keep serving; /ready reports the DB as down and the pool connects lazily
+        print(f"Data loader initialized, database not reachable yet: {e}")
+    init_result_writer()
+
+def init_result_writer():
+    """Start the write-behind buffer for the predictions and anomalies tables"""
+    global result_writer
+    if os.getenv('PERSIST_RESULTS', 'true').lower() not in ('1', 'true', 'yes'):
+        return
+    result_writer = ResultWriter(
+        data_loader,
+        max_rows=int(os.getenv('RESULTS_FLUSH_ROWS', 500)),
+        flush_interval=float(os.getenv('RESULTS_FLUSH_INTERVAL', 5))
+    )
+    result_writer.start()
+
+def persist_prediction(response: dict, version: str = None):
+    """Queue a prediction for the predictions table (no DB round trip)"""
+    if result_writer is not None:
+        result_writer.record_prediction(response, version)
+
+def persist_anomaly(pod_name, namespace, metric_name, result: dict, detected_at: str):
+    """
+    Queue a detected anomaly for the anomalies table (no DB round trip)
+    
+    Only the normal -> anomalous transition is recorded, so an anomaly that
+    lasts many ticks is one row rather than one per request. Each worker
+    tracks transitions on its own; the writer dedupes them on the onset.
+    """
+    if result_writer is not None and result['onset']:
+        result_writer.record_anomaly(pod_name, namespace, metric_name, result, detected_at)
+
+def anomaly_context(pod_name, namespace, metric_name, hours_back: int, current_value: float):
+    """
+    Long-term baseline for a detection, read from the metric rollups
+    
+    Lookbacks past a few hours come back as 5-minute or hourly buckets
+    (resolution_for()), from the trigger-maintained rollup tables unless
+    ROLLUP_TABLES is off. Raw samples are only kept for a week, so longer
+    baselines exist only in the rollups.
+    """
+    with stage('db_load'):
+        df = data_loader.load_metrics_rollup(pod_name, namespace, metric_name, hours_back=hours_back)
+    if df.empty:
+        return None
+    averages, counts = df['avg'].values, df['count'].values
+    return {
+        'hours': hours_back,
+        'resolution': resolution_for(hours_back) or 'raw',
+        'min': float(df['min'].min()),
+        'max': float(df['max'].max()),
+        'mean': float((averages * counts).sum() / counts.sum()),
+        # Share of buckets whose average is at or below the current value
+        'percentile': float((averages <= current_value).mean() * 100)
+    }
+
+def normalize_window(model, values: np.ndarray, metric_name: str = None) -> np.ndarray:
+    """Scale raw metric values with the model's training parameters"""
+    params = model.scaling_for(metric_name)
+    X_min = params['X_min']
+    X_max = params['X_max']
+    return (values - X_min) / (X_max - X_min + 1e-8)
+
+def recent_windows(series, length: int = 60, end=None):
+    """
+    Grid-aligned windows for many (timestamps, values) series
+    
+    Returns:
+        ends (datetime64 of each window's last slot), windows
+        (len(series), length) and a mask of the complete windows
+    """
+    ends, windows = resample_windows(series, length, max_fill=WINDOW_MAX_FILL, end=end)
+    return ends, windows, ~np.isnan(windows).any(axis=1)
+
+def frame_windows(frames, length: int = 60):
+    """recent_windows() for load_metrics() frames"""
+    return recent_windows([(df.index.values, df['metric_value'].values) for df in frames], length)
+
+def pod_feature_windows(pod_frames, length: int):
+    """
+    One (length, features) window per pod for multivariate models, with
+    every metric of a pod ending on the same grid slot
+    
+    Args:
+        pod_frames: Per pod, one non-empty load_metrics() frame per feature
+    """
+    if not pod_frames:
+        return np.empty(0, dtype='datetime64[ns]'), np.empty((0, length, 0)), np.empty(0, dtype=bool)
+    n_features = len(pod_frames[0])
+    pod_ends = np.array([max(df.index[-1] for df in frames) for frames in pod_frames], dtype='datetime64[ns]')
+    ends, windows, _ = recent_windows(
+        [(df.index.values, df['metric_value'].values) for frames in pod_frames for df in frames],
+        length, end=np.repeat(pod_ends, n_features)
+    )
+    windows = windows.reshape(len(pod_frames), n_features, length).transpose(0, 2, 1)
+    return ends[::n_features], windows, ~np.isnan(windows).any(axis=(1, 2))
+
+def build_prediction_response(model, pod_name, namespace, metric_name,
+                              recent_data, last_timestamp, prediction_normalized):
+    """Denormalize a prediction and build the response payload for one pod"""
+    prediction = model.denormalize(prediction_normalized, metric_name)
+    return prediction_response(pod_name, namespace, metric_name, recent_data, last_timestamp, prediction)
+
+def prediction_response(pod_name, namespace, metric_name, recent_data, last_timestamp, prediction):
+    """Response payload for one pod and metric from a prediction in metric units"""
+    # Generate timestamps for predictions
+    prediction_timestamps = [
+        (last_timestamp + timedelta(seconds=30 * (i + 1))).isoformat()
+        for i in range(len(prediction))
+    ]
+    
+    # Simple anomaly detection: check if prediction exceeds threshold
+    # Using 90th percentile of recent data as threshold
+    threshold = np.percentile(recent_data, 90)
+    anomaly_detected = any(p > threshold * 1.2 for p in prediction)
+    
+    # Calculate confidence (inverse of prediction variance)
+    confidence = 1.0 / (1.0 + np.std(prediction) / np.mean(prediction))
+    
+    return {
+        'pod_name': pod_name,
+        'namespace': namespace,
+        'metric_name': metric_name,
+        'predictions': prediction.tolist(),
+        'timestamps': prediction_timestamps,
+        'confidence': float(confidence),
+        'anomaly_detected': anomaly_detected,
+        'threshold': float(threshold),
+        'predicted_at': datetime.utcnow().isoformat()
+    }
+
+def is_multivariate(model) -> bool:
+    return getattr(model, 'n_features', 1) > 1
+
+def multivariate_required(model):
+    """Error response for a multivariate-only endpoint, or None"""
+    if not is_multivariate(model) or model.series_scaling is None:
+        return jsonify({'error': 'Loaded model is not multivariate, use /predict/batch'}), 409
+    return None
+
+def univariate_required(model):
+    """Error response for a single-metric endpoint, or None"""
+    if is_multivariate(model):
+        return jsonify({'error': 'Loaded model is multivariate, use /predict/multivariate'}), 409
+    return None
+
+def predict_multivariate(model, version, pods, windows, last_timestamps):
+    """
+    Score every metric of many pods in one forward pass of a multivariate model
+    
+    Args:
+        pods: (pod_name, namespace) per window
+        windows: (batch, sequence_length, features) raw values, columns in
+            model.series_scaling.feature_names order
+        last_timestamps: Last grid slot of each window
+        
+    Returns:
+        {(pod_name, namespace, metric_name): /predict response}
+    """
+    scaling = model.series_scaling
+    with stage('normalize'):
+        rows = scaling.rows([pod for pod, _ in pods], [namespace for _, namespace in pods])
+        batch = scaling.normalize(windows, rows)
+    with stage('inference'):
+        predictions_normalized = model.predict_batch(batch)
+    observe_batch(len(batch))
+    
+    responses = {}
+    with stage('postprocess'):
+        predictions = scaling.denormalize(predictions_normalized, rows)
+        for (pod, namespace), window, last_timestamp, prediction in zip(
+                pods, windows, last_timestamps, predictions):
+            for column, metric_name in enumerate(scaling.feature_names):
+                response = prediction_response(
+                    pod, namespace, metric_name, window[:, column], last_timestamp, prediction[column]
+                )
+                persist_prediction(response, version)
+                result_cache.put(
+                    prediction_key(pod, namespace, metric_name, last_timestamp, version), response
+                )
+                responses[(pod, namespace, metric_name)] = response
+    return responses
+
+@app.before_request
+def before_request():
+    start_request()
+
+@app.after_request
+def after_request(response):
+    refresh_gauges(predictor, data_loader, detector, result_writer, result_cache)
+    return finish_request(response)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics"""
+    refresh_gauges(predictor, data_loader, detector, result_writer, result_cache, min_interval=0)
+    return metrics_response()
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'model_loaded': predictor is not None})
+    model = predictor
+    response = {
+        'status': 'healthy',
+        'model_loaded': model is not None,
+        'model_version': predictor_version,
+        'training_watermark': getattr(model, 'training_watermark', None)
+    }
+    if data_loader is not None:
+        response['db_pool'] = data_loader.pool_stats()
+        if data_loader.window_cache is not None:
+            response['window_cache'] = data_loader.window_cache.stats()
+    response['detector'] = detector.stats()
+    response['result_cache'] = result_cache.stats()
+    if micro_batcher is not None:
+        response['micro_batcher'] = micro_batcher.stats()
+    if result_writer is not None:
+        response['result_writer'] = result_writer.stats()
+    return jsonify(response)
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """
+    Readiness check: the model is loaded and the database is reachable
+    
+    Unlike /health this returns 503 until both are true, so traffic is only
+    routed to workers that can actually serve predictions.
+    """
+    model_loaded = predictor is not None
+    db_connected = data_loader is not None and data_loader.ping()
+    
+    response = {
+        'ready': model_loaded and db_connected,
+        'model_loaded': model_loaded,
+        'db_connected': db_connected
+    }
+    return jsonify(response), 200 if response['ready'] else 503
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -64,8 +400,12 @@ def predict():
         "anomaly_detected": true/false
     }
     """
-    if predictor is None:
+    model, version = predictor, predictor_version
+    if model is None:
         return jsonify({'error': 'Model not loaded'}), 500
+    error = univariate_required(model)
+    if error:
+        return error
         
     data = request.get_json()
     
@@ -78,62 +418,393 @@ def predict():
     
     try:
         # Load recent metrics (last 30 minutes for 60 data points at 30s intervals)
-        df = data_loader.load_metrics(
-            pod_name=pod_name,
-            namespace=namespace,
-            metric_name=metric_name,
-            hours_back=1
-        )
-        
-        if len(df) < 60:
+        with stage('db_load'):
+            timestamps, values = data_loader.load_recent_arrays(
+                pod_name=pod_name,
+                namespace=namespace,
+                metric_name=metric_name,
+                hours_back=1
+            )
+        
+        # Last 60 slots of the 30s grid
+        with stage('resample'):
+            ends, windows, complete = recent_windows([(timestamps, values)])
+        if not complete[0]:
             return jsonify({'error': 'Insufficient data for prediction'}), 400
         
-        # Get last 60 points
-        recent_data = df['metric_value'].values[-60:]
+        recent_data = windows[0]
+        last_timestamp = pd.Timestamp(ends[0])
         
-        # Normalize
-        X_min = predictor.scaling_params['X_min']
-        X_max = predictor.scaling_params['X_max']
-        recent_normalized = (recent_data - X_min) / (X_max - X_min + 1e-8)
+        def compute():
+            with stage('normalize'):
+                window = normalize_window(model, recent_data, metric_name)
+            with stage('inference'):
+                if micro_batcher is not None:
+                    prediction_normalized = micro_batcher.predict(model, window)
+                else:
+                    prediction_normalized = model.predict_single(window)
+                    observe_batch(1)
+            
+            with stage('postprocess'):
+                response = build_prediction_response(
+                    model, pod_name, namespace, metric_name,
+                    recent_data, last_timestamp, prediction_normalized
+                )
+                persist_prediction(response, version)
+            return response
         
-        # Predict
-        prediction_normalized = predictor.predict_single(recent_normalized)
+        # Identical concurrent requests share one computation
+        key = prediction_key(pod_name, namespace, metric_name, last_timestamp, version)
+        response, _ = result_cache.get_or_compute(key, compute)
         
-        # Denormalize
-        prediction = predictor.denormalize(prediction_normalized)
+        return jsonify(response)
         
-        # Generate timestamps for predictions
-        last_timestamp = df.index[-1]
-        prediction_timestamps = [
-            (last_timestamp + timedelta(seconds=30 * (i + 1))).isoformat()
-            for i in range(len(prediction))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Predict future usage for many pods with one query and one forward pass
+    
+    Request body:
+    {
+        "pod_names": ["leaky-app-xxx", "leaky-app-yyy"],   (optional)
+        "label_selector": {"app": "leaky-app"},           (optional)
+        "namespace": "healx",
+        "metric_name": "memory_usage_mb"
+    }
+    
+    At least one of pod_names or label_selector is required.
+    
+    Response:
+    {
+        "results": [{...same fields as /predict...}, ...],
+        "errors": {"pod-name": "reason", ...}
+    }
+    """
+    model, version = predictor, predictor_version
+    if model is None:
+        return jsonify({'error': 'Model not loaded'}), 500
+    error = univariate_required(model)
+    if error:
+        return error
+        
+    data = request.get_json()
+    
+    pod_names = data.get('pod_names')
+    label_selector = data.get('label_selector')
+    namespace = data.get('namespace', 'healx')
+    metric_name = data.get('metric_name', 'memory_usage_mb')
+    
+    if not pod_names and not label_selector:
+        return jsonify({'error': 'pod_names or label_selector required'}), 400
+    
+    try:
+        with stage('db_load'):
+            frames = data_loader.load_metrics_batch(
+                namespace=namespace,
+                metric_name=metric_name,
+                pod_names=pod_names,
+                label_selector=label_selector,
+                hours_back=1
+            )
+        
+        present = [pod for pod in (pod_names or sorted(frames)) if pod in frames]
+        with stage('resample'):
+            ends, grid, complete = frame_windows([frames[pod] for pod in present])
+        last_timestamps = {
+            pod: pd.Timestamp(end) for pod, end, ok in zip(present, ends, complete) if ok
+        }
+        
+        errors = {}
+        cached = {}
+        ready_pods, windows = [], []
+        for pod, window in zip(present, grid):
+            if pod not in last_timestamps:
+                continue
+            hit = result_cache.get(prediction_key(pod, namespace, metric_name, last_timestamps[pod], version))
+            if hit is not None:
+                cached[pod] = hit
+                continue
+            ready_pods.append(pod)
+            windows.append(window)
+        for pod in (pod_names or sorted(frames)):
+            if pod not in last_timestamps:
+                errors[pod] = 'Insufficient data for prediction'
+        
+        # Only pods without a cached result go through the model
+        computed = {}
+        if windows:
+            recent_batch = np.stack(windows)
+            with stage('normalize'):
+                batch = normalize_window(model, recent_batch, metric_name)
+            with stage('inference'):
+                predictions_normalized = model.predict_batch(batch)
+            observe_batch(len(batch))
+            
+            with stage('postprocess'):
+                for pod, recent_data, prediction_normalized in zip(
+                        ready_pods, recent_batch, predictions_normalized):
+                    last_timestamp = last_timestamps[pod]
+                    computed[pod] = build_prediction_response(
+                        model, pod, namespace, metric_name,
+                        recent_data, last_timestamp, prediction_normalized
+                    )
+                    persist_prediction(computed[pod], version)
+                    result_cache.put(
+                        prediction_key(pod, namespace, metric_name, last_timestamp, version),
+                        computed[pod]
+                    )
+        
+        results = [
+            cached.get(pod) or computed[pod]
+            for pod in (pod_names or sorted(frames)) if pod in cached or pod in computed
         ]
         
-        # Simple anomaly detection: check if prediction exceeds threshold
-        # Using 90th percentile of recent data as threshold
-        threshold = np.percentile(recent_data, 90)
-        anomaly_detected = any(p > threshold * 1.2 for p in prediction)
+        return jsonify({'results': results, 'errors': errors})
         
-        # Calculate confidence (inverse of prediction variance)
-        confidence = 1.0 / (1.0 + np.std(prediction) / np.mean(prediction))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/predict/multivariate', methods=['POST'])
+def predict_multivariate_batch():
+    """
+    Predict every metric of many pods in one forward pass (multivariate model)
+    
+    Request body:
+    {
+        "pod_names": ["leaky-app-xxx", "leaky-app-yyy"],   (optional)
+        "label_selector": {"app": "leaky-app"},           (optional)
+        "namespace": "healx"
+    }
+    
+    At least one of pod_names or label_selector is required. The metrics
+    are the ones the model was trained on.
+    
+    Response:
+    {
+        "results": [{"pod_name": ..., "namespace": ...,
+                     "metrics": {"memory_usage_mb": {...same fields as /predict...},
+                                 "cpu_usage": {...}}}, ...],
+        "errors": {"pod-name": "reason", ...}
+    }
+    """
+    model, version = predictor, predictor_version
+    if model is None:
+        return jsonify({'error': 'Model not loaded'}), 500
+    error = multivariate_required(model)
+    if error:
+        return error
         
-        response = {
-            'pod_name': pod_name,
-            'namespace': namespace,
-            'metric_name': metric_name,
-            'predictions': prediction.tolist(),
-            'timestamps': prediction_timestamps,
-            'confidence': float(confidence),
-            'anomaly_detected': anomaly_detected,
-            'threshold': float(threshold),
-            'predicted_at': datetime.utcnow().isoformat()
-        }
+    data = request.get_json()
+    
+    pod_names = data.get('pod_names')
+    label_selector = data.get('label_selector')
+    namespace = data.get('namespace', 'healx')
+    
+    if not pod_names and not label_selector:
+        return jsonify({'error': 'pod_names or label_selector required'}), 400
+    
+    feature_names = model.series_scaling.feature_names
+    sequence_length = model.sequence_length
+    
+    try:
+        with stage('db_load'):
+            frames = [
+                data_loader.load_metrics_batch(
+                    namespace=namespace,
+                    metric_name=metric_name,
+                    pod_names=pod_names,
+                    label_selector=label_selector,
+                    hours_back=1
+                )
+                for metric_name in feature_names
+            ]
         
-        return jsonify(response)
+        present = [
+            pod for pod in (pod_names or sorted(frames[0]))
+            if all(by_pod.get(pod) is not None and len(by_pod[pod]) for by_pod in frames)
+        ]
+        with stage('resample'):
+            ends, windows, complete = pod_feature_windows(
+                [[by_pod[pod] for by_pod in frames] for pod in present], sequence_length
+            )
+        ready_pods = [(pod, namespace) for pod, ok in zip(present, complete) if ok]
+        
+        errors = {}
+        usable = {pod for pod, _ in ready_pods}
+        for pod in (pod_names or sorted(frames[0])):
+            if pod not in usable:
+                errors[pod] = 'Insufficient data for prediction'
+        
+        results = []
+        if ready_pods:
+            responses = predict_multivariate(
+                model, version, ready_pods, windows[complete],
+                [pd.Timestamp(end) for end in ends[complete]]
+            )
+            results = [
+                {
+                    'pod_name': pod,
+                    'namespace': namespace,
+                    'metrics': {m: responses[(pod, namespace, m)] for m in feature_names}
+                }
+                for pod, _ in ready_pods
+            ]
+        
+        return jsonify({'results': results, 'errors': errors})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/ingest', methods=['POST'])
+def ingest():
+    """
+    Accept freshly written metric points and score the affected series
+    
+    The collector pushes each tick right after writing it to PostgreSQL, so
+    windows are extended in memory instead of being re-read from the table,
+    and predictions and anomalies are ready one tick after the data lands.
+    
+    Request body:
+    {
+        "points": [
+            {"pod_name": "leaky-app-xxx", "namespace": "healx",
+             "metric_name": "memory_usage_mb", "metric_value": 512.0,
+             "timestamp": "2024-01-01T00:00:30Z"},
+            ...
+        ]
+    }
+    
+    Response:
+    {
+        "ingested": 2,
+        "results": [{"pod_name": ..., "namespace": ..., "metric_name": ...,
+                     "prediction": {...same fields as /predict...} or null,
+                     "anomaly": {...same fields as /detect-anomaly...} or null}, ...],
+        "errors": {"pod/namespace/metric": "reason", ...}
+    }
+    """
+    data = request.get_json()
+    points = data.get('points') if data else None
+    if not points:
+        return jsonify({'error': 'points required'}), 400
+    
+    # Group points by series. The column is TIMESTAMP without time zone, which
+    # keeps the wall-clock time of an offset timestamp, so drop the offset the same way
+    series = {}
+    try:
+        for point in points:
+            key = (point['pod_name'], point.get('namespace', 'healx'), point['metric_name'])
+            timestamp = pd.Timestamp(point['timestamp'])
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.tz_localize(None)
+            series.setdefault(key, []).append((timestamp.to_datetime64(), float(point['metric_value'])))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'invalid point: {e}'}), 400
+    
+    model, version = predictor, predictor_version
+    errors = {}
+    windows = {}
+    for key, samples in series.items():
+        samples.sort()
+        timestamps = np.array([t for t, _ in samples], dtype='datetime64[ns]')
+        values = np.array([v for _, v in samples], dtype=np.float64)
+        try:
+            with stage('db_load'):
+                df = data_loader.ingest_metrics(
+                    *key, timestamps, values, hours_back=ANOMALY_LOOKBACK_HOURS
+                )
+        except Exception as e:
+            errors['/'.join(key)] = str(e)
+            continue
+        # A series seen for the first time is seeded with the whole window
+        with stage('detect'):
+            detector.update(key, df.index.values, df['metric_value'].values)
+        windows[key] = df
+    
+    # One forward pass per metric over every series with a full window, or
+    # one over every pod with all metrics for a multivariate model
+    predictions = {}
+    if model is not None and is_multivariate(model):
+        feature_names = model.series_scaling.feature_names if model.series_scaling else []
+        sequence_length = model.sequence_length
+        pods = []
+        for pod_key in dict.fromkeys(key[:2] for key in windows):
+            keys = [pod_key + (metric_name,) for metric_name in feature_names]
+            if feature_names and all(key in windows and len(windows[key]) for key in keys):
+                pods.append((pod_key, keys))
+        with stage('resample'):
+            ends, batch, complete = pod_feature_windows(
+                [[windows[key] for key in keys] for _, keys in pods], sequence_length
+            )
+        pods = [pod for pod, ok in zip(pods, complete) if ok]
+        if pods:
+            try:
+                predictions = predict_multivariate(
+                    model, version, [pod_key for pod_key, _ in pods], batch[complete],
+                    [pd.Timestamp(end) for end in ends[complete]]
+                )
+            except Exception as e:
+                for _, keys in pods:
+                    for key in keys:
+                        errors['/'.join(key)] = str(e)
+    elif model is not None:
+        series_keys = list(windows)
+        with stage('resample'):
+            ends, grid, complete = frame_windows([windows[key] for key in series_keys])
+        last_timestamps = {
+            key: pd.Timestamp(end) for key, end, ok in zip(series_keys, ends, complete) if ok
+        }
+        by_metric = {}
+        for key, window in zip(series_keys, grid):
+            if key in last_timestamps:
+                by_metric.setdefault(key[2], []).append((key, window))
+        for metric_name, entries in by_metric.items():
+            keys = [key for key, _ in entries]
+            recent_batch = np.stack([window for _, window in entries])
+            try:
+                with stage('normalize'):
+                    batch = normalize_window(model, recent_batch, metric_name)
+                with stage('inference'):
+                    predictions_normalized = model.predict_batch(batch)
+                observe_batch(len(batch))
+            except Exception as e:
+                for key in keys:
+                    errors['/'.join(key)] = str(e)
+                continue
+            with stage('postprocess'):
+                for key, recent_data, prediction_normalized in zip(keys, recent_batch, predictions_normalized):
+                    predictions[key] = build_prediction_response(
+                        model, key[0], key[1], metric_name,
+                        recent_data, last_timestamps[key], prediction_normalized
+                    )
+                    persist_prediction(predictions[key], version)
+                    # Lets /predict for the same sample return without a forward pass
+                    result_cache.put(
+                        prediction_key(*key, last_timestamps[key], version), predictions[key]
+                    )
+    
+    results = []
+    for key in windows:
+        with stage('detect'):
+            anomaly = detector.evaluate(key)
+        if anomaly is not None:
+            detected_at = datetime.utcnow().isoformat()
+            persist_anomaly(*key, anomaly, detected_at)
+            anomaly = {k: v for k, v in anomaly.items() if k not in ('points', 'onset', 'onset_at')}
+            anomaly['detected_at'] = detected_at
+        results.append({
+            'pod_name': key[0],
+            'namespace': key[1],
+            'metric_name': key[2],
+            'prediction': predictions.get(key),
+            'anomaly': anomaly
+        })
+    
+    return jsonify({'ingested': len(points), 'results': results, 'errors': errors})
+
 @app.route('/detect-anomaly', methods=['POST'])
 def detect_anomaly():
     """
@@ -143,7 +814,8 @@ def detect_anomaly():
     {
         "pod_name": "leaky-app-xxx",
         "namespace": "healx",
-        "metric_name": "memory_usage_mb"
+        "metric_name": "memory_usage_mb",
+        "context_hours": 168  // optional, adds a 'context' baseline from the rollups
     }
     """
     data = request.get_json()
@@ -154,53 +826,54 @@ def detect_anomaly():
     
     if not pod_name:
         return jsonify({'error': 'pod_name required'}), 400
+    try:
+        context_hours = int(data.get('context_hours') or 0)
+    except (TypeError, ValueError):
+        context_hours = -1
+    if not 0 <= context_hours <= ANOMALY_CONTEXT_MAX_HOURS:
+        return jsonify({'error': f'context_hours must be between 1 and {ANOMALY_CONTEXT_MAX_HOURS}'}), 400
+    
+    key = (pod_name, namespace, metric_name)
     
     try:
-        # Load recent metrics
-        df = data_loader.load_metrics(
-            pod_name=pod_name,
-            namespace=namespace,
-            metric_name=metric_name,
-            hours_back=2
-        )
-        
-        if len(df) < 60:
-            return jsonify({'error': 'Insufficient data'}), 400
-        
-        # Label anomalies
-        df_labeled = data_loader.create_labeled_dataset(df)
+        # Only rows newer than what the detector has already seen are fetched;
+        # the first request for a series seeds it with the full lookback
+        last_timestamp = detector.last_timestamp(key)
+        with stage('db_load'):
+            if last_timestamp is None:
+                timestamps, values = data_loader.load_recent_arrays(
+                    pod_name=pod_name,
+                    namespace=namespace,
+                    metric_name=metric_name,
+                    hours_back=ANOMALY_LOOKBACK_HOURS
+                )
+            else:
+                timestamps, values = data_loader.load_metrics_after(
+                    pod_name, namespace, metric_name, last_timestamp,
+                    hours_back=ANOMALY_LOOKBACK_HOURS
+                )
         
-        # Check recent data for anomalies
-        recent_anomalies = df_labeled.tail(10)['is_anomaly'].sum()
-        is_anomaly = recent_anomalies > 5  # More than half of recent points are anomalous
-        
-        # Calculate severity based on how far current value is from normal
-        current_value = df['metric_value'].iloc[-1]
-        normal_mean = df['metric_value'].quantile(0.5)
-        normal_std = df['metric_value'].std()
-        
-        severity_score = abs(current_value - normal_mean) / (normal_std + 1e-8)
-        
-        if severity_score < 2:
-            severity = 'low'
-        elif severity_score < 3:
-            severity = 'medium'
-        else:
-            severity = 'high'
+        with stage('detect'):
+            detector.update(key, timestamps, values)
+            result = detector.evaluate(key)
+        if result is None:
+            return jsonify({'error': 'Insufficient data'}), 400
         
         response = {
             'pod_name': pod_name,
             'namespace': namespace,
-            'is_anomaly': bool(is_anomaly),
-            'severity': severity,
-            'severity_score': float(severity_score),
-            'current_value': float(current_value),
-            'normal_range': {
-                'mean': float(normal_mean),
-                'std': float(normal_std)
-            },
+            'is_anomaly': result['is_anomaly'],
+            'severity': result['severity'],
+            'severity_score': result['severity_score'],
+            'current_value': result['current_value'],
+            'normal_range': result['normal_range'],
             'detected_at': datetime.utcnow().isoformat()
         }
+        if context_hours:
+            response['context'] = anomaly_context(
+                pod_name, namespace, metric_name, context_hours, result['current_value']
+            )
+        persist_anomaly(pod_name, namespace, metric_name, result, response['detected_at'])
         
         return jsonify(response)
         
@@ -210,5 +883,6 @@ def detect_anomaly():
 if __name__ == '__main__':
     print("HealX ML API - Starting...")
     load_model()
+    start_model_watcher()
     init_data_loader()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
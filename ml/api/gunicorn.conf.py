@@ -0,0 +1,71 @@
+"""
+Gunicorn configuration for the HealX ML API
+
+Environment:
+    PORT              Listen port (default 5000)
+    WEB_WORKERS       Worker processes (default 2)
+    WEB_THREADS       Threads per worker (default 8)
+    WEB_TIMEOUT       Worker timeout in seconds (default 60)
+    GRACEFUL_TIMEOUT  Seconds to finish in-flight requests on shutdown (default 30)
+    MODEL_RELOAD_INTERVAL  Seconds between checks for a new model (default 30, 0 disables)
+    MICROBATCH_MAX_WAIT_MS  Wait for concurrent /predict windows to share a forward
+                      pass (default 2, 0 disables); batches never exceed WEB_THREADS
+    MICROBATCH_MAX_SIZE  Windows per coalesced forward pass (default 32)
+    DB_POOL_MIN       Database connections kept open per worker (default WEB_THREADS)
+    DB_POOL_MAX       Concurrent database connections per worker (default 10)
+    WINDOW_MAX_FILL   Missed 30s samples interpolated inside a model window (default 4)
+    PERSIST_RESULTS   Buffer predictions/anomalies into their tables (default true)
+    ROLLUP_TABLES     Read long lookbacks from the metric rollup tables rather than
+                      aggregating raw rows (default true)
+    PROMETHEUS_MULTIPROC_DIR  Empty writable directory; aggregates /metrics across workers
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_WORKERS', 2))
+threads = int(os.getenv('WEB_THREADS', 8))
+worker_class = 'gthread'
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', 30))
+
+# Import wsgi (and load the numpy model) once in the master before forking
+preload_app = True
+
+accesslog = '-'
+
+
+def on_starting(server):
+    """Clear metric files left by a previous run of the master"""
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.db'):
+                os.remove(os.path.join(directory, name))
+
+
+def post_fork(server, worker):
+    """Per-worker initialization: DB pools and sockets cannot be shared across fork"""
+    import app
+    if app.predictor is None:
+        app.load_model()
+    # Threads do not survive fork, so each worker polls for new models itself
+    app.start_model_watcher()
+    app.init_data_loader()
+
+
+def worker_exit(server, worker):
+    """Close pooled DB connections when a worker shuts down"""
+    import app
+    if app.model_watcher is not None:
+        app.model_watcher.stop()
+    if app.result_writer is not None:
+        # Flush buffered predictions and anomalies before the pool goes away
+        app.result_writer.stop()
+    if app.data_loader is not None:
+        app.data_loader.close()
+
+
+def child_exit(server, worker):
+    """Forget a dead worker's live gauges in multiprocess /metrics"""
+    from instrumentation import mark_worker_dead
+    mark_worker_dead(worker.pid)
@@ -0,0 +1,169 @@
+"""
+Prometheus metrics for the HealX ML API
+
+Request handlers time each stage (db_load, resample, normalize, inference,
+postprocess, detect) with stage(), so a slow endpoint can be attributed to
+PostgreSQL or to the model. Gauges mirror the connection pool, window cache,
+detector, result writer and result cache, and are refreshed at most once per
+second. The micro-batcher reports its coalesced batch sizes and how long
+each /predict window queued for a batch.
+
+Under gunicorn every worker has its own registry. Set PROMETHEUS_MULTIPROC_DIR
+to a writable, empty directory to aggregate all workers in /metrics.
+"""
+import os
+import time
+
+from flask import request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    REGISTRY, generate_latest
+)
+
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+QUEUE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+REQUESTS = Counter(
+    'healx_ml_requests_total', 'Requests handled', ['endpoint']
+)
+REQUEST_ERRORS = Counter(
+    'healx_ml_request_errors_total', 'Requests answered with a 4xx/5xx status',
+    ['endpoint', 'status']
+)
+REQUEST_SECONDS = Histogram(
+    'healx_ml_request_seconds', 'End-to-end request latency',
+    ['endpoint'], buckets=LATENCY_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    'healx_ml_stage_seconds', 'Latency of one stage of a request',
+    ['endpoint', 'stage'], buckets=LATENCY_BUCKETS
+)
+BATCH_SIZE = Histogram(
+    'healx_ml_batch_size', 'Windows per model forward pass',
+    ['endpoint'], buckets=BATCH_BUCKETS
+)
+MICROBATCH_SIZE = Histogram(
+    'healx_ml_microbatch_size', 'Concurrent single-window predictions coalesced into one forward pass',
+    buckets=BATCH_BUCKETS
+)
+MICROBATCH_QUEUE_SECONDS = Histogram(
+    'healx_ml_microbatch_queue_seconds', 'Time a window waited for its micro-batch to start',
+    buckets=QUEUE_BUCKETS
+)
+
+
+def _gauge(name: str, documentation: str) -> Gauge:
+    # Summed over live workers when aggregating across processes
+    return Gauge(name, documentation, multiprocess_mode='livesum')
+
+
+DB_POOL_IN_USE = _gauge('healx_ml_db_pool_in_use', 'Pooled connections checked out')
+DB_POOL_IDLE = _gauge('healx_ml_db_pool_idle', 'Pooled connections idle')
+WINDOW_CACHE_SERIES = _gauge('healx_ml_window_cache_series', 'Series held in the window cache')
+WINDOW_CACHE_HITS = _gauge('healx_ml_window_cache_hits', 'Window cache hits since worker start')
+WINDOW_CACHE_MISSES = _gauge('healx_ml_window_cache_misses', 'Window cache misses since worker start')
+WINDOW_CACHE_EVICTIONS = _gauge('healx_ml_window_cache_evictions', 'Window cache evictions since worker start')
+DETECTOR_SERIES = _gauge('healx_ml_detector_series', 'Series tracked by the streaming detector')
+RESULTS_PENDING = _gauge('healx_ml_results_pending', 'Prediction/anomaly rows waiting to be flushed')
+RESULTS_WRITTEN = _gauge('healx_ml_results_written', 'Rows flushed since worker start')
+RESULTS_DROPPED = _gauge('healx_ml_results_dropped', 'Rows dropped because the buffer was full')
+RESULTS_FLUSH_FAILURES = _gauge('healx_ml_results_flush_failures', 'Failed flushes since worker start')
+RESULT_CACHE_ENTRIES = _gauge('healx_ml_result_cache_entries', 'Predictions held in the result cache')
+RESULT_CACHE_HITS = _gauge('healx_ml_result_cache_hits', 'Result cache hits since worker start')
+RESULT_CACHE_MISSES = _gauge('healx_ml_result_cache_misses', 'Result cache misses since worker start')
+RESULT_CACHE_COALESCED = _gauge('healx_ml_result_cache_coalesced',
+                                'Requests that waited on an identical in-flight prediction')
+MODEL_LOADED = _gauge('healx_ml_model_loaded', '1 if a model is being served')
+
+_last_refresh = 0.0
+
+
+def stage(name: str):
+    """Context manager timing one stage of the current request"""
+    return STAGE_SECONDS.labels(request.endpoint or 'unknown', name).time()
+
+
+def observe_batch(size: int):
+    """Record the number of windows in one forward pass of the current request"""
+    BATCH_SIZE.labels(request.endpoint or 'unknown').observe(size)
+
+
+def observe_microbatch(size: int, waits):
+    """MicroBatcher callback: one coalesced forward pass and its queue waits"""
+    MICROBATCH_SIZE.observe(size)
+    for wait in waits:
+        MICROBATCH_QUEUE_SECONDS.observe(wait)
+
+
+def start_request():
+    request.environ['healx.start'] = time.perf_counter()
+
+
+def finish_request(response):
+    """Count and time the request; errors are counted by status code"""
+    endpoint = request.endpoint or 'unknown'
+    start = request.environ.get('healx.start')
+    if start is not None:
+        REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+    REQUESTS.labels(endpoint).inc()
+    if response.status_code >= 400:
+        REQUEST_ERRORS.labels(endpoint, str(response.status_code)).inc()
+    return response
+
+
+def refresh_gauges(predictor, data_loader, detector, result_writer, result_cache,
+                   min_interval: float = 1.0):
+    """Copy component stats into the gauges (throttled, so cheap to call per request)"""
+    global _last_refresh
+    now = time.monotonic()
+    if now - _last_refresh < min_interval:
+        return
+    _last_refresh = now
+
+    MODEL_LOADED.set(1 if predictor is not None else 0)
+    if data_loader is not None:
+        pool = data_loader.pool_stats()
+        DB_POOL_IN_USE.set(pool['in_use'])
+        DB_POOL_IDLE.set(pool['idle'])
+        if data_loader.window_cache is not None:
+            cache = data_loader.window_cache.stats()
+            WINDOW_CACHE_SERIES.set(cache['series'])
+            WINDOW_CACHE_HITS.set(cache['hits'])
+            WINDOW_CACHE_MISSES.set(cache['misses'])
+            WINDOW_CACHE_EVICTIONS.set(cache['evictions'])
+    if detector is not None:
+        DETECTOR_SERIES.set(detector.stats()['series'])
+    if result_writer is not None:
+        writer = result_writer.stats()
+        RESULTS_PENDING.set(writer['pending'])
+        RESULTS_WRITTEN.set(writer['rows_written'])
+        RESULTS_DROPPED.set(writer['rows_dropped'])
+        RESULTS_FLUSH_FAILURES.set(writer['flush_failures'])
+    if result_cache is not None:
+        cache = result_cache.stats()
+        RESULT_CACHE_ENTRIES.set(cache['entries'])
+        RESULT_CACHE_HITS.set(cache['hits'])
+        RESULT_CACHE_MISSES.set(cache['misses'])
+        RESULT_CACHE_COALESCED.set(cache['coalesced'])
+
+
+def metrics_response():
+    """Body and content type for the /metrics endpoint"""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), {'Content-Type': CONTENT_TYPE_LATEST}
+
+
+def mark_worker_dead(pid: int):
+    """Drop a dead worker's live gauges from the multiprocess aggregation"""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,120 @@
+"""
+Prediction result cache for the HealX ML API
+
+Repeated /predict calls for the same pod within one collection interval
+see the same input window, so the forward pass is cached under
+(pod, namespace, metric, last sample timestamp, model version). A new
+sample or a model reload changes the key, so entries never go stale; old
+ones simply age out of the LRU.
+
+Concurrent misses for the same key are single-flighted: the first caller
+computes, the others wait for its result instead of running the model too.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 4096):
+        """
+        Args:
+            max_entries: Results kept before the least recently used is
+                evicted (0 disables caching and coalescing)
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable):
+        """Cached value or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._put(key, value)
+
+    def _put(self, key: Hashable, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable) -> Tuple[object, bool]:
+        """
+        Return (value, computed): a cached value, the result of an identical
+        computation already in flight, or compute() run by this caller
+
+        Exceptions from compute() are raised in every waiting caller and
+        nothing is cached.
+        """
+        if self.max_entries <= 0:
+            return compute(), True
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, False
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, False
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            # Also KeyboardInterrupt and friends, or waiters would get None
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None:
+                    self._put(key, flight.value)
+            flight.done.set()
+        return flight.value, True
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses + self.coalesced
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.coalesced) / total if total else 0.0
+            }
@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as api
+from model.data_loader import DataLoader
+from model.streaming_detector import StreamingDetector
+
+KEY = ('leaky-app', 'healx', 'memory_usage_mb')
+
+
+class WeekLoader(DataLoader):
+    """A week of 30s samples; rollups are bucketed in pandas like date_bin"""
+
+    def __init__(self):
+        super().__init__(db_config={})
+        index = pd.date_range('2026-01-01', periods=7 * 24 * 120, freq='30s')
+        values = 500 + 50 * np.sin(np.arange(len(index)) * 2 * np.pi / 2880)
+        self.df = pd.DataFrame({'metric_value': values}, index=index)
+        self.resolutions = []
+
+    def fetch_metrics_arrays(self, pod_name, namespace, metric_name, hours_back=24, limit=None):
+        df = self.df[self.df.index >= self.df.index[-1] - pd.Timedelta(hours=hours_back)]
+        return df.index.values, df['metric_value'].values
+
+    def _query_rollup(self, pod_name, namespace, metric_name, hours_back, resolution):
+        self.resolutions.append(resolution)
+        buckets = self.df['metric_value'].resample(pd.Timedelta(resolution), origin='2000-01-01')
+        return pd.DataFrame({
+            'min': buckets.min(), 'max': buckets.max(), 'avg': buckets.mean(),
+            'last': buckets.last(), 'count': buckets.count()
+        })
+
+
+@pytest.fixture
+def client(monkeypatch):
+    loader = WeekLoader()
+    monkeypatch.setattr(api, 'data_loader', loader)
+    monkeypatch.setattr(api, 'detector', StreamingDetector())
+    monkeypatch.setattr(api, 'result_writer', None)
+    return api.app.test_client(), loader
+
+
+def detect(client, **extra):
+    body = {'pod_name': KEY[0], 'namespace': KEY[1], 'metric_name': KEY[2], **extra}
+    return client.post('/detect-anomaly', json=body)
+
+
+def test_context_comes_from_rollup_buckets(client):
+    client, loader = client
+    response = detect(client, context_hours=168)
+    assert response.status_code == 200
+    context = response.get_json()['context']
+
+    assert loader.resolutions == ['5 minutes']
+    values = loader.df['metric_value']
+    assert context['resolution'] == '5 minutes'
+    assert context['min'] == pytest.approx(values.min())
+    assert context['max'] == pytest.approx(values.max())
+    assert context['mean'] == pytest.approx(values.mean())
+    assert 0 <= context['percentile'] <= 100
+
+
+def test_context_is_opt_in_and_validated(client):
+    client, loader = client
+    assert 'context' not in detect(client).get_json()
+    assert loader.resolutions == []
+    assert detect(client, context_hours='week').status_code == 400
+    assert detect(client, context_hours=10 ** 6).status_code == 400
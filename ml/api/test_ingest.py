@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as api
+from model.data_loader import DataLoader
+from model.streaming_detector import StreamingDetector
+from model.window_cache import WindowCache
+
+START = pd.Timestamp('2026-01-01T00:00:00')
+KEY = ('leaky-app', 'healx', 'memory_usage_mb')
+
+
+class TableLoader(DataLoader):
+    """DataLoader answering queries from an in-memory metrics table"""
+
+    def __init__(self, rows: int, capacity: int = 1024):
+        super().__init__(db_config={}, window_cache=WindowCache(capacity=capacity))
+        self.timestamps = np.array([], dtype='datetime64[ns]')
+        self.values = np.array([])
+        self.full_loads = 0
+        self.insert(rows)
+
+    def insert(self, count: int):
+        index = np.arange(len(self.values), len(self.values) + count)
+        self.timestamps = np.concatenate([self.timestamps, sample_times(index)])
+        self.values = np.concatenate([self.values, 500.0 + index % 7])
+
+    def window(self, hours_back):
+        keep = self.timestamps >= self.timestamps[-1] - np.timedelta64(hours_back, 'h')
+        return self.timestamps[keep], self.values[keep]
+
+    def fetch_metrics_arrays(self, pod_name, namespace, metric_name, hours_back=24, limit=None):
+        self.full_loads += 1
+        return self.window(hours_back)
+
+    def load_metrics(self, pod_name, namespace, metric_name, hours_back=24):
+        timestamps, values = self.fetch_metrics_arrays(pod_name, namespace, metric_name, hours_back)
+        return pd.DataFrame({'metric_value': values}, index=pd.DatetimeIndex(timestamps))
+
+    def _load_metrics_since(self, pod_name, namespace, metric_name, hours_back, since):
+        raise AssertionError('ingest never queries for new rows')
+
+
+def sample_times(index):
+    return np.datetime64(START, 'ns') + np.asarray(index) * np.timedelta64(30, 's')
+
+
+def push(client, loader, first: int, count: int):
+    """Push samples first..first+count-1 from the table, as the collector does"""
+    points = [
+        {'pod_name': KEY[0], 'namespace': KEY[1], 'metric_name': KEY[2],
+         'timestamp': pd.Timestamp(t).isoformat(), 'metric_value': float(v)}
+        for t, v in zip(loader.timestamps[first:first + count], loader.values[first:first + count])
+    ]
+    response = client.post('/ingest', json={'points': points})
+    assert response.status_code == 200
+    assert response.get_json()['errors'] == {}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # A detector wider than the lookback counts every distinct sample it saw
+    monkeypatch.setattr(api, 'detector', StreamingDetector(horizon=1000))
+    monkeypatch.setattr(api, 'predictor', None)
+    monkeypatch.setattr(api, 'result_writer', None)
+    return api.app.test_client()
+
+
+def test_ingest_steady_state_and_missed_push(client, monkeypatch):
+    loader = TableLoader(rows=300)
+    monkeypatch.setattr(api, 'data_loader', loader)
+    push(client, loader, 299, 1)
+    assert loader.full_loads == 1
+
+    loader.insert(2)
+    push(client, loader, 300, 2)
+    assert loader.full_loads == 1
+
+    # The push of sample 302 was missed, so 303 forces a reload
+    loader.insert(2)
+    push(client, loader, 303, 1)
+    assert loader.full_loads == 2
+    # Samples 59 (start of the first two-hour load) to 303 once each,
+    # including 302 recovered by the reload
+    assert api.detector.last_timestamp(KEY) == loader.timestamps[-1]
+    assert api.detector.evaluate(KEY)['points'] == 303 - 59 + 1
+
+
+def test_ingest_reloads_when_ring_is_too_small(client, monkeypatch):
+    # Two hours are 241 samples
+    loader = TableLoader(rows=300, capacity=200)
+    monkeypatch.setattr(api, 'data_loader', loader)
+    push(client, loader, 299, 1)
+
+    loader.insert(1)
+    push(client, loader, 300, 1)
+    assert loader.full_loads == 2
+    assert api.detector.last_timestamp(KEY) == loader.timestamps[-1]
+
+
+def test_ingest_ignores_samples_already_seen(client, monkeypatch):
+    loader = TableLoader(rows=300)
+    monkeypatch.setattr(api, 'data_loader', loader)
+    push(client, loader, 299, 1)
+    first_points = api.detector.evaluate(KEY)['points']
+
+    # A retried push overlapping what was already ingested
+    loader.insert(1)
+    push(client, loader, 297, 4)
+    push(client, loader, 297, 4)
+    assert loader.full_loads == 1
+    assert api.detector.evaluate(KEY)['points'] == first_points + 1
@@ -0,0 +1,36 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app as api
+from model.model_registry import ModelWatcher, model_version
+
+
+class FakePredictor:
+    sequence_length = 60
+    n_features = 1
+
+    def __init__(self, training_watermark):
+        self.training_watermark = training_watermark
+
+    def predict_single(self, window):
+        return window[-10:, 0]
+
+
+def test_swap_updates_model_version_and_watermark(tmp_path, monkeypatch):
+    model_path = str(tmp_path / 'lstm_predictor.keras')
+    with open(model_path, 'wb') as f:
+        f.write(b'v1')
+    monkeypatch.setattr(api, 'predictor', FakePredictor('2026-01-01T00:00:00'))
+    monkeypatch.setattr(api, 'predictor_version', model_version(model_path))
+
+    watcher = ModelWatcher(model_path, lambda: FakePredictor('2026-01-02T00:00:00'),
+                           api.swap_predictor, current_version=api.predictor_version)
+    with open(model_path, 'wb') as f:
+        f.write(b'v2')
+    watcher.check_once()
+    assert watcher.check_once() is True
+
+    health = api.app.test_client().get('/health').get_json()
+    assert health['model_version'] == model_version(model_path)
+    assert health['training_watermark'] == '2026-01-02T00:00:00'
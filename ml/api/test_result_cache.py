@@ -0,0 +1,110 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import threading
+import time
+
+import pytest
+
+from result_cache import ResultCache
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def run_flight(cache, key, compute, callers):
+    """
+    Call get_or_compute() from `callers` threads; compute() only returns once
+    every other caller has joined the flight. Returns (value or exception,
+    computed) per caller.
+    """
+    release = threading.Event()
+    calls = []
+    outcomes = [None] * callers
+
+    def leader_compute():
+        calls.append(1)
+        release.wait()
+        return compute()
+
+    def worker(i):
+        try:
+            outcomes[i] = cache.get_or_compute(key, leader_compute)
+        except BaseException as e:
+            outcomes[i] = (e, None)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(callers)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()['coalesced'] < callers - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    return len(calls), outcomes
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResultCache()
+    calls, outcomes = run_flight(cache, 'key', lambda: {'value': 1}, callers=8)
+
+    assert calls == 1
+    assert all(value == {'value': 1} for value, _ in outcomes)
+    assert sum(computed for _, computed in outcomes) == 1
+    assert cache.get('key') == {'value': 1}
+    assert cache.stats()['coalesced'] == 7
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = ResultCache()
+
+    def fail():
+        raise ValueError('model failed')
+
+    calls, outcomes = run_flight(cache, 'key', fail, callers=4)
+    assert calls == 1
+    assert all(isinstance(error, ValueError) for error, _ in outcomes)
+    assert cache.get('key') is None
+
+    # The next caller computes again
+    assert cache.get_or_compute('key', lambda: 'ok') == ('ok', True)
+
+
+def test_base_exceptions_reach_waiters():
+    cache = ResultCache()
+
+    def interrupt():
+        raise Interrupted()
+
+    _, outcomes = run_flight(cache, 'key', interrupt, callers=3)
+    assert all(isinstance(error, Interrupted) for error, _ in outcomes)
+    assert cache.stats()['entries'] == 0
+
+
+def test_lru_eviction_and_version_keys():
+    cache = ResultCache(max_entries=2)
+    cache.put(('pod-a', 'v1'), 'a')
+    cache.put(('pod-b', 'v1'), 'b')
+    assert cache.get(('pod-a', 'v1')) == 'a'
+
+    # pod-b is the least recently used
+    cache.put(('pod-c', 'v1'), 'c')
+    assert cache.get(('pod-b', 'v1')) is None
+    assert cache.stats()['evictions'] == 1
+
+    # A reloaded model is a new version, so old results are never served
+    assert cache.get(('pod-a', 'v2')) is None
+    assert cache.get_or_compute(('pod-a', 'v2'), lambda: 'a2') == ('a2', True)
+    assert cache.get(('pod-a', 'v1')) is None
+
+
+def test_disabled_cache_always_computes():
+    cache = ResultCache(max_entries=0)
+    cache.put('key', 'value')
+    assert cache.get('key') is None
+    assert cache.get_or_compute('key', lambda: 'fresh') == ('fresh', True)
+    with pytest.raises(ValueError):
+        cache.get_or_compute('key', lambda: int('x'))
@@ -0,0 +1,13 @@
+"""
+WSGI entry point for production serving
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app the numpy backend model is loaded once in the master and
+shared copy-on-write by every worker. TensorFlow is not fork-safe, so the
+keras backend is loaded per worker in post_fork instead (see gunicorn.conf.py).
+"""
+from app import app, load_model, resolve_backend
+
+if resolve_backend() == 'numpy':
+    load_model()
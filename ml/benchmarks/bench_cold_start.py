@@ -0,0 +1,70 @@
+"""
+Cold start time and peak RSS of the keras vs numpy serving backends
+
+Usage:
+    python benchmarks/bench_cold_start.py
+
+Each backend is measured in a fresh interpreter: import, load the model and
+run one prediction. A throwaway model is built and exported to a temp dir.
+"""
+import sys
+import os
+import json
+import subprocess
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import sys, time
+start = time.perf_counter()
+sys.path.append({ml_dir!r})
+import numpy as np
+if {backend!r} == 'numpy':
+    from model.numpy_inference import NumpyLSTMPredictor as Predictor
+else:
+    from model.lstm_model import LSTMPredictor as Predictor
+predictor = Predictor()
+predictor.load_model({model_path!r})
+if {backend!r} == 'keras':
+    predictor.enable_serving_mode()
+predictor.predict_single(np.random.rand(60).astype(np.float32))
+elapsed = time.perf_counter() - start
+# VmHWM is per address space, unlike ru_maxrss which survives exec
+with open('/proc/self/status') as f:
+    rss_mb = next(int(l.split()[1]) for l in f if l.startswith('VmHWM')) / 1024
+print(f"{{elapsed}} {{rss_mb}}")
+"""
+
+
+def measure(backend, model_path):
+    code = CHILD.format(ml_dir=ML_DIR, backend=backend, model_path=model_path)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    elapsed, rss_mb = out.stdout.strip().splitlines()[-1].split()
+    return float(elapsed), float(rss_mb)
+
+
+def main():
+    from model.lstm_model import LSTMPredictor
+    from model.numpy_inference import export_weights
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'lstm_predictor.keras')
+        predictor = LSTMPredictor()
+        predictor.build_model()
+        predictor.set_scaling_params({'X_min': 0.0, 'X_max': 1.0, 'y_min': 0.0, 'y_max': 1.0})
+        predictor.save_model(model_path)
+        export_weights(model_path)
+
+        results = {}
+        for backend in ('keras', 'numpy'):
+            elapsed, rss_mb = measure(backend, model_path)
+            results[backend] = {'cold_start_s': elapsed, 'peak_rss_mb': rss_mb}
+            print(f"{backend:<6} cold start={elapsed:6.2f} s  peak RSS={rss_mb:7.1f} MB")
+
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
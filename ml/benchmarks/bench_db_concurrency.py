@@ -0,0 +1,62 @@
+"""
+Load test: DataLoader throughput vs number of concurrent threads
+
+Usage:
+    DB_HOST=localhost python benchmarks/bench_db_concurrency.py [pod_name] [requests_per_level]
+
+Needs a live database with metrics for the given pod (default leaky-app).
+The window cache is disabled so every call goes to PostgreSQL.
+"""
+import sys
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.data_loader import DataLoader
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': int(os.getenv('DB_PORT', 5432)),
+    'user': os.getenv('DB_USER', 'healx_user'),
+    'password': os.getenv('DB_PASSWORD', 'healx_pass_dev_only'),
+    'dbname': os.getenv('DB_NAME', 'healx')
+}
+
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16]
+
+
+def main():
+    pod_name = sys.argv[1] if len(sys.argv) > 1 else 'leaky-app'
+    requests_per_level = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    # min_connections at the top level keeps every warmed-up connection open
+    loader = DataLoader(DB_CONFIG, min_connections=max(CONCURRENCY_LEVELS),
+                        max_connections=max(CONCURRENCY_LEVELS))
+    loader.connect()
+
+    def one_request(_):
+        return len(loader.load_metrics(pod_name, 'healx', 'memory_usage_mb', hours_back=1))
+
+    # Warm up the pool
+    with ThreadPoolExecutor(max_workers=max(CONCURRENCY_LEVELS)) as executor:
+        list(executor.map(one_request, range(max(CONCURRENCY_LEVELS))))
+
+    results = []
+    for concurrency in CONCURRENCY_LEVELS:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one_request, range(requests_per_level)))
+        elapsed = time.perf_counter() - start
+        throughput = requests_per_level / elapsed
+        results.append({'concurrency': concurrency, 'requests_per_s': throughput})
+        print(f"concurrency={concurrency:<3} {throughput:8.1f} req/s  "
+              f"({elapsed / requests_per_level * 1000:.2f} ms/req wall)")
+
+    loader.close()
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Per-request inference latency: Keras model.predict vs the compiled serving path
+
+Usage:
+    python benchmarks/bench_inference.py [iterations]
+
+Uses a freshly built (untrained) model, since latency only depends on the
+architecture, so no database or saved model is needed.
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from model.lstm_model import LSTMPredictor
+
+
+def time_calls(fn, window, iterations):
+    """Return per-call latencies in milliseconds"""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(window)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def report(name, latencies):
+    print(f"{name:<24} p50={np.percentile(latencies, 50):7.3f} ms  "
+          f"p95={np.percentile(latencies, 95):7.3f} ms  "
+          f"mean={latencies.mean():7.3f} ms")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    predictor = LSTMPredictor(sequence_length=60, prediction_horizon=10, lstm_units=64)
+    predictor.build_model()
+
+    window = np.random.rand(60).astype(np.float32)
+
+    # Warm up Keras predict loop
+    predictor.predict_single(window)
+    keras_latencies = time_calls(predictor.predict_single, window, iterations)
+
+    predictor.enable_serving_mode()
+    serving_latencies = time_calls(predictor.predict_single, window, iterations)
+
+    print(f"predict_single latency over {iterations} calls")
+    report("keras model.predict", keras_latencies)
+    report("tf.function serving", serving_latencies)
+    print(f"speedup (p50): {np.percentile(keras_latencies, 50) / np.percentile(serving_latencies, 50):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
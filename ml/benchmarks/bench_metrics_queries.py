@@ -0,0 +1,231 @@
+"""
+Query benchmark: per-series metric loads on a large metrics table, with the
+original indexes vs the ones in deploy/scripts/init-db.sql
+
+Usage:
+    DB_HOST=localhost python benchmarks/bench_metrics_queries.py [--rows 10000000]
+        [--pods 1000] [--repeat 200] [--output results.json]
+
+Needs a PostgreSQL 15 server (as deployed). A scratch database
+(BENCH_DB_NAME, default healx_bench) is created next to DB_NAME, init-db.sql
+is applied and the metrics table is seeded with --rows samples: --pods pods
+x 2 metrics at 30s intervals ending now, inserted in time order like the
+collector writes them. Seeding is skipped when the table already holds
+enough fresh rows.
+
+For each index layout ('before': (pod_name, timestamp) and
+(metric_name, timestamp); 'after': the metrics indexes from init-db.sql)
+the indexes are rebuilt and ANALYZEd, load_metrics() and
+fetch_metrics_arrays() are timed for random pods, and the plan of the
+/predict query is printed.
+"""
+import sys
+import os
+import argparse
+import json
+import platform
+import re
+from datetime import datetime
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ML_DIR)
+
+import numpy as np
+import psycopg2
+from psycopg2 import sql
+from model.data_loader import DataLoader
+from bench_suite import measure
+
+INIT_SQL = os.path.join(os.path.dirname(ML_DIR), 'deploy', 'scripts', 'init-db.sql')
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': int(os.getenv('DB_PORT', 5432)),
+    'user': os.getenv('DB_USER', 'healx_user'),
+    'password': os.getenv('DB_PASSWORD', 'healx_pass_dev_only'),
+    'dbname': os.getenv('DB_NAME', 'healx')
+}
+BENCH_DB_CONFIG = dict(DB_CONFIG, dbname=os.getenv('BENCH_DB_NAME', 'healx_bench'))
+
+METRICS = ('memory_usage_mb', 'cpu_usage')
+LEGACY_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_pod_time ON metrics (pod_name, "timestamp")',
+    'CREATE INDEX IF NOT EXISTS idx_metric_time ON metrics (metric_name, "timestamp")'
+]
+# Indexes that differ between the layouts
+LAYOUT_INDEXES = ('idx_pod_time', 'idx_series_time', 'idx_metrics_time_brin')
+
+PREDICT_QUERY = """
+    SELECT timestamp, metric_value
+    FROM metrics
+    WHERE pod_name = %s
+      AND namespace = 'healx'
+      AND metric_name = 'memory_usage_mb'
+      AND timestamp >= NOW() - INTERVAL '1 hours'
+    ORDER BY timestamp ASC
+"""
+
+
+def schema_index_statements() -> list:
+    """CREATE/DROP INDEX statements for the metrics table in init-db.sql"""
+    with open(INIT_SQL, 'r') as f:
+        statements = re.findall(r'^(?:CREATE|DROP) INDEX[^;]*;', f.read(), re.M)
+    return [s for s in statements if re.search(r'\bON metrics\b|\bidx_pod_time\b', s)]
+
+
+def ensure_database():
+    """Create the scratch database and apply init-db.sql"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (BENCH_DB_CONFIG['dbname'],))
+        if cur.fetchone() is None:
+            cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(BENCH_DB_CONFIG['dbname'])))
+    conn.close()
+
+    conn = psycopg2.connect(**BENCH_DB_CONFIG)
+    conn.autocommit = True
+    with open(INIT_SQL, 'r') as f, conn.cursor() as cur:
+        cur.execute(f.read())
+    return conn
+
+
+def seed(conn, rows: int, pods: int, chunks: int = 50):
+    """Fill metrics with rows samples ending now, oldest first"""
+    per_series = rows // (len(METRICS) * pods)
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*), COALESCE(MAX("timestamp") >= NOW() - INTERVAL '10 minutes', false)
+            FROM metrics
+        """)
+        count, fresh = cur.fetchone()
+        if count >= per_series * len(METRICS) * pods and fresh:
+            print(f"Reusing {count} seeded rows")
+            return
+
+        print(f"Seeding {per_series * len(METRICS) * pods} rows ({pods} pods x {len(METRICS)} "
+              f"metrics x {per_series} samples)...")
+        cur.execute("TRUNCATE metrics")
+        # Rollups are not read here; loading without indexes is much faster
+        cur.execute("ALTER TABLE metrics DISABLE TRIGGER metrics_rollup")
+        for name in LAYOUT_INDEXES + ('idx_metric_time',):
+            cur.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(name)))
+
+        bounds = np.linspace(per_series, 0, chunks + 1).astype(int)
+        for i, (newest_age, oldest_age) in enumerate(zip(bounds[1:], bounds[:-1])):
+            cur.execute("""
+                INSERT INTO metrics (pod_name, namespace, metric_name, metric_value, "timestamp")
+                SELECT 'bench-pod-' || p, 'healx', m, 200 + 100 * random(),
+                       date_trunc('minute', NOW()::timestamp) - s * INTERVAL '30 seconds'
+                FROM generate_series(%s, %s, -1) s,
+                     generate_series(1, %s) p,
+                     unnest(%s::text[]) m
+            """, (int(oldest_age) - 1, int(newest_age), pods, list(METRICS)))
+            print(f"  {i + 1}/{chunks}", end='\r', flush=True)
+
+        cur.execute("ALTER TABLE metrics ENABLE TRIGGER metrics_rollup")
+        cur.execute(LEGACY_INDEXES[1])
+        # Sets the visibility map, which index-only scans rely on
+        cur.execute("VACUUM (ANALYZE) metrics")
+        print()
+
+
+def build_layout(conn, layout: str):
+    """Rebuild the indexes that differ between the layouts"""
+    with conn.cursor() as cur:
+        for name in LAYOUT_INDEXES:
+            cur.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(name)))
+        for statement in (LEGACY_INDEXES if layout == 'before' else schema_index_statements()):
+            cur.execute(statement)
+        cur.execute("ANALYZE metrics")
+        cur.execute("""
+            SELECT indexname, pg_size_pretty(pg_relation_size(indexname::regclass))
+            FROM pg_indexes WHERE tablename = 'metrics' ORDER BY indexname
+        """)
+        return dict(cur.fetchall())
+
+
+def explain(conn, pod_name: str) -> list:
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + PREDICT_QUERY, (pod_name,))
+        return [row[0] for row in cur.fetchall()]
+
+
+def query_cases(pods: int, repeat: int) -> dict:
+    loader = DataLoader(BENCH_DB_CONFIG)
+    loader.connect()
+    rng = np.random.RandomState(0)
+
+    def random_pod():
+        return f'bench-pod-{rng.randint(1, pods + 1)}'
+
+    try:
+        return {
+            'load_metrics_1h': measure(
+                lambda: loader.load_metrics(random_pod(), 'healx', 'memory_usage_mb', hours_back=1), repeat),
+            'load_metrics_24h': measure(
+                lambda: loader.load_metrics(random_pod(), 'healx', 'memory_usage_mb', hours_back=24), repeat // 4),
+            'fetch_metrics_arrays_1h': measure(
+                lambda: loader.fetch_metrics_arrays(random_pod(), 'healx', 'memory_usage_mb', hours_back=1), repeat),
+            'fetch_metrics_arrays_last60': measure(
+                lambda: loader.fetch_metrics_arrays(random_pod(), 'healx', 'memory_usage_mb',
+                                                    hours_back=1, limit=60), repeat)
+        }
+    finally:
+        loader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='metrics table query benchmark')
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--pods', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    conn = ensure_database()
+    seed(conn, args.rows, args.pods)
+
+    results, plans, indexes = {}, {}, {}
+    for layout in ('before', 'after'):
+        print(f"\nBuilding '{layout}' indexes...")
+        indexes[layout] = build_layout(conn, layout)
+        # One untimed pass so both layouts start with a warm cache
+        query_cases(args.pods, 10)
+        results[layout] = query_cases(args.pods, args.repeat)
+        plans[layout] = explain(conn, 'bench-pod-1')
+        print('\n'.join(plans[layout]))
+
+    print(f"\n{'case':<30} {'before':>10} {'after':>10} {'ratio':>7}  (median ms)")
+    for case in results['before']:
+        before = results['before'][case]['median_ms']
+        after = results['after'][case]['median_ms']
+        print(f"{case:<30} {before:10.3f} {after:10.3f} {after / before:7.2f}")
+
+    with conn.cursor() as cur:
+        cur.execute("SHOW server_version")
+        server_version = cur.fetchone()[0]
+        cur.execute("SELECT pg_size_pretty(pg_total_relation_size('metrics'))")
+        table_size = cur.fetchone()[0]
+    conn.close()
+
+    if args.output:
+        report = {
+            'meta': {
+                'rows': args.rows,
+                'pods': args.pods,
+                'server_version': server_version,
+                'table_size': table_size,
+                'python': platform.python_version(),
+                'created_at': datetime.utcnow().isoformat()
+            },
+            'indexes': indexes,
+            'results': results,
+            'plans': plans
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
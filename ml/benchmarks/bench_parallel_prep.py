@@ -0,0 +1,63 @@
+"""
+Parallel data preparation speedup vs number of worker processes
+
+Usage:
+    python benchmarks/bench_parallel_prep.py [pods] [points_per_series]
+
+Builds a synthetic multi-pod dataset (memory and CPU series per pod), runs
+prepare_parallel with 1..cpu_count workers and checks every run produces
+identical arrays.
+"""
+import sys
+import os
+import json
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from training.parallel_prep import prepare_parallel, scaling_from_series
+
+
+def synthetic_series(pods, points, seed=0):
+    rng = np.random.RandomState(seed)
+    series = {}
+    for p in range(pods):
+        t = np.arange(points)
+        series[(f'pod-{p}', 'healx', 'memory_usage_mb')] = 200 + 0.01 * t * rng.rand() + rng.randn(points)
+        series[(f'pod-{p}', 'healx', 'cpu_usage')] = 0.5 + 0.2 * np.sin(t / 100) + 0.05 * rng.randn(points)
+    return series
+
+
+def main():
+    pods = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 2880  # one day at 30s
+
+    series = synthetic_series(pods, points)
+    scaling = scaling_from_series(series)
+
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+
+    results, baseline, reference = [], None, None
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            prepared = prepare_parallel(series, tmp, scaling, workers=workers)
+            elapsed = time.perf_counter() - start
+
+            checksum = (float(prepared['X'].sum()), float(prepared['y'].sum()), int(prepared['is_anomaly'].sum()))
+            if reference is None:
+                reference = checksum
+            assert checksum == reference
+
+        baseline = baseline or elapsed
+        results.append({'workers': workers, 'seconds': elapsed, 'speedup': baseline / elapsed})
+        print(f"workers={workers:<3} {elapsed:7.2f} s  speedup={baseline / elapsed:5.2f}x  "
+              f"({len(prepared['X'])} windows)")
+
+    print(json.dumps({'cpu_count': cores, 'series': len(series), 'results': results}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""
+Benchmark suite for the ML data and inference paths
+
+Usage:
+    python benchmarks/bench_suite.py [--backend numpy|keras] [--quick]
+                                     [--output results.json]
+                                     [--compare baseline.json] [--threshold 1.25]
+
+Needs no database or trained model: DataLoader queries are answered from
+synthetic series and the model has random weights (latency only depends on
+the architecture). Covers sequence preparation, normalization, labeling,
+single vs batched inference, concurrent single-window requests with and
+without the micro-batcher, and end-to-end /predict, /predict/batch and
+/detect-anomaly through the Flask test client.
+
+Results are printed as a table and written as JSON (--output). With
+--compare the run is checked against an earlier JSON file and the exit
+status is 1 if any case's median got slower than --threshold times the
+baseline, so regressions between versions are visible in CI.
+"""
+import sys
+import os
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ML_DIR)
+sys.path.append(os.path.join(ML_DIR, 'api'))
+
+import numpy as np
+import pandas as pd
+from model.data_loader import DataLoader, rows_to_arrays
+from model.window_cache import WindowCache
+from model.numpy_inference import NumpyLSTMPredictor
+from model.micro_batcher import MicroBatcher
+
+SEQUENCE_LENGTH = 60
+PREDICTION_HORIZON = 10
+LSTM_UNITS = 64
+SCALING_PARAMS = {'X_min': 0.0, 'X_max': 1000.0, 'y_min': 0.0, 'y_max': 1000.0}
+
+
+def synthetic_series(points: int, seed: int = 0) -> pd.DataFrame:
+    """Random walk plus a daily-ish cycle at 30s resolution"""
+    rng = np.random.RandomState(seed)
+    values = 400 + np.cumsum(rng.randn(points)) + 50 * np.sin(np.arange(points) / 500)
+    index = pd.date_range(end=pd.Timestamp.now().floor('30s'), periods=points,
+                          freq='30s', name='timestamp')
+    return pd.DataFrame({'metric_value': values}, index=index)
+
+
+class SyntheticDataLoader(DataLoader):
+    """DataLoader whose queries are answered from per-pod synthetic series"""
+
+    def __init__(self, points: int = 2 * 24 * 120, **kwargs):
+        super().__init__(db_config={}, **kwargs)
+        self.points = points
+        self._series = {}
+
+    def _frame(self, pod_name: str, metric_name: str) -> pd.DataFrame:
+        key = (pod_name, metric_name)
+        if key not in self._series:
+            self._series[key] = synthetic_series(self.points, zlib.crc32('/'.join(key).encode()))
+        return self._series[key]
+
+    def load_metrics(self, pod_name, namespace, metric_name, hours_back=24):
+        df = self._frame(pod_name, metric_name)
+        return df[df.index >= df.index[-1] - pd.Timedelta(hours=hours_back)].copy()
+
+    def fetch_metrics_arrays(self, pod_name, namespace, metric_name, hours_back=24, limit=None):
+        df = self.load_metrics(pod_name, namespace, metric_name, hours_back)
+        if limit is not None:
+            df = df.iloc[-limit:]
+        return df.index.values, df['metric_value'].values
+
+    def _load_metrics_since(self, pod_name, namespace, metric_name, hours_back, since):
+        df = self.load_metrics(pod_name, namespace, metric_name, hours_back)
+        if since is not None:
+            df = df[df.index > pd.Timestamp(since)]
+        cutoff = np.datetime64(self._frame(pod_name, metric_name).index[-1]
+                               - pd.Timedelta(hours=hours_back), 'ns')
+        return cutoff, df.index.values, df['metric_value'].values
+
+    def load_metrics_batch(self, namespace, metric_name, pod_names=None,
+                           label_selector=None, hours_back=1):
+        return {pod: self.load_metrics(pod, namespace, metric_name, hours_back)
+                for pod in pod_names}
+
+
+def random_numpy_predictor(directory: str) -> NumpyLSTMPredictor:
+    """NumpyLSTMPredictor with random weights in the LSTMPredictor architecture"""
+    rng = np.random.RandomState(0)
+    u = LSTM_UNITS
+    shapes = {
+        'layer0_kernel': (1, 4 * u), 'layer0_recurrent_kernel': (u, 4 * u), 'layer0_bias': (4 * u,),
+        'layer1_kernel': (u, 2 * u), 'layer1_recurrent_kernel': (u // 2, 2 * u), 'layer1_bias': (2 * u,),
+        'layer2_kernel': (u // 2, 32), 'layer2_bias': (32,),
+        'layer3_kernel': (32, PREDICTION_HORIZON), 'layer3_bias': (PREDICTION_HORIZON,)
+    }
+    arrays = {name: (rng.randn(*shape) * 0.1).astype(np.float32) for name, shape in shapes.items()}
+    arrays['layer_specs'] = np.array(['lstm_seq', 'lstm', 'dense_relu', 'dense_linear'])
+    arrays['sequence_length'] = np.array(SEQUENCE_LENGTH)
+
+    path = os.path.join(directory, 'lstm_predictor.npz')
+    np.savez(path, **arrays)
+    with open(os.path.join(directory, 'scaling_params.json'), 'w') as f:
+        json.dump(SCALING_PARAMS, f)
+
+    predictor = NumpyLSTMPredictor()
+    predictor.load_model(path)
+    return predictor
+
+
+def keras_predictor():
+    from model.lstm_model import LSTMPredictor
+    predictor = LSTMPredictor(SEQUENCE_LENGTH, PREDICTION_HORIZON, LSTM_UNITS)
+    predictor.build_model()
+    predictor.set_scaling_params(dict(SCALING_PARAMS))
+    predictor.enable_serving_mode()
+    return predictor
+
+
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    """Call fn repeatedly and summarize per-call latency in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    latencies = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return {
+        'median_ms': float(np.median(latencies)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'min_ms': float(latencies.min()),
+        'mean_ms': float(latencies.mean()),
+        'repeat': repeat
+    }
+
+
+def data_cases(repeat: int) -> dict:
+    loader = DataLoader(db_config={})
+    week = synthetic_series(7 * 24 * 120)
+    X, y = loader.prepare_sequences(week, SEQUENCE_LENGTH, PREDICTION_HORIZON)
+
+    # Result decoding for a 1h window as psycopg2 hands it over: the DataFrame
+    # path (read_sql_query -> to_datetime -> set_index) vs rows_to_arrays()
+    hour = week.iloc[-120:]
+    datetime_rows = list(zip(hour.index.to_pydatetime(), hour['metric_value'].tolist()))
+    epoch_rows = list(zip((hour.index.values.astype(np.int64) // 1000).tolist(),
+                          hour['metric_value'].tolist()))
+
+    def decode_dataframe():
+        df = pd.DataFrame(datetime_rows, columns=['timestamp', 'metric_value'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df.set_index('timestamp')
+
+    return {
+        'data.decode_rows_dataframe': measure(decode_dataframe, repeat * 4),
+        'data.decode_rows_arrays': measure(lambda: rows_to_arrays(epoch_rows), repeat * 4),
+        'data.prepare_sequences': measure(
+            lambda: loader.prepare_sequences(week, SEQUENCE_LENGTH, PREDICTION_HORIZON), repeat),
+        'data.normalize_data': measure(lambda: loader.normalize_data(X, y), repeat),
+        'data.create_labeled_dataset': measure(
+            lambda: loader.create_labeled_dataset(week.copy()), repeat)
+    }
+
+
+def inference_cases(predictor, repeat: int, batch_size: int = 64, threads: int = 8) -> dict:
+    windows = np.random.RandomState(1).rand(batch_size, SEQUENCE_LENGTH).astype(np.float32)
+
+    def one_by_one():
+        for window in windows:
+            predictor.predict_single(window)
+
+    # batch_size single-window requests from a gthread-sized pool of threads
+    pool = ThreadPoolExecutor(threads)
+    batcher = MicroBatcher(max_batch_size=32, max_wait_ms=2)
+
+    results = {
+        'inference.predict_single': measure(lambda: predictor.predict_single(windows[0]), repeat * 4),
+        f'inference.predict_single_x{batch_size}': measure(one_by_one, repeat),
+        f'inference.predict_batch_{batch_size}': measure(lambda: predictor.predict_batch(windows), repeat),
+        f'inference.concurrent_single_x{batch_size}': measure(
+            lambda: list(pool.map(predictor.predict_single, windows)), repeat),
+        f'inference.concurrent_microbatched_x{batch_size}': measure(
+            lambda: list(pool.map(lambda w: batcher.predict(predictor, w), windows)), repeat)
+    }
+    pool.shutdown()
+    return results
+
+
+def api_cases(predictor, repeat: int, batch_pods: int = 32) -> dict:
+    import app as api
+    from result_cache import ResultCache
+
+    api.predictor = predictor
+    api.predictor_version = 'bench'
+    api.data_loader = SyntheticDataLoader(window_cache=WindowCache())
+    api.result_writer = None
+    client = api.app.test_client()
+
+    def post(path, body):
+        response = client.post(path, json=body)
+        assert response.status_code == 200, response.get_json()
+
+    pods = [f'bench-pod-{i}' for i in range(batch_pods)]
+    # The synthetic series never get new samples, so the result cache would
+    # answer every repeat; disable it to time the full computation
+    cached = api.result_cache
+    api.result_cache = ResultCache(max_entries=0)
+    results = {
+        'api.predict': measure(
+            lambda: post('/predict', {'pod_name': 'bench-pod-0'}), repeat * 2),
+        f'api.predict_batch_{batch_pods}': measure(
+            lambda: post('/predict/batch', {'pod_names': pods}), repeat),
+        'api.detect_anomaly': measure(
+            lambda: post('/detect-anomaly', {'pod_name': 'bench-pod-0'}), repeat * 2)
+    }
+    api.result_cache = cached
+    results['api.predict_cached'] = measure(
+        lambda: post('/predict', {'pod_name': 'bench-pod-0'}), repeat * 2)
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ML_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> list:
+    """Print median ratios against a baseline run; return the regressed cases"""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    print(f"\n{'case':<36} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for case, current in results.items():
+        if case not in baseline:
+            continue
+        ratio = current['median_ms'] / baseline[case]['median_ms']
+        flag = '  REGRESSION' if ratio > threshold else ''
+        print(f"{case:<36} {baseline[case]['median_ms']:10.3f} {current['median_ms']:10.3f} {ratio:7.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(case)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ML data and inference benchmarks')
+    parser.add_argument('--backend', choices=['numpy', 'keras'], default='numpy')
+    parser.add_argument('--quick', action='store_true', help='Fewer repetitions (smoke test)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Baseline JSON file from an earlier run')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Median slowdown ratio counted as a regression')
+    args = parser.parse_args()
+
+    repeat = 5 if args.quick else 30
+
+    with tempfile.TemporaryDirectory() as tmp:
+        predictor = random_numpy_predictor(tmp) if args.backend == 'numpy' else keras_predictor()
+
+        results = {}
+        results.update(data_cases(repeat))
+        results.update(inference_cases(predictor, repeat))
+        results.update(api_cases(predictor, repeat))
+
+    print(f"{'case':<36} {'median':>10} {'p95':>10} {'min':>10}  (ms)")
+    for case, r in results.items():
+        print(f"{case:<36} {r['median_ms']:10.3f} {r['p95_ms']:10.3f} {r['min_ms']:10.3f}")
+
+    report = {
+        'meta': {
+            'git_revision': git_revision(),
+            'backend': args.backend,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'created_at': datetime.utcnow().isoformat()
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold}x: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,34 +2,207 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import psycopg2
-from typing import Tuple, List
+import psycopg2.pool
+import json
+import threading
+import time
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
+from typing import Tuple, List, Dict, Iterator
+from numpy.lib.stride_tricks import sliding_window_view
+from model.window_cache import WindowCache
+from model.series_scaling import align_features
+
+# Bucket widths for rollup queries, the pre-aggregated table backing each
+# (see init-db.sql), and the longest lookback served at the finer resolutions
+ROLLUP_TABLES = {
+    '5 minutes': 'metrics_rollup_5m',
+    '1 hour': 'metrics_rollup_1h'
+}
+RAW_MAX_HOURS = 6
+FIVE_MINUTE_MAX_HOURS = 7 * 24
+
+# Same origin as the rollup triggers, so on-the-fly and stored buckets line up
+ROLLUP_ORIGIN = "TIMESTAMP '2000-01-01'"
+
+
+# Timestamps are fetched as integer epoch microseconds: psycopg2 turns them
+# into plain ints instead of datetime objects, and NumPy decodes them in bulk
+EPOCH_US = "CAST(EXTRACT(EPOCH FROM {column}) * 1000000 AS BIGINT)"
+
+
+def rows_to_arrays(rows: list) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode (epoch microseconds, value) rows into datetime64[ns] and float64 arrays"""
+    data = np.array(rows, dtype=[('t', np.int64), ('v', np.float64)])
+    return (data['t'] * 1000).astype('datetime64[ns]'), np.ascontiguousarray(data['v'])
+
+
+def resolution_for(hours_back: float) -> str:
+    """Bucket width for a lookback: raw rows up to 6h, 5 minutes up to a week, then hourly"""
+    if hours_back <= RAW_MAX_HOURS:
+        return None
+    if hours_back <= FIVE_MINUTE_MAX_HOURS:
+        return '5 minutes'
+    return '1 hour'
 
 class DataLoader:
-    def __init__(self, db_config: dict):
+    def __init__(self, db_config: dict, window_cache: WindowCache = None,
+                 min_connections: int = 1, max_connections: int = 10,
+                 health_check_interval: float = 30.0,
+                 use_rollup_tables: bool = False):
+        """
+        Load metrics from PostgreSQL through a bounded, thread-safe connection pool
+        
+        Args:
+            db_config: Connection parameters
+            window_cache: Optional cache used by load_recent_metrics()
+            min_connections: Connections opened up front, and the most kept
+                open while idle (returned connections beyond it are closed),
+                so set it to the expected concurrency
+            max_connections: Upper bound on concurrent connections
+            health_check_interval: Connections idle longer than this are
+                pinged before being handed out
+            use_rollup_tables: Serve load_metrics_rollup() from the
+                trigger-maintained rollup tables instead of aggregating raw rows
+        """
         self.db_config = db_config
-        self.conn = None
+        self.pool = None
+        self.window_cache = window_cache
+        self.min_connections = min(min_connections, max_connections)
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+        self.use_rollup_tables = use_rollup_tables
+        self._pool_lock = threading.Lock()
+        # id() -> last use of each connection the pool kept open
+        self._last_used = {}
+        # ThreadedConnectionPool raises instead of blocking when exhausted,
+        # so callers wait here for a free slot
+        self._slots = threading.BoundedSemaphore(max_connections)
+        # Occupancy is tracked here rather than read from the pool's internals;
+        # the lock only guards this bookkeeping, never a network call
+        self._stats_lock = threading.Lock()
+        self._checked_out = set()
         
     def connect(self):
-        """Connect to PostgreSQL database"""
-        self.conn = psycopg2.connect(
-            host=self.db_config['host'],
-            port=self.db_config['port'],
-            user=self.db_config['user'],
-            password=self.db_config['password'],
-            dbname=self.db_config['dbname']
-        )
+        """Create the connection pool"""
+        with self._pool_lock:
+            if self.pool is None:
+                self.pool = psycopg2.pool.ThreadedConnectionPool(
+                    self.min_connections,
+                    self.max_connections,
+                    host=self.db_config['host'],
+                    port=self.db_config['port'],
+                    user=self.db_config['user'],
+                    password=self.db_config['password'],
+                    dbname=self.db_config['dbname']
+                )
         
     def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
+        """Close all pooled connections"""
+        with self._pool_lock:
+            if self.pool:
+                self.pool.closeall()
+                self.pool = None
+                with self._stats_lock:
+                    self._last_used.clear()
+                
+    def _is_healthy(self, conn) -> bool:
+        """Check a connection before handing it out"""
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0) < self.health_check_interval:
+            return True
+        try:
+            # Reads only: autocommit keeps NOW() current and avoids idle-in-transaction
+            if not conn.autocommit:
+                conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+            
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a healthy connection from the pool
+        
+        Broken connections are discarded and replaced, so a database restart
+        only fails the requests that were in flight at the time.
+        """
+        if self.pool is None:
+            self.connect()
+            
+        with self._slots:
+            pool = self.pool
+            conn = self._checkout(pool)
+            if not self._is_healthy(conn):
+                self._checkin(pool, conn, close=True)
+                conn = self._checkout(pool)
+                conn.autocommit = True
+                
+            broken = False
+            try:
+                yield conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                broken = True
+                raise
+            finally:
+                self._checkin(pool, conn, close=broken or conn.closed)
+                    
+    def _checkout(self, pool):
+        """getconn() that records the connection as checked out"""
+        conn = pool.getconn()
+        with self._stats_lock:
+            self._checked_out.add(id(conn))
+        return conn
+            
+    def _checkin(self, pool, conn, close: bool = False):
+        """
+        putconn() counterpart of _checkout()
+        
+        The pool closes connections beyond min_connections, so the last-use
+        time is only kept for connections that are still open. A closed
+        connection's id() may be reused by a new one, which must get the
+        health check and autocommit setup.
+        """
+        try:
+            pool.putconn(conn, close=close)
+        finally:
+            with self._stats_lock:
+                self._checked_out.discard(id(conn))
+                if conn.closed:
+                    self._last_used.pop(id(conn), None)
+                else:
+                    self._last_used[id(conn)] = time.monotonic()
+                    
+    def ping(self) -> bool:
+        """Return True if the database answers a trivial query"""
+        try:
+            with self.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
             
+    def pool_stats(self) -> dict:
+        """
+        Pool occupancy
+        
+        Idle counts connections returned and kept open; the ones opened up
+        front appear once they have been used.
+        """
+        with self._stats_lock:
+            return {
+                'max': self.max_connections,
+                'in_use': len(self._checked_out),
+                'idle': len(self._last_used.keys() - self._checked_out)
+            }
+        
     def load_metrics(self, pod_name: str, namespace: str, 
                     metric_name: str, hours_back: int = 24) -> pd.DataFrame:
         """Load metrics from database"""
-        if not self.conn:
-            self.connect()
-            
         query = """
             SELECT timestamp, metric_value
             FROM metrics
@@ -40,23 +213,524 @@ class DataLoader:
             ORDER BY timestamp ASC
         """
         
-        df = pd.read_sql_query(
-            query, 
-            self.conn, 
-            params=(pod_name, namespace, metric_name, hours_back)
-        )
+        with self.connection() as conn:
+            df = pd.read_sql_query(
+                query, 
+                conn, 
+                params=(pod_name, namespace, metric_name, hours_back)
+            )
         
         df['timestamp'] = pd.to_datetime(df['timestamp'])
         df.set_index('timestamp', inplace=True)
         
         return df
         
+    def fetch_metrics_arrays(self, pod_name: str, namespace: str, metric_name: str,
+                             hours_back: int = 24, limit: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lean fetch for the request path: NumPy arrays instead of a DataFrame
+        
+        Skips read_sql_query, to_datetime and index construction; rows are
+        decoded in bulk by rows_to_arrays().
+        
+        Args:
+            limit: Only return the newest `limit` samples
+            
+        Returns:
+            timestamps (datetime64[ns]) and values (float64), oldest first
+        """
+        query = f"""
+            SELECT {EPOCH_US.format(column='timestamp')}, metric_value
+            FROM metrics
+            WHERE pod_name = %s
+              AND namespace = %s
+              AND metric_name = %s
+              AND timestamp >= NOW() - INTERVAL '%s hours'
+        """
+        params = [pod_name, namespace, metric_name, hours_back]
+        if limit is not None:
+            query += " ORDER BY timestamp DESC LIMIT %s"
+            params.append(limit)
+        else:
+            query += " ORDER BY timestamp ASC"
+            
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, params)
+            timestamps, values = rows_to_arrays(cur.fetchall())
+            
+        if limit is not None:
+            return timestamps[::-1].copy(), values[::-1].copy()
+        return timestamps, values
+        
+    def load_recent_metrics(self, pod_name: str, namespace: str,
+                            metric_name: str, hours_back: int = 1) -> pd.DataFrame:
+        """
+        Load a recent window of metrics, served from the window cache if configured
+        
+        On a cache hit only rows newer than the last cached sample are
+        queried; the result is identical to load_metrics().
+        """
+        timestamps, values = self.load_recent_arrays(pod_name, namespace, metric_name, hours_back)
+        return pd.DataFrame(
+            {'metric_value': values},
+            index=pd.DatetimeIndex(timestamps, name='timestamp')
+        )
+        
+    def load_recent_arrays(self, pod_name: str, namespace: str,
+                           metric_name: str, hours_back: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """load_recent_metrics() as (timestamps, values) arrays, without a DataFrame"""
+        if self.window_cache is None:
+            return self.fetch_metrics_arrays(pod_name, namespace, metric_name, hours_back)
+            
+        key = (pod_name, namespace, metric_name)
+        buffer = self.window_cache.get(key, hours_back)
+        
+        if buffer is None:
+            timestamps, values = self.fetch_metrics_arrays(pod_name, namespace, metric_name, hours_back)
+            self.window_cache.put(key, hours_back, timestamps, values)
+            return timestamps, values
+            
+        with buffer.lock:
+            cutoff, new_timestamps, new_values = self._load_metrics_since(
+                pod_name, namespace, metric_name, hours_back, buffer.last_timestamp
+            )
+            buffer.append(new_timestamps, new_values)
+            
+            if buffer.last_dropped is not None and buffer.last_dropped >= cutoff:
+                # Ring buffer is too small for this lookback, fall back to a full load
+                self.window_cache.invalidate(key)
+                return self.fetch_metrics_arrays(pod_name, namespace, metric_name, hours_back)
+                
+            timestamps, values = buffer.ordered()
+            
+        in_window = timestamps >= cutoff
+        return timestamps[in_window], values[in_window]
+        
+    def _load_metrics_since(self, pod_name: str, namespace: str, metric_name: str,
+                            hours_back: int, since) -> Tuple[np.datetime64, np.ndarray, np.ndarray]:
+        """
+        Fetch rows newer than `since` along with the window cutoff
+        
+        The cutoff is computed by the database so it matches load_metrics();
+        the LEFT JOIN guarantees one row even when there is no new data.
+        """
+        query = f"""
+            SELECT {EPOCH_US.format(column='c.cutoff')},
+                   {EPOCH_US.format(column='m.timestamp')}, m.metric_value
+            FROM (SELECT (NOW() - INTERVAL '%s hours')::timestamp AS cutoff) c
+            LEFT JOIN metrics m
+              ON m.pod_name = %s
+             AND m.namespace = %s
+             AND m.metric_name = %s
+             AND m.timestamp >= c.cutoff
+             AND m.timestamp > %s
+            ORDER BY m.timestamp ASC
+        """
+        since = pd.Timestamp(since).to_pydatetime() if since is not None else datetime.min
+        
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, (hours_back, pod_name, namespace, metric_name, since))
+            rows = cur.fetchall()
+            
+        cutoff = np.datetime64(rows[0][0] * 1000, 'ns')
+        timestamps, values = rows_to_arrays([row[1:] for row in rows if row[1] is not None])
+        
+        return cutoff, timestamps, values
+
+    def ingest_metrics(self, pod_name: str, namespace: str, metric_name: str,
+                       timestamps: np.ndarray, values: np.ndarray,
+                       hours_back: int = 1, max_gap_seconds: float = 45.0) -> pd.DataFrame:
+        """
+        Append pushed samples to the cached window and return the recent window
+
+        Used when the collector pushes points it has just written, so the
+        steady state needs no database read at all. The series is loaded from
+        the database when it is not cached, or when the pushed samples start
+        more than max_gap_seconds after the newest cached one (a push was
+        missed and the cached window would have a hole).
+
+        Args:
+            timestamps, values: New samples, oldest first
+            max_gap_seconds: 1.5 collector intervals by default
+        """
+        if self.window_cache is None:
+            return self.load_metrics(pod_name, namespace, metric_name, hours_back)
+
+        key = (pod_name, namespace, metric_name)
+        timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+        values = np.asarray(values, dtype=np.float64)
+
+        buffer = self.window_cache.get(key, hours_back)
+        if buffer is None:
+            return self.load_recent_metrics(pod_name, namespace, metric_name, hours_back)
+
+        max_gap = np.timedelta64(int(max_gap_seconds * 1e9), 'ns')
+        with buffer.lock:
+            last = buffer.last_timestamp
+            if last is not None:
+                fresh = timestamps > last
+                timestamps, values = timestamps[fresh], values[fresh]
+                
+            gap = last is None or (len(timestamps) and timestamps[0] - last > max_gap)
+            if not gap:
+                buffer.append(timestamps, values)
+                all_timestamps, all_values = buffer.ordered()
+                # The window ends at the newest pushed sample rather than the database clock
+                cutoff = all_timestamps[-1] - np.timedelta64(hours_back, 'h')
+                truncated = buffer.last_dropped is not None and buffer.last_dropped >= cutoff
+                
+        if gap:
+            self.window_cache.invalidate(key)
+            return self.load_recent_metrics(pod_name, namespace, metric_name, hours_back)
+        if truncated:
+            # Ring buffer is too small for this lookback, fall back to a full load
+            self.window_cache.invalidate(key)
+            return self.load_metrics(pod_name, namespace, metric_name, hours_back)
+            
+        in_window = all_timestamps >= cutoff
+        return pd.DataFrame(
+            {'metric_value': all_values[in_window]},
+            index=pd.DatetimeIndex(all_timestamps[in_window], name='timestamp')
+        )
+
+    def load_metrics_after(self, pod_name: str, namespace: str, metric_name: str,
+                           since, hours_back: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fetch only rows newer than `since` (and within the last hours_back)
+
+        Returns:
+            timestamps (datetime64[ns]) and values arrays, oldest first
+        """
+        _, timestamps, values = self._load_metrics_since(
+            pod_name, namespace, metric_name, hours_back, since
+        )
+        return timestamps, values
+
+    def load_metrics_batch(self, namespace: str, metric_name: str,
+                           pod_names: List[str] = None,
+                           label_selector: dict = None,
+                           hours_back: int = 1) -> Dict[str, pd.DataFrame]:
+        """
+        Load metrics for many pods with a single query
+        
+        Args:
+            namespace: Namespace of the pods
+            metric_name: Metric to load
+            pod_names: Explicit list of pods (optional)
+            label_selector: Labels the pods must carry, e.g. {"app": "leaky-app"} (optional)
+            hours_back: How far back to load
+            
+        Returns:
+            Dict of pod_name -> DataFrame indexed by timestamp
+        """
+        query = """
+            SELECT pod_name, timestamp, metric_value
+            FROM metrics
+            WHERE namespace = %s
+              AND metric_name = %s
+              AND timestamp >= NOW() - INTERVAL '%s hours'
+        """
+        params = [namespace, metric_name, hours_back]
+        
+        if pod_names:
+            query += " AND pod_name = ANY(%s)"
+            params.append(list(pod_names))
+        if label_selector:
+            query += " AND labels @> %s::jsonb"
+            params.append(json.dumps(label_selector))
+            
+        query += " ORDER BY pod_name, timestamp ASC"
+        
+        with self.connection() as conn:
+            df = pd.read_sql_query(query, conn, params=tuple(params))
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        
+        return {
+            pod: group.drop(columns='pod_name').set_index('timestamp')
+            for pod, group in df.groupby('pod_name', sort=False)
+        }
+        
+    def load_metrics_rollup(self, pod_name: str, namespace: str, metric_name: str,
+                            hours_back: int = 24, resolution: str = 'auto') -> pd.DataFrame:
+        """
+        Load metrics aggregated into time buckets
+        
+        Long lookbacks transfer one row per bucket instead of one per 30s
+        sample. Buckets come from the rollup tables when use_rollup_tables
+        is set (the oldest bucket is then complete rather than cut at the
+        lookback), otherwise they are aggregated from raw rows with date_bin.
+        
+        Args:
+            resolution: '5 minutes', '1 hour', None for raw rows, or 'auto'
+                to pick from the lookback with resolution_for()
+                
+        Returns:
+            DataFrame indexed by bucket start with min, max, avg, last and
+            count columns; metric_value mirrors avg so the frame can be used
+            wherever load_metrics() output is expected
+        """
+        if resolution == 'auto':
+            resolution = resolution_for(hours_back)
+            
+        if resolution is None:
+            df = self.load_metrics(pod_name, namespace, metric_name, hours_back)
+            values = df['metric_value'].values
+            df = pd.DataFrame({
+                'min': values, 'max': values, 'avg': values, 'last': values,
+                'count': np.ones(len(values), dtype=np.int64)
+            }, index=df.index)
+        else:
+            if resolution not in ROLLUP_TABLES:
+                raise ValueError(f"Unsupported resolution: {resolution}")
+            df = self._query_rollup(pod_name, namespace, metric_name, hours_back, resolution)
+            
+        df['metric_value'] = df['avg']
+        return df
+        
+    def _query_rollup(self, pod_name: str, namespace: str, metric_name: str,
+                      hours_back: int, resolution: str) -> pd.DataFrame:
+        """Fetch one row per bucket, from a rollup table or aggregated on the fly"""
+        if self.use_rollup_tables:
+            query = f"""
+                SELECT bucket, min_value, max_value, sum_value / sample_count,
+                       last_value, sample_count
+                FROM {ROLLUP_TABLES[resolution]}
+                WHERE pod_name = %s
+                  AND namespace = %s
+                  AND metric_name = %s
+                  AND bucket >= date_bin(%s::interval, NOW()::timestamp - INTERVAL '%s hours', {ROLLUP_ORIGIN})
+                ORDER BY bucket ASC
+            """
+            params = (pod_name, namespace, metric_name, resolution, hours_back)
+        else:
+            query = f"""
+                SELECT date_bin(%s::interval, timestamp, {ROLLUP_ORIGIN}) AS bucket,
+                       MIN(metric_value), MAX(metric_value), AVG(metric_value),
+                       (ARRAY_AGG(metric_value ORDER BY timestamp DESC))[1],
+                       COUNT(*)
+                FROM metrics
+                WHERE pod_name = %s
+                  AND namespace = %s
+                  AND metric_name = %s
+                  AND timestamp >= NOW() - INTERVAL '%s hours'
+                GROUP BY bucket
+                ORDER BY bucket ASC
+            """
+            params = (resolution, pod_name, namespace, metric_name, hours_back)
+            
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+            
+        columns = list(zip(*rows)) if rows else [()] * 6
+        return pd.DataFrame({
+            'min': np.array(columns[1], dtype=np.float64),
+            'max': np.array(columns[2], dtype=np.float64),
+            'avg': np.array(columns[3], dtype=np.float64),
+            'last': np.array(columns[4], dtype=np.float64),
+            'count': np.array(columns[5], dtype=np.int64)
+        }, index=pd.DatetimeIndex(np.array(columns[0], dtype='datetime64[ns]'), name='timestamp'))
+        
+    def stream_series(self, metric_names: List[str], namespace: str = None,
+                      hours_back: int = 24,
+                      fetch_size: int = 10000,
+                      since: datetime = None,
+                      until: datetime = None) -> Iterator[Tuple[tuple, np.ndarray, np.ndarray]]:
+        """
+        Stream every (pod, namespace, metric) series through a server-side cursor
+        
+        Rows arrive in fetch_size batches ordered by series, so only the series
+        currently being assembled is held in memory.
+        
+        Args:
+            metric_names: Metrics to include
+            namespace: Restrict to one namespace (optional)
+            hours_back: How far back to load (ignored when since is given)
+            fetch_size: Rows per round trip
+            since: Only rows strictly newer than this timestamp (optional)
+            until: Only rows up to and including this timestamp (optional)
+            
+        Returns:
+            Iterator of ((pod_name, namespace, metric_name), timestamps, values)
+            in timestamp order
+        """
+        query = f"""
+            SELECT pod_name, namespace, metric_name,
+                   {EPOCH_US.format(column='timestamp')}, metric_value
+            FROM metrics
+            WHERE metric_name = ANY(%s)
+        """
+        params = [list(metric_names)]
+        if since is not None:
+            query += " AND timestamp > %s"
+            params.append(since)
+        else:
+            query += " AND timestamp >= NOW() - INTERVAL '%s hours'"
+            params.append(hours_back)
+        if namespace:
+            query += " AND namespace = %s"
+            params.append(namespace)
+        if until is not None:
+            query += " AND timestamp <= %s"
+            params.append(until)
+        query += " ORDER BY pod_name, namespace, metric_name, timestamp ASC"
+        
+        with self.connection() as conn:
+            # Named (server-side) cursors need a transaction
+            conn.autocommit = False
+            cur = conn.cursor(name='healx_stream_series')
+            cur.itersize = fetch_size
+            try:
+                cur.execute(query, tuple(params))
+                
+                current_key, series_rows = None, []
+                while True:
+                    rows = cur.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    # A series may span several fetch batches
+                    for key, group in groupby(rows, key=itemgetter(0, 1, 2)):
+                        if key != current_key:
+                            if current_key is not None:
+                                yield (current_key,) + rows_to_arrays(series_rows)
+                            current_key, series_rows = key, []
+                        series_rows.extend(row[3:] for row in group)
+                        
+                if current_key is not None:
+                    yield (current_key,) + rows_to_arrays(series_rows)
+            finally:
+                cur.close()
+                conn.rollback()
+                conn.autocommit = True
+                
+    def stream_multivariate(self, metric_names: List[str], namespace: str = None,
+                            hours_back: int = 24,
+                            fetch_size: int = 10000) -> Iterator[Tuple[tuple, np.ndarray, np.ndarray]]:
+        """
+        Stream every (pod, namespace) with its metrics aligned on timestamp
+        
+        Like stream_series(), but rows are grouped per pod instead of per
+        metric and pivoted into one column per metric, for multivariate
+        training. Timestamps missing any of the metrics are dropped.
+        
+        Returns:
+            Iterator of ((pod_name, namespace), timestamps, values) with values
+            shaped (timesteps, len(metric_names))
+        """
+        query = f"""
+            SELECT pod_name, namespace, {EPOCH_US.format(column='timestamp')},
+                   array_position(%s::text[], metric_name::text), metric_value
+            FROM metrics
+            WHERE metric_name = ANY(%s)
+              AND timestamp >= NOW() - INTERVAL '%s hours'
+        """
+        params = [list(metric_names), list(metric_names), hours_back]
+        if namespace:
+            query += " AND namespace = %s"
+            params.append(namespace)
+        query += " ORDER BY pod_name, namespace, timestamp ASC"
+        
+        def assemble(key, chunks):
+            rows = [row for chunk in chunks for row in chunk]
+            timestamps = np.array([row[2] for row in rows], dtype=np.int64) * 1000
+            features = np.array([row[3] for row in rows], dtype=np.int64) - 1
+            values = np.array([row[4] for row in rows], dtype=np.float64)
+            timestamps, matrix = align_features(timestamps, features, values, len(metric_names))
+            return key, timestamps.astype('datetime64[ns]'), matrix
+        
+        with self.connection() as conn:
+            # Named (server-side) cursors need a transaction
+            conn.autocommit = False
+            cur = conn.cursor(name='healx_stream_multivariate')
+            cur.itersize = fetch_size
+            try:
+                cur.execute(query, tuple(params))
+                
+                current_key, chunks = None, []
+                while True:
+                    rows = cur.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    # A pod may span several fetch batches
+                    for key, group in groupby(rows, key=itemgetter(0, 1)):
+                        if key != current_key:
+                            if current_key is not None:
+                                yield assemble(current_key, chunks)
+                            current_key, chunks = key, []
+                        chunks.append(list(group))
+                        
+                if current_key is not None:
+                    yield assemble(current_key, chunks)
+            finally:
+                cur.close()
+                conn.rollback()
+                conn.autocommit = True
+                
+    def latest_timestamp(self, metric_names: List[str], namespace: str = None) -> datetime:
+        """Newest sample timestamp for the given metrics, used as a data watermark"""
+        query = "SELECT MAX(timestamp) FROM metrics WHERE metric_name = ANY(%s)"
+        params = [list(metric_names)]
+        if namespace:
+            query += " AND namespace = %s"
+            params.append(namespace)
+            
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, tuple(params))
+            return cur.fetchone()[0]
+            
+    def metric_ranges(self, metric_names: List[str], namespace: str = None,
+                      hours_back: int = 24) -> Dict[str, dict]:
+        """
+        Min/max per metric computed in SQL, for scaling streamed data in one pass
+        
+        Returns:
+            Dict of metric_name -> scaling params (X_min, X_max, y_min, y_max)
+        """
+        query = """
+            SELECT metric_name, MIN(metric_value), MAX(metric_value)
+            FROM metrics
+            WHERE metric_name = ANY(%s)
+              AND timestamp >= NOW() - INTERVAL '%s hours'
+        """
+        params = [list(metric_names), hours_back]
+        if namespace:
+            query += " AND namespace = %s"
+            params.append(namespace)
+        query += " GROUP BY metric_name"
+        
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(query, tuple(params))
+            rows = cur.fetchall()
+            
+        return {
+            name: {'X_min': lo, 'X_max': hi, 'y_min': lo, 'y_max': hi}
+            for name, lo, hi in rows
+        }
+        
+    def resample_metrics(self, df: pd.DataFrame,
+                         interval_seconds: float = 30,
+                         max_fill: int = 4,
+                         method: str = 'linear') -> pd.DataFrame:
+        """
+        Put a load_metrics() frame on the fixed sample grid
+        
+        Double writes are deduplicated and gaps of up to max_fill missed ticks
+        are filled; longer gaps stay NaN (see resample_windows()), and
+        complete_window_starts() skips the windows that touch them.
+        """
+        grid, values = resample_series(df.index.values, df['metric_value'].values,
+                                       interval_seconds, max_fill, method)
+        return pd.DataFrame({'metric_value': values}, index=pd.DatetimeIndex(grid, name='timestamp'))
+        
     def prepare_sequences(self, df: pd.DataFrame, 
                          sequence_length: int = 60,
                          prediction_horizon: int = 10) -> Tuple[np.ndarray, np.ndarray]:
         """
         Prepare sequences for LSTM training
         
+        X and y are read-only strided views into the series, so building
+        them costs no memory beyond the series itself.
+        
         Args:
             df: DataFrame with metric values
             sequence_length: Number of time steps to look back
@@ -66,15 +740,48 @@ class DataLoader:
             X: Input sequences (samples, sequence_length, features)
             y: Target values (samples, prediction_horizon)
         """
-        values = df['metric_value'].values
+        return sequence_views(df['metric_value'].values, sequence_length, prediction_horizon)
         
-        X, y = [], []
+    def iter_sequence_batches(self, values: np.ndarray, indices: np.ndarray,
+                              sequence_length: int = 60,
+                              prediction_horizon: int = 10,
+                              scaling_params: dict = None,
+                              batch_size: int = 32,
+                              shuffle: bool = False,
+                              seed: int = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yield (X, y) training batches, materializing one batch at a time
         
-        for i in range(len(values) - sequence_length - prediction_horizon):
-            X.append(values[i:i + sequence_length])
-            y.append(values[i + sequence_length:i + sequence_length + prediction_horizon])
+        Args:
+            values: 1-D metric series
+            indices: Sequence start positions to draw from (e.g. a train split)
+            scaling_params: If given, batches are min-max normalized with them
+            shuffle: Visit indices in a fresh random order on every call
             
-        return np.array(X), np.array(y)
+        Returns:
+            Iterator of X (batch, sequence_length, 1) and y (batch, prediction_horizon)
+            float32 arrays
+        """
+        X_all, y_all = sequence_views(values, sequence_length, prediction_horizon)
+        if shuffle:
+            indices = np.random.default_rng(seed).permutation(indices)
+            
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            X, y = X_all[batch], y_all[batch]
+            if scaling_params:
+                X = (X - scaling_params['X_min']) / (scaling_params['X_max'] - scaling_params['X_min'] + 1e-8)
+                y = (y - scaling_params['y_min']) / (scaling_params['y_max'] - scaling_params['y_min'] + 1e-8)
+            yield X[..., np.newaxis].astype(np.float32), y.astype(np.float32)
+        
+    def compute_scaling_params(self, X: np.ndarray, y: np.ndarray) -> dict:
+        """Min-max scaling parameters for X and y (works on views without copying, ignores NaN gaps)"""
+        return {
+            'X_min': np.nanmin(X),
+            'X_max': np.nanmax(X),
+            'y_min': np.nanmin(y),
+            'y_max': np.nanmax(y)
+        }
         
     def normalize_data(self, X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, dict]:
         """
@@ -83,29 +790,25 @@ class DataLoader:
         Returns:
             Normalized X, y, and scaling parameters
         """
-        X_min, X_max = X.min(), X.max()
-        y_min, y_max = y.min(), y.max()
+        scaling_params = self.compute_scaling_params(X, y)
+        X_min, X_max = scaling_params['X_min'], scaling_params['X_max']
+        y_min, y_max = scaling_params['y_min'], scaling_params['y_max']
         
         X_normalized = (X - X_min) / (X_max - X_min + 1e-8)
         y_normalized = (y - y_min) / (y_max - y_min + 1e-8)
         
-        scaling_params = {
-            'X_min': X_min,
-            'X_max': X_max,
-            'y_min': y_min,
-            'y_max': y_max
-        }
-        
         return X_normalized, y_normalized, scaling_params
         
     def create_labeled_dataset(self, df: pd.DataFrame, 
-                              anomaly_threshold: float = None) -> pd.DataFrame:
+                              anomaly_threshold: float = None,
+                              window: int = 10) -> pd.DataFrame:
         """
         Create labeled dataset for anomaly detection
         
         Args:
             df: DataFrame with metrics
             anomaly_threshold: Threshold for labeling anomalies (e.g., 90th percentile)
+            window: Number of samples before each anomaly to also mark
             
         Returns:
             DataFrame with 'is_anomaly' column
@@ -114,13 +817,192 @@ class DataLoader:
             # Use 95th percentile as threshold
             anomaly_threshold = df['metric_value'].quantile(0.95)
             
-        df['is_anomaly'] = (df['metric_value'] > anomaly_threshold).astype(int)
-        
-        # Mark sequences leading up to anomalies
-        window = 10  # Mark 10 minutes before anomaly
-        for idx in df[df['is_anomaly'] == 1].index:
-            start_idx = max(0, df.index.get_loc(idx) - window)
-            end_idx = df.index.get_loc(idx)
-            df.iloc[start_idx:end_idx, df.columns.get_loc('is_anomaly')] = 1
+        df['is_anomaly'] = mark_anomaly_windows(
+            df['metric_value'].values > anomaly_threshold, window
+        )
             
-        return df
\ No newline at end of file
+        return df
+
+
+def mark_anomaly_windows(is_anomaly: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mark every anomaly and the `window` samples leading up to it
+    
+    Position i is labeled if any of i .. i + window is anomalous, computed
+    as a forward-looking window count over a cumulative sum instead of a
+    per-anomaly loop.
+    
+    Returns:
+        int array of 0/1 labels
+    """
+    is_anomaly = np.asarray(is_anomaly, dtype=bool)
+    n = len(is_anomaly)
+    
+    counts = np.concatenate(([0], np.cumsum(is_anomaly)))
+    ends = np.minimum(np.arange(n) + window + 1, n)
+    
+    return (counts[ends] - counts[:n] > 0).astype(int)
+
+
+def complete_window_starts(values: np.ndarray, sequence_length: int,
+                           prediction_horizon: int) -> np.ndarray:
+    """
+    Start positions of the sequence_views() windows that contain no NaN
+    
+    values may be 1-D or (timesteps, features); a timestep with any NaN
+    feature is missing.
+    """
+    missing = np.isnan(values)
+    if missing.ndim > 1:
+        missing = missing.any(axis=1)
+    n_samples = max(len(missing) - sequence_length - prediction_horizon, 0)
+    
+    counts = np.concatenate(([0], np.cumsum(missing)))
+    starts = np.arange(n_samples)
+    return starts[counts[starts + sequence_length + prediction_horizon] == counts[starts]]
+
+
+def sequence_views(values: np.ndarray, sequence_length: int,
+                   prediction_horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sliding-window (X, y) views over a 1-D series
+    
+    Returns the same samples as slicing values[i:i + sequence_length] and the
+    following prediction_horizon points for every start i, without copying.
+    """
+    values = np.asarray(values)
+    window = sequence_length + prediction_horizon
+    n_samples = max(len(values) - window, 0)
+    
+    if n_samples == 0:
+        return np.empty((0, sequence_length)), np.empty((0, prediction_horizon))
+        
+    windows = sliding_window_view(values, window)[:n_samples]
+    return windows[:, :sequence_length], windows[:, sequence_length:]
+
+
+def resample_windows(series: List[Tuple[np.ndarray, np.ndarray]], length: int,
+                     interval_seconds: float = 30,
+                     max_fill: int = 4,
+                     method: str = 'linear',
+                     end=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Align many irregular series onto a fixed grid in one vectorized pass
+    
+    Samples are snapped to the nearest grid slot; when several land in the
+    same slot (double writes) the last one given wins. Each series gets the
+    `length` slots ending at its newest sample (or at `end`). Empty slots are
+    filled from neighbouring samples, including ones before the window, if
+    the gap is at most max_fill slots; longer gaps stay NaN, so callers can
+    reject or skip windows that are not well-formed.
+    
+    All series share one sorted key space (series number, slot), so a batch
+    costs a handful of NumPy calls regardless of how many series it holds.
+    
+    Args:
+        series: (timestamps datetime64, values) per series, in any order
+        length: Slots per window
+        interval_seconds: Grid spacing
+        max_fill: Longest run of missing slots that is filled
+        method: 'linear' interpolates across a gap, 'ffill' repeats the
+            previous sample into it
+        end: Timestamp of the last slot, one for all series or one per
+            series (default: each series' newest sample)
+        
+    Returns:
+        ends: Timestamp of each window's last slot (datetime64[ns], NaT for
+            empty series)
+        windows: (len(series), length) float64, NaN where a slot could not be filled
+    """
+    if method not in ('linear', 'ffill'):
+        raise ValueError(f"Unknown fill method: {method}")
+    step = int(interval_seconds * 1e9)
+    n_series = len(series)
+    sizes = np.array([len(values) for _, values in series], dtype=np.int64)
+    windows = np.full((n_series, length), np.nan)
+    ends = np.full(n_series, np.datetime64('NaT'), dtype='datetime64[ns]')
+    if sizes.sum() == 0:
+        return ends, windows
+        
+    timestamps = np.concatenate([np.asarray(t, dtype='datetime64[ns]') for t, _ in series]).astype(np.int64)
+    values = np.concatenate([np.asarray(v, dtype=np.float64) for _, v in series])
+    slots = np.floor_divide(timestamps + step // 2, step)
+    
+    # Key = series * span + slot offset; the padding keeps every window
+    # (which may start before the oldest sample) inside its own series' range
+    end_slots = None
+    if end is not None:
+        end = np.broadcast_to(np.asarray(end, dtype='datetime64[ns]'), (n_series,))
+        end_slots = np.floor_divide(end.astype(np.int64) + step // 2, step)
+    base = (slots.min() if end_slots is None else min(slots.min(), end_slots.min())) - length
+    top = slots.max() if end_slots is None else max(slots.max(), end_slots.max())
+    span = top - base + 2
+    keys = np.repeat(np.arange(n_series), sizes) * span + (slots - base)
+    
+    # Stable sort keeps input order within a slot; keep the last of each
+    order = np.argsort(keys, kind='stable')
+    keys, values = keys[order], values[order]
+    last = np.append(keys[1:] != keys[:-1], True)
+    keys, values = keys[last], values[last]
+    owner = keys // span
+    
+    if end_slots is None:
+        newest = np.append(owner[1:] != owner[:-1], True)
+        end_keys = np.full(n_series, -1, dtype=np.int64)
+        end_keys[owner[newest]] = keys[newest]
+    else:
+        end_keys = np.where(sizes > 0, np.arange(n_series) * span + (end_slots - base), -1)
+    has_data = end_keys >= 0
+    
+    targets = (end_keys[:, np.newaxis] - np.arange(length - 1, -1, -1)).ravel()
+    target_owner = np.repeat(np.arange(n_series), length)
+    
+    prev = np.searchsorted(keys, targets, side='right') - 1
+    prev_clipped = np.maximum(prev, 0)
+    has_prev = (prev >= 0) & (owner[prev_clipped] == target_owner)
+    exact = has_prev & (keys[prev_clipped] == targets)
+    
+    out = np.full(len(targets), np.nan)
+    out[exact] = values[prev_clipped[exact]]
+    
+    gap = has_prev & ~exact
+    prev_key, prev_value = keys[prev_clipped], values[prev_clipped]
+    if method == 'ffill':
+        fill = gap & (targets - prev_key <= max_fill)
+        out[fill] = prev_value[fill]
+    else:
+        nxt = np.minimum(prev + 1, len(keys) - 1)
+        fill = gap & (prev + 1 < len(keys)) & (owner[nxt] == target_owner)
+        fill &= keys[nxt] - prev_key - 1 <= max_fill
+        weight = (targets[fill] - prev_key[fill]) / (keys[nxt][fill] - prev_key[fill])
+        out[fill] = prev_value[fill] + weight * (values[nxt][fill] - prev_value[fill])
+    
+    windows = out.reshape(n_series, length)
+    windows[~has_data] = np.nan
+    end_offsets = end_keys - np.arange(n_series) * span + base
+    ends[has_data] = (end_offsets[has_data] * step).astype('datetime64[ns]')
+    return ends, windows
+
+
+def resample_series(timestamps: np.ndarray, values: np.ndarray,
+                    interval_seconds: float = 30,
+                    max_fill: int = 4,
+                    method: str = 'linear') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Align one series onto a fixed grid from its oldest to its newest sample
+    
+    Same rules as resample_windows(); gaps longer than max_fill stay NaN.
+    
+    Returns:
+        grid timestamps (datetime64[ns]) and values (float64)
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+    if len(timestamps) == 0:
+        return timestamps, np.empty(0)
+    step = int(interval_seconds * 1e9)
+    slots = (timestamps.astype(np.int64) + step // 2) // step
+    length = int(slots.max() - slots.min()) + 1
+    ends, windows = resample_windows([(timestamps, values)], length, interval_seconds,
+                                     max_fill, method)
+    grid = ends[0] - np.arange(length - 1, -1, -1) * np.timedelta64(step, 'ns')
+    return grid, windows[0]
@@ -6,10 +6,13 @@ from typing import Tuple
 import json
 import os
 
+from model.series_scaling import SeriesScaling, series_scaling_path
+
 class LSTMPredictor:
     def __init__(self, sequence_length: int = 60, 
                  prediction_horizon: int = 10,
-                 lstm_units: int = 64):
+                 lstm_units: int = 64,
+                 n_features: int = 1):
         """
         LSTM-based time series predictor
         
@@ -17,18 +20,26 @@ class LSTMPredictor:
             sequence_length: Number of time steps to look back
             prediction_horizon: Number of time steps to predict ahead
             lstm_units: Number of units in LSTM layers
+            n_features: Metrics per time step; above 1 the model is
+                multivariate and predicts (n_features, prediction_horizon)
         """
         self.sequence_length = sequence_length
         self.prediction_horizon = prediction_horizon
         self.lstm_units = lstm_units
+        self.n_features = n_features
         self.model = None
         self.scaling_params = None
+        # Per-series ranges for multivariate models (SeriesScaling)
+        self.series_scaling = None
+        # Newest sample timestamp the model has been trained on (ISO string)
+        self.training_watermark = None
+        self._serving_fn = None
         
     def build_model(self):
         """Build LSTM model architecture"""
         model = keras.Sequential([
             # Input layer
-            layers.Input(shape=(self.sequence_length, 1)),
+            layers.Input(shape=(self.sequence_length, self.n_features)),
             
             # First LSTM layer with return sequences
             layers.LSTM(self.lstm_units, return_sequences=True),
@@ -43,18 +54,26 @@ class LSTMPredictor:
             layers.Dropout(0.2),
             
             # Output layer
-            layers.Dense(self.prediction_horizon)
+            layers.Dense(self.prediction_horizon * self.n_features)
         ])
+        if self.n_features > 1:
+            # One horizon per metric
+            model.add(layers.Reshape((self.n_features, self.prediction_horizon)))
+        
+        self._compile(model)
+        
+        self.model = model
+        self._serving_fn = None
+        return model
         
+    def _compile(self, model):
+        """Compile with the training optimizer and loss"""
         model.compile(
             optimizer=keras.optimizers.Adam(learning_rate=0.001),
             loss='mse',
             metrics=['mae']
         )
         
-        self.model = model
-        return model
-        
     def train(self, X_train: np.ndarray, y_train: np.ndarray,
              X_val: np.ndarray, y_val: np.ndarray,
              epochs: int = 50, batch_size: int = 32) -> dict:
@@ -68,10 +87,50 @@ class LSTMPredictor:
             self.build_model()
             
         # Reshape input for LSTM [samples, timesteps, features]
-        X_train = X_train.reshape(X_train.shape[0], X_train.shape[1], 1)
-        X_val = X_val.reshape(X_val.shape[0], X_val.shape[1], 1)
+        X_train = X_train.reshape(X_train.shape[0], -1, self.n_features)
+        X_val = X_val.reshape(X_val.shape[0], -1, self.n_features)
+        
+        # Train
+        history = self.model.fit(
+            X_train, y_train,
+            validation_data=(X_val, y_val),
+            epochs=epochs,
+            batch_size=batch_size,
+            callbacks=self._training_callbacks(),
+            verbose=1
+        )
+        
+        return history.history
+        
+    def train_on_dataset(self, train_dataset: tf.data.Dataset,
+                         val_dataset: tf.data.Dataset,
+                         epochs: int = 50) -> dict:
+        """
+        Train the LSTM model from streaming datasets
+        
+        Args:
+            train_dataset: Batches of (X (batch, sequence_length, n_features),
+                y (batch, prediction_horizon) or (batch, n_features, prediction_horizon))
+            val_dataset: Validation batches in the same layout
+            
+        Returns:
+            Training history
+        """
+        if self.model is None:
+            self.build_model()
+            
+        history = self.model.fit(
+            train_dataset,
+            validation_data=val_dataset,
+            epochs=epochs,
+            callbacks=self._training_callbacks(),
+            verbose=1
+        )
+        
+        return history.history
         
-        # Callbacks
+    def _training_callbacks(self) -> list:
+        """Early stopping and learning rate schedule shared by all training modes"""
         early_stopping = keras.callbacks.EarlyStopping(
             monitor='val_loss',
             patience=10,
@@ -85,72 +144,183 @@ class LSTMPredictor:
             min_lr=0.00001
         )
         
-        # Train
-        history = self.model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
-            epochs=epochs,
-            batch_size=batch_size,
-            callbacks=[early_stopping, reduce_lr],
-            verbose=1
-        )
+        return [early_stopping, reduce_lr]
         
-        return history.history
+    def dataset_from_generator(self, generator_fn) -> tf.data.Dataset:
+        """
+        Wrap a batch generator factory in a prefetching tf.data pipeline
+        
+        Args:
+            generator_fn: Callable returning a fresh iterator of (X, y) float32
+                batches; it is called again for every epoch
+        """
+        signature = (
+            tf.TensorSpec(shape=(None, self.sequence_length, self.n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,) + self.output_shape, dtype=tf.float32)
+        )
+        dataset = tf.data.Dataset.from_generator(generator_fn, output_signature=signature)
+        return dataset.prefetch(tf.data.AUTOTUNE)
         
     def predict(self, X: np.ndarray) -> np.ndarray:
         """Make predictions"""
         if self.model is None:
             raise ValueError("Model not built or loaded")
             
-        X = X.reshape(X.shape[0], X.shape[1], 1)
+        X = X.reshape(X.shape[0], -1, self.n_features)
         predictions = self.model.predict(X)
         return predictions
         
+    def enable_serving_mode(self):
+        """
+        Compile a graph-mode inference function for low-latency serving
+        
+        model.predict() runs the full Keras predict loop (data adapter,
+        callbacks, batching) on every call, which dominates latency for a
+        single 60-step window. The traced function has a fixed input
+        signature so it is compiled once and reused for every batch size.
+        """
+        if self.model is None:
+            raise ValueError("Model not built or loaded")
+            
+        model = self.model
+        
+        @tf.function(input_signature=[
+            tf.TensorSpec(shape=(None, self.sequence_length, self.n_features), dtype=tf.float32)
+        ])
+        def serve(sequences):
+            return model(sequences, training=False)
+            
+        self._serving_fn = serve
+        
+        # Trace now so the first request does not pay for it
+        self._serving_fn(tf.zeros((1, self.sequence_length, self.n_features), dtype=tf.float32))
+        
+    def _infer(self, sequences: np.ndarray) -> np.ndarray:
+        """Run inference on (N, sequence_length, n_features) input using the fastest available path"""
+        if self._serving_fn is not None:
+            return self._serving_fn(tf.convert_to_tensor(sequences, dtype=tf.float32)).numpy()
+        return self.model.predict(sequences, batch_size=len(sequences), verbose=0)
+        
+    @property
+    def output_shape(self) -> tuple:
+        """Shape of one prediction"""
+        if self.n_features > 1:
+            return (self.n_features, self.prediction_horizon)
+        return (self.prediction_horizon,)
+        
     def predict_single(self, sequence: np.ndarray) -> np.ndarray:
         """Predict for a single sequence"""
-        sequence = sequence.reshape(1, -1, 1)
-        prediction = self.model.predict(sequence, verbose=0)
+        sequence = np.asarray(sequence, dtype=np.float32).reshape(1, -1, self.n_features)
+        prediction = self._infer(sequence)
         return prediction[0]
         
+    def predict_batch(self, sequences: np.ndarray) -> np.ndarray:
+        """Predict for many sequences in a single forward pass"""
+        if self.model is None:
+            raise ValueError("Model not built or loaded")
+            
+        sequences = np.asarray(sequences, dtype=np.float32)
+        sequences = sequences.reshape(sequences.shape[0], -1, self.n_features)
+        return self._infer(sequences)
+        
     def save_model(self, path: str):
-        """Save model and scaling parameters"""
+        """
+        Save model (with optimizer state) and scaling parameters
+        
+        Both files are written to temporary paths and renamed into place, so
+        readers never see a half-written model or a model paired with the
+        wrong scaling parameters. The training watermark is stored with the
+        scaling parameters; per-series ranges go to series_scaling.npz.
+        """
         if self.model is None:
             raise ValueError("No model to save")
             
         # Save model
-        self.model.save(path)
+        tmp_model_path = os.path.splitext(path)[0] + '.tmp.keras'
+        self.model.save(tmp_model_path)
         
         # Save scaling parameters
+        tmp_params_path = None
         if self.scaling_params:
             params_path = os.path.join(os.path.dirname(path), 'scaling_params.json')
-            with open(params_path, 'w') as f:
+            tmp_params_path = params_path + '.tmp'
+            with open(tmp_params_path, 'w') as f:
                 # Convert numpy types to Python types for JSON serialization
                 params_serializable = {
                     k: float(v) if isinstance(v, (np.floating, np.integer)) else v 
                     for k, v in self.scaling_params.items()
                 }
+                if self.training_watermark:
+                    params_serializable['watermark'] = self.training_watermark
                 json.dump(params_serializable, f)
                 
-    def load_model(self, path: str):
-        """Load model and scaling parameters"""
-        self.model = keras.models.load_model(path, compile=False)
+        if self.series_scaling is not None:
+            self.series_scaling.save(series_scaling_path(path))
+        os.replace(tmp_model_path, path)
+        if tmp_params_path:
+            os.replace(tmp_params_path, params_path)
+                
+    def load_model(self, path: str, for_training: bool = False):
+        """
+        Load model and scaling parameters
+        
+        Args:
+            for_training: Restore the compiled optimizer state so training
+                continues where it stopped (warm start) instead of loading
+                an inference-only model
+        """
+        if for_training:
+            self.model = keras.models.load_model(path)
+            if self.model.optimizer is None:
+                self._compile(self.model)
+        else:
+            self.model = keras.models.load_model(path, compile=False)
+        self._serving_fn = None
+        self.sequence_length, self.n_features = self.model.input_shape[1:]
+        self.prediction_horizon = int(np.prod(self.model.output_shape[1:])) // self.n_features
         
         # Load scaling parameters
         params_path = os.path.join(os.path.dirname(path), 'scaling_params.json')
         if os.path.exists(params_path):
             with open(params_path, 'r') as f:
                 self.scaling_params = json.load(f)
+            self.training_watermark = self.scaling_params.pop('watermark', None)
                 
+        scaling_path = series_scaling_path(path)
+        self.series_scaling = None
+        if self.n_features > 1 and os.path.exists(scaling_path):
+            self.series_scaling = SeriesScaling.load(scaling_path)
+                
+    def finetune(self, train_dataset: tf.data.Dataset,
+                 val_dataset: tf.data.Dataset,
+                 epochs: int = 5) -> dict:
+        """
+        Continue training a loaded model on new data only
+        
+        Call load_model(path, for_training=True) first so the optimizer's
+        moment estimates and learning rate carry over from the last run.
+        """
+        if self.model is None:
+            raise ValueError("Model not built or loaded")
+            
+        return self.train_on_dataset(train_dataset, val_dataset, epochs=epochs)
+        
+
     def set_scaling_params(self, params: dict):
         """Set scaling parameters for normalization"""
         self.scaling_params = params
         
-    def denormalize(self, normalized_values: np.ndarray) -> np.ndarray:
-        """Denormalize predictions"""
+    def scaling_for(self, metric_name: str = None) -> dict:
+        """Scaling parameters for a metric, falling back to the model-wide ones"""
         if self.scaling_params is None:
             raise ValueError("Scaling parameters not set")
             
-        y_min = self.scaling_params['y_min']
-        y_max = self.scaling_params['y_max']
+        return self.scaling_params.get('metrics', {}).get(metric_name, self.scaling_params)
+        
+    def denormalize(self, normalized_values: np.ndarray, metric_name: str = None) -> np.ndarray:
+        """Denormalize predictions"""
+        params = self.scaling_for(metric_name)
+        y_min = params['y_min']
+        y_max = params['y_max']
         
         return normalized_values * (y_max - y_min) + y_min
\ No newline at end of file
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, List
+
+import numpy as np
+
+
+class _Request:
+    __slots__ = ('model', 'window', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, model, window: np.ndarray):
+        self.model = model
+        self.window = window
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 2.0,
+                 on_batch: Callable[[int, List[float]], None] = None):
+        """
+        Coalesce concurrent single-window predictions into batched forward passes
+
+        Callers block in predict() while a background thread collects
+        windows until max_batch_size are queued or the oldest has waited
+        max_wait_ms, runs one predict_batch() and hands each caller its row.
+        A batch only holds windows for the same model instance, so requests
+        that straddle a hot reload are never mixed.
+
+        Args:
+            max_batch_size: Upper bound on windows per forward pass
+            max_wait_ms: Longest a window waits for others to join its batch
+            on_batch: Called with (batch size, per-request queue waits in
+                seconds) after every forward pass, for metrics
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.on_batch = on_batch
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.requests = 0
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so (re)start lazily in each process
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._queue = deque()
+            self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+            self._thread.start()
+
+    def predict(self, model, window: np.ndarray) -> np.ndarray:
+        """Predict one window with `model`, sharing the forward pass with concurrent callers"""
+        request = _Request(model, np.asarray(window, dtype=np.float32).reshape(-1))
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append(request)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _next_batch(self) -> List[_Request]:
+        """Block until a batch is due, then pop it"""
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].enqueued + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            model = self._queue[0].model
+            batch, rest = [], deque()
+            while self._queue and len(batch) < self.max_batch_size:
+                request = self._queue.popleft()
+                (batch if request.model is model else rest).append(request)
+            rest.extend(self._queue)
+            self._queue = rest
+            self.batches += 1
+            self.requests += len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            try:
+                predictions = batch[0].model.predict_batch(np.stack([r.window for r in batch]))
+                for request, prediction in zip(batch, predictions):
+                    request.result = prediction
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
+
+            if self.on_batch is not None:
+                try:
+                    self.on_batch(len(batch), [started - r.enqueued for r in batch])
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'queued': len(self._queue),
+                'batches': self.batches,
+                'requests': self.requests,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0
+            }
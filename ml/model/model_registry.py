@@ -0,0 +1,103 @@
+import hashlib
+import os
+import threading
+import numpy as np
+from typing import Callable
+
+from model.numpy_inference import weights_path_for
+from model.series_scaling import series_scaling_path
+
+
+def model_files(model_path: str) -> list:
+    """Files that make up one deployed model version"""
+    return [
+        model_path,
+        weights_path_for(model_path),
+        os.path.join(os.path.dirname(model_path), 'scaling_params.json'),
+        series_scaling_path(model_path)
+    ]
+
+
+def model_version(model_path: str) -> str:
+    """
+    Short fingerprint of the model files on disk
+
+    Built from size and mtime rather than content so polling stays cheap.
+    Returns None if none of the files exist.
+    """
+    parts = []
+    for path in model_files(model_path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        parts.append(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    if not parts:
+        return None
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:12]
+
+
+class ModelWatcher:
+    def __init__(self, model_path: str, load_fn: Callable, swap_fn: Callable,
+                 interval: float = 30.0, current_version: str = None):
+        """
+        Poll the model files and hot-swap the predictor when they change
+
+        Args:
+            model_path: Path of the deployed .keras model
+            load_fn: Returns a freshly loaded predictor
+            swap_fn: Called with (predictor, version) to publish it
+            interval: Seconds between polls
+            current_version: Version of the predictor already being served
+        """
+        self.model_path = model_path
+        self.load_fn = load_fn
+        self.swap_fn = swap_fn
+        self.interval = interval
+        self.current_version = current_version
+        self._pending_version = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check_once(self) -> bool:
+        """
+        Reload if the files changed; returns True when a new model was swapped in
+
+        A new version is only loaded once it has been seen unchanged on two
+        consecutive polls, so a model caught mid-write (model file replaced
+        but scaling params not yet) is never served.
+        """
+        version = model_version(self.model_path)
+        if version is None or version == self.current_version:
+            self._pending_version = None
+            return False
+        if version != self._pending_version:
+            self._pending_version = version
+            return False
+
+        try:
+            predictor = self.load_fn()
+            # Warm up so the first real request does not pay for lazy init
+            predictor.predict_single(np.zeros((predictor.sequence_length, predictor.n_features), dtype=np.float32))
+        except Exception as e:
+            print(f"Model reload failed, keeping version {self.current_version}: {e}")
+            return False
+
+        self.swap_fn(predictor, version)
+        self.current_version = version
+        self._pending_version = None
+        print(f"Model reloaded from {self.model_path} (version {version})")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check_once()
+
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
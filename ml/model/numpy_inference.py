@@ -0,0 +1,209 @@
+"""
+Pure-NumPy inference for the LSTM predictor
+
+The serving model is a small 2-layer LSTM plus two Dense layers, so there is
+no need to import TensorFlow (seconds of startup, hundreds of MB of RSS) just
+to run its forward pass. export_weights() dumps the trained weights from the
+.keras file to a compact .npz, and NumpyLSTMPredictor runs the same forward
+pass with vectorized NumPy. Outputs match Keras within 1e-5 (float32).
+
+Usage:
+    python model/numpy_inference.py model/saved_models/lstm_predictor.keras
+"""
+import numpy as np
+import json
+import os
+import sys
+
+
+def weights_path_for(model_path: str) -> str:
+    """Return the .npz path that sits next to a .keras model"""
+    return os.path.splitext(model_path)[0] + '.npz'
+
+
+def export_weights(model_path: str, output_path: str = None) -> str:
+    """
+    Export LSTM and Dense weights from a .keras model to .npz
+
+    Args:
+        model_path: Path to the trained .keras model
+        output_path: Destination .npz (defaults to model_path with .npz suffix)
+
+    Returns:
+        Path of the written .npz file
+    """
+    # TensorFlow is only needed for export, never at serve time
+    from tensorflow import keras
+
+    model = keras.models.load_model(model_path, compile=False)
+    output_path = output_path or weights_path_for(model_path)
+
+    arrays = {}
+    layer_specs = []
+    for layer in model.layers:
+        if isinstance(layer, keras.layers.LSTM):
+            kernel, recurrent_kernel, bias = layer.get_weights()
+            spec = 'lstm_seq' if layer.return_sequences else 'lstm'
+            idx = len(layer_specs)
+            arrays[f'layer{idx}_kernel'] = kernel
+            arrays[f'layer{idx}_recurrent_kernel'] = recurrent_kernel
+            arrays[f'layer{idx}_bias'] = bias
+        elif isinstance(layer, keras.layers.Dense):
+            kernel, bias = layer.get_weights()
+            activation = layer.get_config()['activation']
+            if activation not in ('relu', 'linear'):
+                raise ValueError(f"Unsupported Dense activation: {activation}")
+            spec = f'dense_{activation}'
+            idx = len(layer_specs)
+            arrays[f'layer{idx}_kernel'] = kernel
+            arrays[f'layer{idx}_bias'] = bias
+        else:
+            # Dropout and friends are no-ops at inference time
+            continue
+        layer_specs.append(spec)
+
+    arrays['layer_specs'] = np.array(layer_specs)
+    arrays['sequence_length'] = np.array(model.input_shape[1])
+    # Multivariate models end in a Reshape, replayed from n_features
+    arrays['n_features'] = np.array(model.input_shape[2])
+
+    # Written beside the target and renamed into place, so the model watcher
+    # never loads a half-written file (np.savez appends .npz to other names)
+    tmp_path = os.path.splitext(output_path)[0] + '.tmp.npz'
+    np.savez_compressed(tmp_path, **{
+        k: v.astype(np.float32) if v.dtype.kind == 'f' else v
+        for k, v in arrays.items()
+    })
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def lstm_forward(x: np.ndarray, kernel: np.ndarray, recurrent_kernel: np.ndarray,
+                 bias: np.ndarray, return_sequences: bool = False) -> np.ndarray:
+    """
+    Run a Keras-compatible LSTM layer (gate order i, f, c, o)
+
+    Args:
+        x: Input of shape (batch, timesteps, features)
+
+    Returns:
+        (batch, timesteps, units) if return_sequences else (batch, units)
+    """
+    batch, timesteps, _ = x.shape
+    units = recurrent_kernel.shape[0]
+
+    # Input projection for every timestep in one matmul; only the recurrent
+    # part has to run step by step
+    x_proj = x @ kernel + bias
+
+    h = np.zeros((batch, units), dtype=np.float32)
+    c = np.zeros((batch, units), dtype=np.float32)
+    outputs = np.empty((batch, timesteps, units), dtype=np.float32) if return_sequences else None
+
+    for t in range(timesteps):
+        z = x_proj[:, t, :] + h @ recurrent_kernel
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        if return_sequences:
+            outputs[:, t, :] = h
+
+    return outputs if return_sequences else h
+
+
+class NumpyLSTMPredictor:
+    def __init__(self):
+        """
+        TensorFlow-free predictor exposing the LSTMPredictor serving interface
+        """
+        self.layers = None
+        self.sequence_length = None
+        self.n_features = 1
+        self.scaling_params = None
+        self.series_scaling = None
+        self.training_watermark = None
+
+    def load_model(self, path: str):
+        """Load exported .npz weights and scaling parameters"""
+        if not path.endswith('.npz'):
+            path = weights_path_for(path)
+
+        with np.load(path) as data:
+            self.sequence_length = int(data['sequence_length'])
+            self.n_features = int(data['n_features']) if 'n_features' in data else 1
+            self.layers = []
+            for idx, spec in enumerate(data['layer_specs'].tolist()):
+                weights = {
+                    name: data[f'layer{idx}_{name}']
+                    for name in ('kernel', 'recurrent_kernel', 'bias')
+                    if f'layer{idx}_{name}' in data
+                }
+                self.layers.append((spec, weights))
+
+        params_path = os.path.join(os.path.dirname(path), 'scaling_params.json')
+        if os.path.exists(params_path):
+            with open(params_path, 'r') as f:
+                self.scaling_params = json.load(f)
+            self.training_watermark = self.scaling_params.pop('watermark', None)
+
+        # Imported here so this module still runs as a standalone export script
+        from model.series_scaling import SeriesScaling, series_scaling_path
+        scaling_path = series_scaling_path(path)
+        self.series_scaling = None
+        if self.n_features > 1 and os.path.exists(scaling_path):
+            self.series_scaling = SeriesScaling.load(scaling_path)
+
+    def predict_batch(self, sequences: np.ndarray) -> np.ndarray:
+        """Predict for many sequences in a single forward pass"""
+        if self.layers is None:
+            raise ValueError("Model not built or loaded")
+
+        x = np.asarray(sequences, dtype=np.float32)
+        x = x.reshape(x.shape[0], -1, self.n_features)
+
+        for spec, w in self.layers:
+            if spec in ('lstm', 'lstm_seq'):
+                x = lstm_forward(x, w['kernel'], w['recurrent_kernel'], w['bias'],
+                                 return_sequences=(spec == 'lstm_seq'))
+            else:
+                x = x @ w['kernel'] + w['bias']
+                if spec == 'dense_relu':
+                    x = np.maximum(x, 0.0)
+
+        if self.n_features > 1:
+            x = x.reshape(x.shape[0], self.n_features, -1)
+        return x
+
+    def predict_single(self, sequence: np.ndarray) -> np.ndarray:
+        """Predict for a single sequence"""
+        return self.predict_batch(np.asarray(sequence).reshape(1, -1, self.n_features))[0]
+
+    def scaling_for(self, metric_name: str = None) -> dict:
+        """Scaling parameters for a metric, falling back to the model-wide ones"""
+        if self.scaling_params is None:
+            raise ValueError("Scaling parameters not set")
+
+        return self.scaling_params.get('metrics', {}).get(metric_name, self.scaling_params)
+
+    def denormalize(self, normalized_values: np.ndarray, metric_name: str = None) -> np.ndarray:
+        """Denormalize predictions"""
+        params = self.scaling_for(metric_name)
+        y_min = params['y_min']
+        y_max = params['y_max']
+
+        return normalized_values * (y_max - y_min) + y_min
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python numpy_inference.py <model.keras> [output.npz]")
+        sys.exit(1)
+    written = export_weights(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"Weights exported to {written}")
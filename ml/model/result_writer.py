@@ -0,0 +1,213 @@
+import json
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from psycopg2.extras import execute_values
+
+from model.data_loader import DataLoader
+
+
+PREDICTIONS_INSERT = """
+    INSERT INTO predictions (pod_name, namespace, prediction_type, predicted_value,
+                             confidence, prediction_window, features, predicted_at)
+    VALUES %s
+"""
+PREDICTIONS_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s::jsonb, %s)"
+
+ANOMALIES_INSERT = """
+    INSERT INTO anomalies (pod_name, namespace, anomaly_type, severity,
+                           confidence, metrics, detected_at, onset_window)
+    VALUES %s
+    ON CONFLICT (pod_name, namespace, anomaly_type, onset_window) DO NOTHING
+"""
+# Every worker that sees an anomaly start reports the same onset timestamp;
+# binning it makes the incident one row however many workers record it
+ANOMALIES_TEMPLATE = (
+    "(%s, %s, %s, %s, %s, %s::jsonb, %s, "
+    "date_bin('5 minutes', %s::timestamp, TIMESTAMP '2000-01-01'))"
+)
+
+
+class ResultWriter:
+    def __init__(self, loader: DataLoader, max_rows: int = 500,
+                 flush_interval: float = 5.0, max_pending: int = 20000,
+                 sample_interval: float = 30.0):
+        """
+        Write-behind buffer for the predictions and anomalies tables
+
+        Request handlers only append rows to memory; a background thread
+        flushes them with execute_values when max_rows are pending or every
+        flush_interval seconds, so persistence adds no round trip to requests.
+
+        Args:
+            loader: Provides pooled connections
+            max_rows: Pending rows that trigger an early flush
+            flush_interval: Seconds between flushes
+            max_pending: Rows kept while the database is unavailable. Beyond
+                this the oldest prediction is dropped (and counted); anomalies,
+                which are rare and not regenerated by the next request, are
+                dropped only when no predictions are pending
+            sample_interval: Seconds between metric samples, used to express
+                the prediction horizon in minutes
+        """
+        self.loader = loader
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.sample_interval = sample_interval
+
+        self._predictions = deque()
+        self._anomalies = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.last_error = None
+        self.last_flush_seconds = None
+
+    def record_prediction(self, response: dict, model_version: Optional[str] = None):
+        """Queue one /predict response; predicted_value is the furthest-ahead point"""
+        predictions = response['predictions']
+        features = {
+            'predictions': predictions,
+            'timestamps': response['timestamps'],
+            'threshold': response['threshold'],
+            'anomaly_detected': response['anomaly_detected'],
+            'model_version': model_version
+        }
+        self._append(self._predictions, (
+            response['pod_name'],
+            response['namespace'],
+            response['metric_name'],
+            float(predictions[-1]),
+            response['confidence'],
+            int(round(len(predictions) * self.sample_interval / 60)),
+            json.dumps(features),
+            response['predicted_at']
+        ))
+
+    def record_anomaly(self, pod_name: str, namespace: str, metric_name: str,
+                       result: dict, detected_at: str):
+        """
+        Queue one detected anomaly (the anomaly_type is the metric name)
+
+        Rows sharing a series and onset window are written once, so the same
+        incident recorded by several workers is one row.
+        """
+        metrics = {
+            'metric_name': metric_name,
+            'current_value': result['current_value'],
+            'severity_score': result['severity_score'],
+            'normal_range': result['normal_range']
+        }
+        self._append(self._anomalies, (
+            pod_name,
+            namespace,
+            metric_name,
+            result['severity'],
+            None,
+            json.dumps(metrics),
+            detected_at,
+            result.get('onset_at')
+        ))
+
+    def _append(self, queue: deque, row: tuple):
+        with self._lock:
+            queue.append(row)
+            self._drop_overflow()
+            pending = len(self._predictions) + len(self._anomalies)
+        if pending >= self.max_rows:
+            self._wake.set()
+
+    def _drop_overflow(self):
+        """Drop the oldest rows beyond max_pending, predictions first (holding _lock)"""
+        overflow = len(self._predictions) + len(self._anomalies) - self.max_pending
+        for _ in range(max(overflow, 0)):
+            (self._predictions or self._anomalies).popleft()
+            self.rows_dropped += 1
+
+    def flush(self) -> int:
+        """Write all pending rows; on failure they are requeued. Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                predictions, self._predictions = self._predictions, deque()
+                anomalies, self._anomalies = self._anomalies, deque()
+            if not predictions and not anomalies:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                with self.loader.connection() as conn:
+                    # One transaction for both tables; pooled connections are
+                    # autocommit, so switch for the flush and restore afterwards
+                    conn.autocommit = False
+                    try:
+                        with conn, conn.cursor() as cur:
+                            if predictions:
+                                execute_values(cur, PREDICTIONS_INSERT, list(predictions),
+                                               template=PREDICTIONS_TEMPLATE, page_size=1000)
+                            if anomalies:
+                                execute_values(cur, ANOMALIES_INSERT, list(anomalies),
+                                               template=ANOMALIES_TEMPLATE, page_size=1000)
+                    finally:
+                        if not conn.closed:
+                            conn.autocommit = True
+            except Exception as e:
+                with self._lock:
+                    # Put the rows back in front of anything queued meanwhile
+                    predictions.extend(self._predictions)
+                    anomalies.extend(self._anomalies)
+                    self._predictions, self._anomalies = predictions, anomalies
+                    self._drop_overflow()
+                    self.flush_failures += 1
+                    self.last_error = str(e)
+                return 0
+
+            written = len(predictions) + len(anomalies)
+            with self._lock:
+                self.rows_written += written
+                self.flushes += 1
+                self.last_error = None
+                self.last_flush_seconds = time.perf_counter() - start
+            return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Start flushing in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='result-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and write whatever is still pending"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'pending': len(self._predictions) + len(self._anomalies),
+                'rows_written': self.rows_written,
+                'rows_dropped': self.rows_dropped,
+                'flushes': self.flushes,
+                'flush_failures': self.flush_failures,
+                'last_error': self.last_error,
+                'last_flush_seconds': self.last_flush_seconds
+            }
@@ -0,0 +1,143 @@
+import os
+import numpy as np
+from typing import Dict, Sequence, Tuple
+
+
+SERIES_SCALING_FILE = 'series_scaling.npz'
+
+
+def series_scaling_path(model_path: str) -> str:
+    """Return the per-series scaling table that sits next to a model"""
+    return os.path.join(os.path.dirname(model_path), SERIES_SCALING_FILE)
+
+
+def series_key(pod_name: str, namespace: str) -> str:
+    return f"{namespace}/{pod_name}"
+
+
+class SeriesScaling:
+    def __init__(self, feature_names: Sequence[str], keys: np.ndarray,
+                 mins: np.ndarray, maxs: np.ndarray,
+                 default_mins: np.ndarray, default_maxs: np.ndarray):
+        """
+        Per-series min-max scaling for multivariate models, held in arrays
+
+        Row i of mins/maxs scales series keys[i] (sorted "namespace/pod"
+        strings); columns follow feature_names. Lookups are a searchsorted
+        over the key array, and scaling a batch is one broadcasted
+        expression, so thousands of pods cost no per-pod dict access.
+        Series not seen in training fall back to the global per-feature
+        range (default_mins/default_maxs).
+        """
+        self.feature_names = list(feature_names)
+        self.keys = np.asarray(keys, dtype=str)
+        self.mins = np.asarray(mins, dtype=np.float64)
+        self.maxs = np.asarray(maxs, dtype=np.float64)
+        self.default_mins = np.asarray(default_mins, dtype=np.float64)
+        self.default_maxs = np.asarray(default_maxs, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, series: Dict[Tuple[str, str], np.ndarray],
+            feature_names: Sequence[str]) -> 'SeriesScaling':
+        """
+        Compute ranges from (pod_name, namespace) -> (timesteps, features) arrays
+        """
+        items = sorted(
+            ((series_key(*key), values) for key, values in series.items() if len(values)),
+            key=lambda item: item[0]
+        )
+        if not items:
+            raise ValueError("No series to fit scaling on")
+        keys = np.array([key for key, _ in items])
+        mins = np.stack([np.nanmin(values, axis=0) for _, values in items])
+        maxs = np.stack([np.nanmax(values, axis=0) for _, values in items])
+        return cls(feature_names, keys, mins, maxs, mins.min(axis=0), maxs.max(axis=0))
+
+    def rows(self, pod_names: Sequence[str], namespaces) -> np.ndarray:
+        """Row index per series, -1 for series without their own range"""
+        if isinstance(namespaces, str):
+            namespaces = [namespaces] * len(pod_names)
+        query = np.array([series_key(p, n) for p, n in zip(pod_names, namespaces)], dtype=str)
+        if len(self.keys) == 0 or len(query) == 0:
+            return np.full(len(query), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.keys, query), len(self.keys) - 1)
+        return np.where(self.keys[rows] == query, rows, -1)
+
+    def ranges(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(mins, spans) of shape (len(rows), features)"""
+        known = (rows >= 0)[:, np.newaxis]
+        mins = np.where(known, self.mins[rows], self.default_mins)
+        maxs = np.where(known, self.maxs[rows], self.default_maxs)
+        return mins, maxs - mins + 1e-8
+
+    def normalize(self, windows: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Scale (batch, timesteps, features) windows with each series' range"""
+        mins, spans = self.ranges(rows)
+        return ((windows - mins[:, np.newaxis, :]) / spans[:, np.newaxis, :]).astype(np.float32)
+
+    def denormalize(self, predictions: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Undo scaling on (batch, features, horizon) predictions"""
+        mins, spans = self.ranges(rows)
+        return predictions * spans[:, :, np.newaxis] + mins[:, :, np.newaxis]
+
+    def metric_ranges(self) -> Dict[str, dict]:
+        """Global per-feature ranges in the metric_ranges() format"""
+        return {
+            name: {'X_min': float(lo), 'X_max': float(hi), 'y_min': float(lo), 'y_max': float(hi)}
+            for name, lo, hi in zip(self.feature_names, self.default_mins, self.default_maxs)
+        }
+
+    def save(self, path: str):
+        """Write the table atomically (np.savez appends .npz to other names)"""
+        tmp_path = path[:-len('.npz')] + '.tmp.npz'
+        np.savez(tmp_path, feature_names=np.array(self.feature_names), keys=self.keys,
+                 mins=self.mins, maxs=self.maxs,
+                 default_mins=self.default_mins, default_maxs=self.default_maxs)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SeriesScaling':
+        with np.load(path) as data:
+            return cls(data['feature_names'].tolist(), data['keys'], data['mins'], data['maxs'],
+                       data['default_mins'], data['default_maxs'])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+def multivariate_windows(values: np.ndarray, sequence_length: int,
+                         prediction_horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sliding-window views over a (timesteps, features) series
+
+    Returns:
+        X: (samples, sequence_length, features)
+        y: (samples, features, prediction_horizon)
+    """
+    values = np.asarray(values)
+    window = sequence_length + prediction_horizon
+    n_samples = max(len(values) - window, 0)
+    features = values.shape[1]
+
+    if n_samples == 0:
+        return (np.empty((0, sequence_length, features)),
+                np.empty((0, features, prediction_horizon)))
+
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)[:n_samples]
+    return windows[:, :, :sequence_length].transpose(0, 2, 1), windows[:, :, sequence_length:]
+
+
+def align_features(timestamps: np.ndarray, feature_index: np.ndarray, values: np.ndarray,
+                   n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pivot long-format samples of one series into a (timesteps, features) matrix
+
+    Timestamps missing any feature are dropped, so every row is a complete
+    observation.
+    """
+    unique, inverse = np.unique(timestamps, return_inverse=True)
+    matrix = np.full((len(unique), n_features), np.nan)
+    matrix[inverse, feature_index] = values
+    complete = ~np.isnan(matrix).any(axis=1)
+    return unique[complete], matrix[complete]
+
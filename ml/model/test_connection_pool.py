@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.data_loader import DataLoader
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.autocommit = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool:
+    """ThreadedConnectionPool semantics: keeps at most minconn idle connections"""
+
+    def __init__(self, loader, minconn):
+        self.loader = loader
+        self.minconn = minconn
+        self.idle = []
+        self.opened = 0
+
+    def getconn(self):
+        # Opening a connection is a network call; no bookkeeping lock may be held
+        assert not self.loader._stats_lock.locked()
+        if self.idle:
+            return self.idle.pop()
+        self.opened += 1
+        return FakeConnection()
+
+    def putconn(self, conn, close=False):
+        assert not self.loader._stats_lock.locked()
+        if len(self.idle) < self.minconn and not close:
+            self.idle.append(conn)
+        else:
+            conn.close()
+
+
+def make_loader(minconn):
+    loader = DataLoader(db_config={}, min_connections=minconn)
+    loader.pool = FakePool(loader, minconn)
+    loader._is_healthy = lambda conn: True
+    return loader
+
+
+def test_occupancy_and_reuse():
+    loader = make_loader(minconn=2)
+    with loader.connection() as a, loader.connection() as b:
+        assert loader.pool_stats()['in_use'] == 2
+    assert loader.pool_stats() == {'max': 10, 'in_use': 0, 'idle': 2}
+
+    # Both are reused instead of reconnecting
+    with loader.connection(), loader.connection():
+        pass
+    assert loader.pool.opened == 2
+
+
+def test_connections_closed_by_the_pool_are_forgotten():
+    loader = make_loader(minconn=1)
+    with loader.connection() as a, loader.connection() as b:
+        pass
+    # Only one is kept; the other was closed and has no last-use time
+    assert sum(conn.closed for conn in (a, b)) == 1
+    assert set(loader._last_used) == {id(conn) for conn in (a, b) if not conn.closed}
+    assert loader.pool_stats()['idle'] == 1
+
+
+def test_broken_connection_is_closed():
+    loader = make_loader(minconn=1)
+    try:
+        with loader.connection() as conn:
+            conn.closed = True
+            raise RuntimeError('lost')
+    except RuntimeError:
+        pass
+    assert loader._last_used == {}
+    assert loader.pool_stats() == {'max': 10, 'in_use': 0, 'idle': 0}
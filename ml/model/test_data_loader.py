@@ -1,4 +1,8 @@
-from data_loader import DataLoader
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.data_loader import DataLoader
 import matplotlib.pyplot as plt
 
 # Database configuration
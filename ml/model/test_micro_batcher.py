@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+
+import numpy as np
+
+from model.micro_batcher import MicroBatcher
+
+
+class RecordingModel:
+    def __init__(self, offset=0.0):
+        self.offset = offset
+        self.batch_sizes = []
+
+    def predict_batch(self, sequences):
+        self.batch_sizes.append(len(sequences))
+        return sequences[:, -3:] + self.offset
+
+
+def run_concurrently(batcher, jobs):
+    """Submit (model, window) jobs from one thread each; return results in job order"""
+    results = [None] * len(jobs)
+    start = threading.Barrier(len(jobs))
+
+    def worker(i, model, window):
+        start.wait()
+        results[i] = batcher.predict(model, window)
+
+    threads = [threading.Thread(target=worker, args=(i, m, w)) for i, (m, w) in enumerate(jobs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_requests_share_forward_passes():
+    model = RecordingModel()
+    batched = []
+    batcher = MicroBatcher(max_batch_size=8, max_wait_ms=50,
+                           on_batch=lambda size, waits: batched.append((size, len(waits))))
+    windows = [np.full(60, i, dtype=np.float32) for i in range(16)]
+
+    results = run_concurrently(batcher, [(model, w) for w in windows])
+
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result, np.full(3, i))
+    assert sum(model.batch_sizes) == 16
+    assert max(model.batch_sizes) <= 8
+    assert len(model.batch_sizes) < 16
+    assert [size for size, _ in batched] == model.batch_sizes
+    assert all(size == waits for size, waits in batched)
+
+
+def test_batches_never_mix_models():
+    old, new = RecordingModel(0.0), RecordingModel(100.0)
+    batcher = MicroBatcher(max_batch_size=32, max_wait_ms=20)
+    jobs = [(old if i % 2 else new, np.full(60, i, dtype=np.float32)) for i in range(10)]
+
+    results = run_concurrently(batcher, jobs)
+
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result, np.full(3, i + (0.0 if i % 2 else 100.0)))
+    assert sum(old.batch_sizes) == 5 and sum(new.batch_sizes) == 5
+
+
+def test_errors_reach_every_waiting_caller():
+    class FailingModel:
+        def predict_batch(self, sequences):
+            raise ValueError('Model not built or loaded')
+
+    batcher = MicroBatcher(max_batch_size=4, max_wait_ms=1)
+    try:
+        batcher.predict(FailingModel(), np.zeros(60))
+    except ValueError as e:
+        assert 'not built' in str(e)
+    else:
+        raise AssertionError('expected ValueError')
+    # The worker survives a failed batch
+    np.testing.assert_array_equal(batcher.predict(RecordingModel(), np.ones(60)), np.ones(3))
@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.model_registry import ModelWatcher, model_version
+
+
+class FakePredictor:
+    sequence_length = 60
+    n_features = 1
+
+    def __init__(self, training_watermark=None, fail_warmup=False):
+        self.training_watermark = training_watermark
+        self.fail_warmup = fail_warmup
+        self.warmed_up = False
+
+    def predict_single(self, window):
+        if self.fail_warmup:
+            raise RuntimeError('warm-up failed')
+        assert window.shape == (self.sequence_length, self.n_features)
+        self.warmed_up = True
+
+
+def write_model(path, content: bytes):
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def make_watcher(tmp_path, load_fn):
+    model_path = str(tmp_path / 'lstm_predictor.keras')
+    write_model(model_path, b'v1')
+    swaps = []
+    watcher = ModelWatcher(model_path, load_fn, lambda model, version: swaps.append((model, version)),
+                           current_version=model_version(model_path))
+    return watcher, model_path, swaps
+
+
+def test_new_version_is_loaded_after_two_unchanged_polls(tmp_path):
+    loads = []
+
+    def load():
+        loads.append(1)
+        return FakePredictor()
+
+    watcher, model_path, swaps = make_watcher(tmp_path, load)
+    assert watcher.check_once() is False
+
+    write_model(model_path, b'v2-partial')
+    assert watcher.check_once() is False
+    # Still being written: a different fingerprint restarts the wait
+    write_model(model_path, b'v2-complete')
+    assert watcher.check_once() is False
+    assert loads == []
+
+    assert watcher.check_once() is True
+    version = model_version(model_path)
+    assert loads == [1] and swaps[0][1] == version
+    assert swaps[0][0].warmed_up
+    assert watcher.current_version == version
+
+    # Nothing new on disk
+    assert watcher.check_once() is False and loads == [1]
+
+
+def test_failed_load_or_warmup_keeps_the_current_model(tmp_path):
+    outcomes = [RuntimeError('truncated file'), FakePredictor(fail_warmup=True), FakePredictor()]
+
+    def load():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    watcher, model_path, swaps = make_watcher(tmp_path, load)
+    original = watcher.current_version
+    write_model(model_path, b'v2')
+    assert watcher.check_once() is False
+
+    for _ in range(2):
+        assert watcher.check_once() is False
+        assert swaps == [] and watcher.current_version == original
+
+    # The same version is retried on the next poll and succeeds
+    assert watcher.check_once() is True
+    assert watcher.current_version == model_version(model_path) != original
+    assert len(swaps) == 1
@@ -0,0 +1,64 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from model.lstm_model import LSTMPredictor
+from model.numpy_inference import NumpyLSTMPredictor, export_weights
+from model.series_scaling import SeriesScaling
+
+# float32 forward passes differ only by accumulation order
+TOLERANCE = 1e-5
+
+
+def test_numpy_forward_matches_keras(tmp_path):
+    predictor = LSTMPredictor(sequence_length=60, prediction_horizon=10, lstm_units=64)
+    predictor.build_model()
+    model_path = str(tmp_path / 'lstm_predictor.keras')
+    predictor.save_model(model_path)
+
+    weights_path = export_weights(model_path)
+    numpy_predictor = NumpyLSTMPredictor()
+    numpy_predictor.load_model(weights_path)
+
+    windows = np.random.RandomState(0).rand(16, 60).astype(np.float32)
+    expected = predictor.predict_batch(windows)
+    actual = numpy_predictor.predict_batch(windows)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=TOLERANCE)
+    np.testing.assert_allclose(numpy_predictor.predict_single(windows[0]), expected[0], atol=TOLERANCE)
+
+
+def test_multivariate_numpy_forward_matches_keras(tmp_path):
+    rng = np.random.RandomState(0)
+    series = {(f'pod-{i}', 'healx'): rng.rand(200, 2) * [1000.0, 2.0] * (i + 1) for i in range(3)}
+    predictor = LSTMPredictor(sequence_length=60, prediction_horizon=10, lstm_units=64, n_features=2)
+    predictor.build_model()
+    predictor.series_scaling = SeriesScaling.fit(series, ['memory_usage_mb', 'cpu_usage'])
+    model_path = str(tmp_path / 'lstm_predictor.keras')
+    predictor.save_model(model_path)
+
+    numpy_predictor = NumpyLSTMPredictor()
+    numpy_predictor.load_model(export_weights(model_path))
+    assert numpy_predictor.n_features == 2
+    scaling = numpy_predictor.series_scaling
+    assert scaling.feature_names == ['memory_usage_mb', 'cpu_usage']
+
+    pods = [('pod-2', 'healx'), ('pod-0', 'healx'), ('new-pod', 'healx')]
+    windows = np.stack([series[pods[0]][-60:], series[pods[1]][-60:], series[pods[0]][:60]])
+    rows = scaling.rows([p for p, _ in pods], 'healx')
+    np.testing.assert_array_equal(rows, [2, 0, -1])
+    batch = scaling.normalize(windows, rows)
+    # Known series scale into [0, 1] with their own ranges
+    assert batch[:2].min() >= 0.0 and batch[:2].max() <= 1.0
+
+    expected = predictor.predict_batch(batch)
+    actual = numpy_predictor.predict_batch(batch)
+    assert actual.shape == expected.shape == (3, 2, 10)
+    np.testing.assert_allclose(actual, expected, atol=TOLERANCE)
+    np.testing.assert_allclose(numpy_predictor.predict_single(batch[0]), expected[0], atol=TOLERANCE)
+    np.testing.assert_allclose(
+        scaling.denormalize(scaling.normalize(windows, rows).transpose(0, 2, 1), rows),
+        windows.transpose(0, 2, 1), rtol=1e-5
+    )
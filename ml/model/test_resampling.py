@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from model.data_loader import complete_window_starts, resample_windows
+
+START = np.datetime64('2026-01-01T00:00:00', 'ns')
+
+
+def grid(*offsets_seconds):
+    return START + np.array(offsets_seconds, dtype='timedelta64[s]').astype('timedelta64[ns]')
+
+
+def test_samples_snap_to_grid_and_duplicates_keep_last():
+    timestamps = grid(0, 31, 59, 60, 90)
+    values = np.array([1.0, 2.0, 3.0, 9.0, 4.0])
+    ends, windows = resample_windows([(timestamps, values)], length=4)
+
+    assert ends[0] == grid(90)[0]
+    # 59s and 60s land in the same slot; the later sample wins
+    np.testing.assert_array_equal(windows[0], [1.0, 2.0, 9.0, 4.0])
+
+
+def test_short_gaps_are_filled_and_long_gaps_stay_nan():
+    short = (grid(0, 30, 120, 150), np.array([0.0, 1.0, 4.0, 5.0]))
+    long = (grid(0, 30, 210), np.array([0.0, 1.0, 7.0]))
+    _, windows = resample_windows([short, long], length=6, max_fill=3)
+    np.testing.assert_allclose(windows[0], [0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+    assert np.isnan(windows[1]).sum() == 5
+
+    _, ffilled = resample_windows([short], length=6, max_fill=3, method='ffill')
+    np.testing.assert_array_equal(ffilled[0], [0.0, 1.0, 1.0, 1.0, 4.0, 5.0])
+
+
+def test_explicit_ends_and_empty_series():
+    series = [
+        (grid(0, 30, 60), np.array([1.0, 2.0, 3.0])),
+        (grid(0, 30), np.array([5.0, 6.0])),
+        (grid(), np.array([]))
+    ]
+    ends, windows = resample_windows(series, length=3, end=grid(60, 60, 60))
+
+    np.testing.assert_array_equal(windows[0], [1.0, 2.0, 3.0])
+    # The missing last slot cannot be filled from a later sample
+    assert np.isnan(windows[1, -1]) and np.isnan(windows[2]).all()
+    assert np.isnat(ends[2])
+
+
+def test_complete_window_starts_skips_windows_touching_gaps():
+    values = np.arange(10.0)
+    values[4] = np.nan
+    np.testing.assert_array_equal(complete_window_starts(values, 2, 1), [0, 1, 5, 6])
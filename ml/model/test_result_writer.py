@@ -0,0 +1,184 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from model import result_writer
+from model.result_writer import ResultWriter
+
+ANOMALY = {
+    'severity': 'high',
+    'severity_score': 4.2,
+    'current_value': 900.0,
+    'normal_range': {'mean': 500.0, 'std': 10.0},
+    'onset_at': '2026-01-01T00:00:00'
+}
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.autocommit = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def cursor(self):
+        return self
+
+
+class FakeLoader:
+    """Hands out a connection; execute_values is captured per flush"""
+
+    def __init__(self):
+        self.fail = False
+
+    @contextmanager
+    def connection(self):
+        if self.fail:
+            raise ConnectionError('database unavailable')
+        yield FakeConnection()
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Rows passed to execute_values, as (table, rows) per statement"""
+    statements = []
+
+    def execute_values(cur, sql, rows, template=None, page_size=100):
+        table = 'anomalies' if 'INTO anomalies' in sql else 'predictions'
+        assert len(rows[0]) == template.count('%s')
+        statements.append((table, rows))
+
+    monkeypatch.setattr(result_writer, 'execute_values', execute_values)
+    return statements
+
+
+def prediction(pod: str) -> dict:
+    return {
+        'pod_name': pod,
+        'namespace': 'healx',
+        'metric_name': 'memory_usage_mb',
+        'predictions': [510.0, 520.0],
+        'timestamps': ['2026-01-01T00:00:30', '2026-01-01T00:01:00'],
+        'threshold': 600.0,
+        'anomaly_detected': False,
+        'confidence': 0.9,
+        'predicted_at': '2026-01-01T00:00:00'
+    }
+
+
+def record_anomaly(writer: ResultWriter, pod: str):
+    writer.record_anomaly(pod, 'healx', 'memory_usage_mb', ANOMALY, '2026-01-01T00:00:00')
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_flushes_early_once_max_rows_are_pending(written):
+    writer = ResultWriter(FakeLoader(), max_rows=3, flush_interval=60)
+    writer.start()
+    try:
+        writer.record_prediction(prediction('a'))
+        writer.record_prediction(prediction('b'))
+        time.sleep(0.05)
+        assert written == []
+
+        record_anomaly(writer, 'c')
+        assert wait_for(lambda: writer.stats()['rows_written'] == 3)
+        assert sorted(table for table, _ in written) == ['anomalies', 'predictions']
+        assert writer.stats()['flushes'] == 1
+    finally:
+        writer.stop()
+
+
+def test_flushes_on_the_interval_below_max_rows(written):
+    writer = ResultWriter(FakeLoader(), max_rows=100, flush_interval=0.05)
+    writer.start()
+    try:
+        writer.record_prediction(prediction('a'))
+        assert wait_for(lambda: writer.stats()['rows_written'] == 1)
+        assert [table for table, _ in written] == ['predictions']
+    finally:
+        writer.stop()
+
+
+def test_failed_flush_requeues_rows_in_order(written):
+    loader = FakeLoader()
+    writer = ResultWriter(loader, flush_interval=60)
+    writer.record_prediction(prediction('a'))
+    record_anomaly(writer, 'b')
+
+    loader.fail = True
+    assert writer.flush() == 0
+    stats = writer.stats()
+    assert stats['pending'] == 2 and stats['flush_failures'] == 1
+    assert 'unavailable' in stats['last_error']
+
+    # Rows queued while the database was down go after the requeued ones
+    writer.record_prediction(prediction('c'))
+    loader.fail = False
+    assert writer.flush() == 3
+    predictions = dict(written)['predictions']
+    assert [row[0] for row in predictions] == ['a', 'c']
+    assert writer.stats()['last_error'] is None
+
+
+def test_max_pending_drops_predictions_before_anomalies(written):
+    loader = FakeLoader()
+    writer = ResultWriter(loader, max_pending=3, flush_interval=60)
+    record_anomaly(writer, 'anomaly')
+    for pod in ('a', 'b', 'c', 'd'):
+        writer.record_prediction(prediction(pod))
+    assert writer.stats()['rows_dropped'] == 2
+
+    # A failed flush requeues under the same cap
+    loader.fail = True
+    writer.flush()
+    writer.record_prediction(prediction('e'))
+    assert writer.stats()['rows_dropped'] == 3
+
+    loader.fail = False
+    writer.flush()
+    tables = dict(written)
+    assert [row[0] for row in tables['anomalies']] == ['anomaly']
+    assert [row[0] for row in tables['predictions']] == ['d', 'e']
+
+    # With only anomalies pending, the oldest anomaly goes
+    for pod in ('x', 'y', 'z', 'w'):
+        record_anomaly(writer, pod)
+    assert writer.stats()['rows_dropped'] == 4 and writer.stats()['pending'] == 3
+
+
+def test_stop_flushes_whatever_is_pending(written):
+    writer = ResultWriter(FakeLoader(), max_rows=100, flush_interval=60)
+    writer.start()
+    writer.record_prediction(prediction('a'))
+    record_anomaly(writer, 'b')
+    writer.stop()
+
+    assert writer.stats()['pending'] == 0
+    assert writer.stats()['rows_written'] == 2
+    assert sorted(table for table, _ in written) == ['anomalies', 'predictions']
+
+
+def test_anomalies_are_deduplicated_on_their_onset(written):
+    writer = ResultWriter(FakeLoader(), flush_interval=60)
+    record_anomaly(writer, 'a')
+    writer.flush()
+
+    (table, rows), = written
+    assert rows[0][-1] == ANOMALY['onset_at']
+    assert 'ON CONFLICT (pod_name, namespace, anomaly_type, onset_window) DO NOTHING' \
+        in result_writer.ANOMALIES_INSERT
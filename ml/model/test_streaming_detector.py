@@ -0,0 +1,155 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from model.data_loader import mark_anomaly_windows
+from model.streaming_detector import (StreamingDetector, severity_bucket, sketch,
+                                      weighted_quantile)
+
+
+def batch_detection(values: np.ndarray) -> dict:
+    """The per-request computation /detect-anomaly used before streaming"""
+    series = pd.Series(values)
+    labels = mark_anomaly_windows(values > series.quantile(0.95), 10)
+    severity_score = abs(values[-1] - series.quantile(0.5)) / (series.std() + 1e-8)
+    return {
+        'is_anomaly': labels[-10:].sum() > 5,
+        'severity': severity_bucket(severity_score),
+        'median': series.quantile(0.5),
+        'std': series.std()
+    }
+
+
+def test_sketch_quantiles_match_exact_quantiles():
+    values = np.random.RandomState(0).normal(100, 10, 240)
+    for q in (0.5, 0.95):
+        # Unit weights are numpy's linear interpolation
+        exact = weighted_quantile(values, np.ones(len(values)), q)
+        assert abs(exact - np.quantile(values, q)) < 1e-9
+
+        # Blocks condensed to 32 centroids each stay close
+        blocks = [sketch(block, 32) for block in np.split(values, 4)]
+        approx = weighted_quantile(np.concatenate(blocks),
+                                   np.full(128, 60 / 32), q)
+        assert abs(approx - np.quantile(values, q)) < 1.5
+
+
+def test_streaming_matches_batch_detection():
+    rng = np.random.RandomState(1)
+    timestamps = np.datetime64('2024-01-01T00:00:00') + np.arange(240) * np.timedelta64(30, 's')
+    base = 500 + rng.normal(0, 5, 240)
+
+    for spike_at, spike in ((None, 0), (236, 80), (230, 80), (239, 20)):
+        values = base.copy()
+        if spike_at is not None:
+            values[spike_at:] += spike
+
+        detector = StreamingDetector(horizon=240)
+        key = ('leaky-app', 'healx', 'memory_usage_mb')
+        # Feed in two chunks with an overlap to exercise deduplication
+        detector.update(key, timestamps[:200], values[:200])
+        detector.update(key, timestamps[150:], values[150:])
+
+        result = detector.evaluate(key)
+        expected = batch_detection(values)
+        assert result['is_anomaly'] == expected['is_anomaly']
+        assert result['severity'] == expected['severity']
+        assert abs(result['normal_range']['std'] - expected['std']) < 1e-6
+        assert abs(result['normal_range']['mean'] - expected['median']) < 1e-6
+
+
+def test_streaming_matches_batch_detection_past_the_horizon():
+    rng = np.random.RandomState(3)
+    key = ('leaky-app', 'healx', 'memory_usage_mb')
+
+    # (series length, level shift this many points before the end, spike at the end)
+    cases = ((300, None, False), (390, None, True), (400, 200, False),
+             (470, 250, False), (480, 120, False), (455, 235, True))
+    for length, shift_ago, spike in cases:
+        timestamps = np.datetime64('2024-01-01') + np.arange(length) * np.timedelta64(30, 's')
+        values = 500 + rng.normal(0, 5, length)
+        if shift_ago is not None:
+            values[length - shift_ago:] += 100
+        if spike:
+            values[-3:] += 80
+
+        detector = StreamingDetector(horizon=240)
+        for start in range(0, length, 45):
+            detector.update(key, timestamps[start:start + 45], values[start:start + 45])
+        result = detector.evaluate(key)
+
+        # The statistics cover exactly the two-hour lookback
+        expected = batch_detection(values[-240:])
+        expected_score = abs(values[-1] - expected['median']) / (expected['std'] + 1e-8)
+        assert result['points'] == 240
+        assert result['is_anomaly'] == expected['is_anomaly'], length
+        assert result['severity'] == expected['severity'], length
+        assert abs(result['severity_score'] - expected_score) < 1e-6, length
+        assert abs(result['normal_range']['std'] - expected['std']) < 1e-6
+        assert abs(result['normal_range']['mean'] - expected['median']) < 1e-6
+
+
+def test_condensed_blocks_round_the_window_to_whole_blocks():
+    key = ('pod', 'healx', 'cpu_usage')
+    values = 50 + np.random.RandomState(4).normal(0, 2, 470)
+    timestamps = np.datetime64('2024-01-01') + np.arange(470) * np.timedelta64(30, 's')
+    detector = StreamingDetector(horizon=240, block_size=60, sketch_size=16)
+    detector.update(key, timestamps, values)
+
+    result = detector.evaluate(key)
+    # 50 points in the current block, then 3 whole blocks for the other 190
+    assert result['points'] == 230
+    expected = batch_detection(values[-230:])
+    assert abs(result['normal_range']['std'] - expected['std']) < 1e-6
+    assert abs(result['normal_range']['mean'] - expected['median']) < 0.5
+
+
+def test_series_needs_min_points():
+    detector = StreamingDetector(min_points=60)
+    key = ('pod', 'healx', 'cpu_usage')
+    timestamps = np.datetime64('2024-01-01') + np.arange(59) * np.timedelta64(30, 's')
+    detector.update(key, timestamps, np.ones(59))
+    assert detector.evaluate(key) is None
+
+
+def test_onset_is_reported_once_per_anomaly():
+    detector = StreamingDetector(horizon=240)
+    key = ('leaky-app', 'healx', 'memory_usage_mb')
+    timestamps = np.datetime64('2024-01-01') + np.arange(300) * np.timedelta64(30, 's')
+    values = 500 + np.random.RandomState(2).normal(0, 5, 300)
+    values[200:203] += 80
+
+    onsets = []
+    for end in range(120, 300):
+        detector.update(key, timestamps[:end], values[:end])
+        result = detector.evaluate(key)
+        onsets.append((result['is_anomaly'], result['onset']))
+
+    anomalous = [is_anomaly for is_anomaly, _ in onsets]
+    assert sum(anomalous) > 1
+    # One onset per run of anomalous evaluations, on its first evaluation
+    starts = [i for i, a in enumerate(anomalous) if a and (i == 0 or not anomalous[i - 1])]
+    assert [i for i, (_, onset) in enumerate(onsets) if onset] == starts
+    # Evaluating again without new data is not a new onset
+    assert detector.evaluate(key)['onset'] is False
+
+
+def test_workers_report_the_same_onset():
+    key = ('leaky-app', 'healx', 'memory_usage_mb')
+    timestamps = np.datetime64('2024-01-01') + np.arange(300) * np.timedelta64(30, 's')
+    # A slowly falling baseline never exceeds its own 95th percentile
+    values = 600 - 0.1 * np.arange(300)
+    values[250:] += 80
+
+    # One worker is pushed every point, the other catches up two points later
+    onsets = []
+    for step in (1, 3):
+        detector = StreamingDetector(horizon=240)
+        for end in range(120, 300, step):
+            detector.update(key, timestamps[:end], values[:end])
+            result = detector.evaluate(key)
+            if result['onset']:
+                onsets.append(result['onset_at'])
+    assert onsets == [str(timestamps[250])] * 2
@@ -0,0 +1,188 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from model import window_cache
+from model.data_loader import DataLoader
+from model.window_cache import SeriesBuffer, WindowCache
+
+START = np.datetime64('2026-01-01T00:00:00', 'ns')
+STEP = np.timedelta64(30, 's')
+KEY = ('pod', 'healx', 'memory_usage_mb')
+
+
+def samples(first: int, count: int):
+    """`count` samples at 30s intervals starting at sample number `first`"""
+    index = np.arange(first, first + count)
+    return START + index * STEP, index.astype(np.float64)
+
+
+class TableLoader(DataLoader):
+    """DataLoader answering queries from an in-memory metrics table"""
+
+    def __init__(self, **kwargs):
+        super().__init__(db_config={}, **kwargs)
+        self.timestamps, self.values = samples(0, 0)
+        self.full_loads = 0
+        self.since_loads = []
+
+    def insert(self, count: int):
+        new_timestamps, new_values = samples(len(self.values), count)
+        self.timestamps = np.concatenate([self.timestamps, new_timestamps])
+        self.values = np.concatenate([self.values, new_values])
+
+    def cutoff(self, hours_back):
+        # NOW() is the newest row, like a collector that just wrote
+        return self.timestamps[-1] - np.timedelta64(hours_back, 'h')
+
+    def fetch_metrics_arrays(self, pod_name, namespace, metric_name, hours_back=24, limit=None):
+        self.full_loads += 1
+        keep = self.timestamps >= self.cutoff(hours_back)
+        return self.timestamps[keep], self.values[keep]
+
+    def _load_metrics_since(self, pod_name, namespace, metric_name, hours_back, since):
+        self.since_loads.append(since)
+        cutoff = self.cutoff(hours_back)
+        keep = (self.timestamps >= cutoff) & (self.timestamps > since)
+        return cutoff, self.timestamps[keep], self.values[keep]
+
+    def load_metrics(self, pod_name, namespace, metric_name, hours_back=24):
+        timestamps, values = self.fetch_metrics_arrays(pod_name, namespace, metric_name, hours_back)
+        return pd.DataFrame({'metric_value': values},
+                            index=pd.DatetimeIndex(timestamps, name='timestamp'))
+
+
+def test_ring_buffer_wraps_and_tracks_last_dropped():
+    buffer = SeriesBuffer(capacity=5)
+    buffer.append(*samples(0, 3))
+    assert buffer.last_dropped is None
+
+    # Overflow smaller than what is held: the oldest held samples go
+    buffer.append(*samples(3, 4))
+    timestamps, values = buffer.ordered()
+    np.testing.assert_array_equal(values, [2, 3, 4, 5, 6])
+    assert buffer.last_dropped == samples(1, 1)[0][0]
+    assert buffer.last_timestamp == timestamps[-1]
+
+    # Overflow larger than what is held: part of the new batch goes too
+    buffer.append(*samples(7, 8))
+    timestamps, values = buffer.ordered()
+    np.testing.assert_array_equal(values, [10, 11, 12, 13, 14])
+    np.testing.assert_array_equal(timestamps, samples(10, 5)[0])
+    assert buffer.last_dropped == samples(9, 1)[0][0]
+
+
+def test_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(window_cache.time, 'monotonic', lambda: clock[0])
+    cache = WindowCache(max_series=2, capacity=16, ttl_seconds=60)
+
+    for name in ('a', 'b'):
+        cache.put((name,), 1, *samples(0, 4))
+    assert cache.get(('a',), 1) is not None
+    # 'b' is now the least recently used
+    cache.put(('c',), 1, *samples(0, 4))
+    assert cache.get(('b',), 1) is None
+    assert cache.get(('a',), 1) is not None and cache.get(('c',), 1) is not None
+    assert cache.stats()['evictions'] == 1
+
+    # A longer lookback than was loaded is a miss
+    assert cache.get(('a',), 2) is None
+
+    clock[0] = 61.0
+    assert cache.get(('c',), 1) is None
+    assert cache.stats()['series'] == 0
+
+
+def test_load_recent_arrays_appends_only_new_rows():
+    loader = TableLoader(window_cache=WindowCache(capacity=512))
+    loader.insert(200)
+    timestamps, values = loader.load_recent_arrays(*KEY, hours_back=1)
+    assert loader.full_loads == 1 and len(values) == 121
+
+    loader.insert(3)
+    timestamps, values = loader.load_recent_arrays(*KEY, hours_back=1)
+    assert loader.full_loads == 1
+    assert loader.since_loads == [samples(199, 1)[0][0]]
+    # Same window a fresh load returns: old rows trimmed, new ones appended
+    expected = loader.fetch_metrics_arrays(*KEY, hours_back=1)
+    np.testing.assert_array_equal(timestamps, expected[0])
+    np.testing.assert_array_equal(values, expected[1])
+
+
+def test_load_recent_arrays_reloads_when_ring_is_too_small():
+    # An hour is 121 samples, so the first load already overflows the ring
+    cache = WindowCache(capacity=100)
+    loader = TableLoader(window_cache=cache)
+    loader.insert(200)
+    loader.load_recent_arrays(*KEY, hours_back=1)
+
+    loader.insert(5)
+    timestamps, values = loader.load_recent_arrays(*KEY, hours_back=1)
+    assert loader.full_loads == 2
+    assert len(values) == 121 and values[-1] == 204
+    assert cache.stats()['series'] == 0
+
+
+def assert_matches_table(loader, df, hours_back=1):
+    """The window a fresh database load would return"""
+    keep = loader.timestamps >= loader.cutoff(hours_back)
+    np.testing.assert_array_equal(df.index.values, loader.timestamps[keep])
+    np.testing.assert_array_equal(df['metric_value'].values, loader.values[keep])
+
+
+def test_ingest_appends_pushed_samples_without_a_query():
+    loader = TableLoader(window_cache=WindowCache(capacity=512))
+    loader.insert(200)
+    loader.ingest_metrics(*KEY, *samples(200, 0), hours_back=1)
+    assert loader.full_loads == 1
+
+    # The collector writes the rows, then pushes them
+    loader.insert(2)
+    df = loader.ingest_metrics(*KEY, *samples(200, 2), hours_back=1)
+    assert loader.full_loads == 1 and loader.since_loads == []
+    assert_matches_table(loader, df)
+
+
+def test_ingest_reloads_after_a_missed_push():
+    loader = TableLoader(window_cache=WindowCache(capacity=512))
+    loader.insert(200)
+    loader.ingest_metrics(*KEY, *samples(200, 0), hours_back=1)
+
+    # Samples 200 and 201 were written but their push never arrived
+    loader.insert(3)
+    df = loader.ingest_metrics(*KEY, *samples(202, 1), hours_back=1)
+    assert loader.full_loads == 2
+    assert_matches_table(loader, df)
+
+
+def test_ingest_reloads_when_ring_is_too_small():
+    # An hour is 121 samples, more than the ring holds
+    loader = TableLoader(window_cache=WindowCache(capacity=100))
+    loader.insert(200)
+    loader.ingest_metrics(*KEY, *samples(200, 0), hours_back=1)
+
+    loader.insert(1)
+    df = loader.ingest_metrics(*KEY, *samples(200, 1), hours_back=1)
+    assert loader.full_loads == 2
+    assert len(df) == 121
+    assert_matches_table(loader, df)
+
+
+def test_ingest_drops_samples_already_cached():
+    loader = TableLoader(window_cache=WindowCache(capacity=512))
+    loader.insert(200)
+    loader.ingest_metrics(*KEY, *samples(200, 0), hours_back=1)
+
+    # A retried push overlapping what is cached appends only the new sample
+    loader.insert(1)
+    df = loader.ingest_metrics(*KEY, *samples(198, 3), hours_back=1)
+    assert df.index.is_unique
+    assert_matches_table(loader, df)
+
+    # Pushing it all again changes nothing and needs no reload
+    df = loader.ingest_metrics(*KEY, *samples(198, 3), hours_back=1)
+    assert loader.full_loads == 1
+    assert_matches_table(loader, df)
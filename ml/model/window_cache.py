@@ -0,0 +1,138 @@
+import numpy as np
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+class SeriesBuffer:
+    def __init__(self, capacity: int):
+        """
+        Fixed-capacity ring buffer of (timestamp, value) samples for one series
+
+        Args:
+            capacity: Maximum number of samples kept; the oldest are overwritten
+        """
+        self.capacity = capacity
+        self.timestamps = np.empty(capacity, dtype='datetime64[ns]')
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        self.end = 0  # next write position
+        self.last_dropped = None  # newest timestamp that has been overwritten
+        # Held while refreshing so concurrent readers don't append the same rows twice
+        self.lock = threading.Lock()
+
+    def append(self, timestamps: np.ndarray, values: np.ndarray):
+        """Append samples in timestamp order"""
+        n = len(timestamps)
+        if n == 0:
+            return
+
+        overflow = self.size + n - self.capacity
+        if overflow > 0:
+            if overflow <= self.size:
+                self.last_dropped = self._ordered_timestamps(overflow)[-1]
+            else:
+                self.last_dropped = timestamps[overflow - self.size - 1]
+
+        if n > self.capacity:
+            timestamps = timestamps[-self.capacity:]
+            values = values[-self.capacity:]
+            n = self.capacity
+
+        idx = (self.end + np.arange(n)) % self.capacity
+        self.timestamps[idx] = timestamps
+        self.values[idx] = values
+        self.end = (self.end + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def _ordered_timestamps(self, count: int) -> np.ndarray:
+        """Return the oldest `count` timestamps in order"""
+        start = (self.end - self.size) % self.capacity
+        return self.timestamps[(start + np.arange(count)) % self.capacity]
+
+    def ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return copies of all samples, oldest first"""
+        start = (self.end - self.size) % self.capacity
+        idx = (start + np.arange(self.size)) % self.capacity
+        return self.timestamps[idx], self.values[idx]
+
+    @property
+    def last_timestamp(self):
+        if self.size == 0:
+            return None
+        return self.timestamps[(self.end - 1) % self.capacity]
+
+
+class WindowCache:
+    def __init__(self, max_series: int = 2048, capacity: int = 1024,
+                 ttl_seconds: float = 300.0):
+        """
+        Bounded LRU cache of recent per-series windows
+
+        Args:
+            max_series: Number of (pod, namespace, metric) series kept
+            capacity: Samples per series ring buffer (1024 ~ 8.5h at 30s)
+            ttl_seconds: Series not read for this long are reloaded from scratch
+        """
+        self.max_series = max_series
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple, hours_back: int):
+        """
+        Return the cached buffer for a series, or None on miss
+
+        A buffer only counts as a hit if it was loaded with at least
+        `hours_back` of history and has not expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None:
+                buffer, loaded_hours, last_access = entry
+                if now - last_access > self.ttl_seconds or loaded_hours < hours_back:
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = (buffer, loaded_hours, now)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return buffer
+
+    def put(self, key: tuple, hours_back: int, timestamps: np.ndarray,
+            values: np.ndarray) -> SeriesBuffer:
+        """Store a freshly loaded series, evicting the least recently used"""
+        buffer = SeriesBuffer(self.capacity)
+        buffer.append(timestamps, values)
+        with self._lock:
+            self._entries[key] = (buffer, hours_back, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_series:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return buffer
+
+    def invalidate(self, key: tuple):
+        """Drop one series so the next read reloads it"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and occupancy"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'series': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
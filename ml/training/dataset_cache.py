@@ -0,0 +1,219 @@
+"""
+Memory-mapped on-disk cache of training series
+
+The first run streams every series from PostgreSQL into two .npy files
+(timestamps and values of all series, back to back) plus a metadata file
+holding the series index, per-metric scaling ranges and a data watermark
+(newest timestamp included). Later runs only query rows newer than the
+watermark, merge them in, drop rows that fell out of the hours_back window
+and memory-map everything else, so retraining and hyperparameter sweeps
+skip the database. Windows are never stored: they are strided views over the
+memory-mapped series, so one cache serves any sequence length or horizon.
+Timestamps are kept so consumers see gaps, e.g. between two runs, and never
+window across them.
+
+Rows that arrive late with a timestamp older than the watermark are not
+picked up; the collector writes in timestamp order.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+from datetime import datetime, timedelta
+from numpy.lib.format import open_memmap
+from typing import Dict, Iterator, List, Tuple
+
+from model.data_loader import DataLoader
+
+FORMAT_VERSION = 2
+
+
+class CachedDataset:
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray, keys: List[tuple],
+                 offsets: np.ndarray, scaling_by_metric: Dict[str, dict], watermark: datetime):
+        """
+        Memory-mapped series loaded from a DatasetCache
+
+        Exposes stream_series() and metric_ranges() with the DataLoader
+        signatures so it can stand in for the loader in training pipelines.
+        """
+        self.timestamps = timestamps
+        self.values = values
+        self.keys = keys
+        self.offsets = offsets
+        self.scaling_by_metric = scaling_by_metric
+        self.watermark = watermark
+
+    def series(self) -> Dict[tuple, Tuple[np.ndarray, np.ndarray]]:
+        """(pod_name, namespace, metric_name) -> memory-mapped (timestamps, values) (no copy)"""
+        return {
+            key: (self.timestamps[self.offsets[i]:self.offsets[i + 1]],
+                  self.values[self.offsets[i]:self.offsets[i + 1]])
+            for i, key in enumerate(self.keys)
+        }
+
+    def stream_series(self, metric_names: List[str], namespace: str = None,
+                      hours_back: int = None,
+                      **kwargs) -> Iterator[Tuple[tuple, np.ndarray, np.ndarray]]:
+        """Iterate cached series like DataLoader.stream_series()"""
+        for key, (timestamps, values) in self.series().items():
+            if key[2] in metric_names and (namespace is None or key[1] == namespace):
+                yield key, timestamps, values
+
+    def metric_ranges(self, metric_names: List[str], namespace: str = None,
+                      hours_back: int = None) -> Dict[str, dict]:
+        """Cached per-metric scaling ranges"""
+        return {m: p for m, p in self.scaling_by_metric.items() if m in metric_names}
+
+
+class DatasetCache:
+    def __init__(self, root: str, loader: DataLoader):
+        """
+        Args:
+            root: Directory holding one subdirectory per cache key
+            loader: Used only to fetch rows newer than the watermark
+        """
+        self.root = root
+        self.loader = loader
+
+    def _key_dir(self, metric_names: List[str], namespace: str, hours_back: int) -> str:
+        key = json.dumps({
+            'metrics': sorted(metric_names),
+            'namespace': namespace,
+            'hours_back': hours_back,
+            'version': FORMAT_VERSION
+        }, sort_keys=True)
+        return os.path.join(self.root, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+    def load(self, metric_names: List[str], namespace: str = None,
+             hours_back: int = 24, refresh: bool = True) -> CachedDataset:
+        """
+        Return the cached series, fetching only rows newer than the watermark
+
+        Args:
+            refresh: Query the database for new rows; False uses the cache as is
+        """
+        directory = self._key_dir(metric_names, namespace, hours_back)
+        meta_path = os.path.join(directory, 'meta.json')
+
+        cached = self._read(meta_path) if os.path.exists(meta_path) else None
+        if cached is not None and not refresh:
+            return cached
+
+        watermark = self.loader.latest_timestamp(metric_names, namespace)
+        if cached is not None and (watermark is None or watermark <= cached.watermark):
+            return cached
+        if watermark is None:
+            raise ValueError(f"No data for metrics: {', '.join(metric_names)}")
+
+        # Rows older than the window are trimmed on write, so a stale cache
+        # never fetches more than hours_back
+        since = None
+        if cached is not None:
+            since = max(cached.watermark, watermark - timedelta(hours=hours_back))
+        new_series = {
+            key: (timestamps, values)
+            for key, timestamps, values in self.loader.stream_series(
+                metric_names, namespace, hours_back, since=since, until=watermark
+            )
+        }
+
+        os.makedirs(directory, exist_ok=True)
+        return self._write(directory, meta_path, cached, new_series, watermark, hours_back)
+
+    def _read(self, meta_path: str) -> CachedDataset:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        directory = os.path.dirname(meta_path)
+        return CachedDataset(
+            timestamps=np.load(os.path.join(directory, meta['timestamps_file']), mmap_mode='r'),
+            values=np.load(os.path.join(directory, meta['values_file']), mmap_mode='r'),
+            keys=[tuple(k) for k in meta['keys']],
+            offsets=np.array(meta['offsets'], dtype=np.int64),
+            scaling_by_metric=meta['scaling_by_metric'],
+            watermark=datetime.fromisoformat(meta['watermark'])
+        )
+
+    def _write(self, directory: str, meta_path: str, cached: CachedDataset,
+               new_series: Dict[tuple, Tuple[np.ndarray, np.ndarray]],
+               watermark: datetime, hours_back: int) -> CachedDataset:
+        """
+        Merge new rows into the cached series and drop rows older than the window
+
+        The window ends at the watermark, so the cache holds what a database
+        load at that time would return. The merged series go to new files
+        named after the watermark and the metadata is swapped atomically to
+        point at them, so a crash mid-write leaves the previous cache intact.
+        Scaling ranges are recomputed from the retained rows.
+        """
+        cutoff = np.datetime64(watermark - timedelta(hours=hours_back), 'ns')
+        old_series = cached.series() if cached is not None else {}
+        empty = (np.empty(0, dtype='datetime64[ns]'), np.empty(0))
+
+        # Only the tail of each cached series (sorted by time) is kept
+        keep_from = {
+            key: int(np.searchsorted(timestamps, cutoff, side='left'))
+            for key, (timestamps, _) in old_series.items()
+        }
+        keys = list(old_series) + [k for k in new_series if k not in old_series]
+        lengths = np.array([
+            len(old_series.get(k, empty)[1]) - keep_from.get(k, 0) + len(new_series.get(k, empty)[1])
+            for k in keys
+        ], dtype=np.int64)
+        keys = [k for k, n in zip(keys, lengths) if n]
+        lengths = lengths[lengths > 0]
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        # Copy series one at a time so the merge never holds the corpus in RAM
+        suffix = watermark.strftime('%Y%m%dT%H%M%S%f')
+        values_file, timestamps_file = f"values_{suffix}.npy", f"timestamps_{suffix}.npy"
+        size = (int(offsets[-1]),)
+        merged_values = open_memmap(os.path.join(directory, values_file),
+                                    mode='w+', dtype=np.float64, shape=size)
+        merged_timestamps = open_memmap(os.path.join(directory, timestamps_file),
+                                        mode='w+', dtype='datetime64[ns]', shape=size)
+        ranges: Dict[str, Tuple[float, float]] = {}
+        for i, key in enumerate(keys):
+            start, end = offsets[i], offsets[i + 1]
+            keep = keep_from.get(key, 0)
+            old_timestamps, old_values = old_series.get(key, empty)
+            old_timestamps, old_values = old_timestamps[keep:], old_values[keep:]
+            new_timestamps, new_values = new_series.get(key, empty)
+            middle = start + len(old_values)
+            merged_timestamps[start:middle] = old_timestamps
+            merged_timestamps[middle:end] = new_timestamps
+            merged_values[start:middle] = old_values
+            merged_values[middle:end] = new_values
+
+            series_values = merged_values[start:end]
+            lo, hi = float(series_values.min()), float(series_values.max())
+            if key[2] in ranges:
+                lo, hi = min(lo, ranges[key[2]][0]), max(hi, ranges[key[2]][1])
+            ranges[key[2]] = (lo, hi)
+        merged_values.flush()
+        merged_timestamps.flush()
+        del merged_values, merged_timestamps
+
+        meta = {
+            'keys': [list(k) for k in keys],
+            'offsets': offsets.tolist(),
+            'scaling_by_metric': {
+                name: {'X_min': lo, 'X_max': hi, 'y_min': lo, 'y_max': hi}
+                for name, (lo, hi) in ranges.items()
+            },
+            'watermark': watermark.isoformat(),
+            'values_file': values_file,
+            'timestamps_file': timestamps_file
+        }
+
+        tmp_meta_path = meta_path + '.tmp'
+        with open(tmp_meta_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta_path, meta_path)
+
+        # Drop superseded series files
+        for name in os.listdir(directory):
+            if name.startswith(('values_', 'timestamps_')) and name not in (values_file, timestamps_file):
+                os.remove(os.path.join(directory, name))
+
+        return self._read(meta_path)
@@ -0,0 +1,163 @@
+"""
+Parallel training data preparation across series
+
+Windowing, normalization and anomaly labeling are independent per
+(pod, namespace, metric) series, so they are sharded across a process pool.
+Inputs and outputs live in memory-mapped .npy files: workers read their
+series slices and write their windows in place at precomputed offsets, so
+nothing but shard descriptors is pickled between processes. Series arrive
+on the 30s grid with NaN for unfilled gaps; windows touching a gap are
+skipped.
+"""
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from numpy.lib.format import open_memmap
+from typing import Dict, List, Tuple
+
+from model.data_loader import complete_window_starts, mark_anomaly_windows, sequence_views
+
+
+def _plan_shards(lengths: np.ndarray, workers: int) -> List[np.ndarray]:
+    """Split series indices into contiguous shards with roughly equal point counts"""
+    bounds = np.searchsorted(
+        np.cumsum(lengths),
+        np.linspace(0, lengths.sum(), workers * 4 + 1)[1:-1]
+    )
+    return [shard for shard in np.split(np.arange(len(lengths)), bounds) if len(shard)]
+
+
+def _prepare_shard(task: dict) -> int:
+    """Window, normalize and label one shard of series, writing into the output memmaps"""
+    values = np.load(task['values_path'], mmap_mode='r')
+    X_out = np.load(task['X_path'], mmap_mode='r+')
+    y_out = np.load(task['y_path'], mmap_mode='r+')
+    labels_out = np.load(task['labels_path'], mmap_mode='r+')
+
+    sequence_length = task['sequence_length']
+    prediction_horizon = task['prediction_horizon']
+    written = 0
+
+    for start, end, out_start, x_min, x_max in task['series']:
+        series = np.asarray(values[start:end])
+        starts = complete_window_starts(series, sequence_length, prediction_horizon)
+        n = len(starts)
+        if n == 0:
+            continue
+        X, y = sequence_views(series, sequence_length, prediction_horizon)
+
+        scale = x_max - x_min + 1e-8
+        X_out[out_start:out_start + n] = (X[starts] - x_min) / scale
+        y_out[out_start:out_start + n] = (y[starts] - x_min) / scale
+
+        # Label each window by the last input point: with the lookback marking
+        # this flags windows followed by an anomaly within anomaly_window steps
+        point_labels = mark_anomaly_windows(
+            series > np.nanquantile(series, task['anomaly_quantile']), task['anomaly_window']
+        )
+        labels_out[out_start:out_start + n] = point_labels[sequence_length - 1 + starts]
+        written += n
+
+    X_out.flush()
+    y_out.flush()
+    labels_out.flush()
+    return written
+
+
+def prepare_parallel(series: Dict[tuple, np.ndarray], output_dir: str,
+                     scaling_by_metric: Dict[str, dict],
+                     sequence_length: int = 60,
+                     prediction_horizon: int = 10,
+                     anomaly_window: int = 10,
+                     anomaly_quantile: float = 0.95,
+                     workers: int = None) -> Dict[str, np.ndarray]:
+    """
+    Prepare windows for many series in parallel into memory-mapped arrays
+
+    Args:
+        series: (pod_name, namespace, metric_name) -> 1-D values on the
+            30s grid (resample_series()), NaN where a gap was not filled
+        output_dir: Directory for the .npy files
+        scaling_by_metric: metric_name -> scaling params (X_min, X_max)
+        workers: Process count (defaults to os.cpu_count())
+
+    Returns:
+        Dict with memory-mapped 'X' (N, sequence_length), 'y' (N, prediction_horizon),
+        'is_anomaly' (N,), plus 'keys' and 'offsets' locating each series' windows
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    keys = list(series)
+    lengths = np.array([len(series[k]) for k in keys], dtype=np.int64)
+    window_counts = np.array([
+        len(complete_window_starts(series[k], sequence_length, prediction_horizon)) for k in keys
+    ], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(window_counts)))
+    input_offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    paths = {name: os.path.join(output_dir, f'{name}.npy')
+             for name in ('values', 'X', 'y', 'is_anomaly')}
+
+    values = open_memmap(paths['values'], mode='w+', dtype=np.float64, shape=(int(lengths.sum()),))
+    for i, key in enumerate(keys):
+        values[input_offsets[i]:input_offsets[i + 1]] = series[key]
+    values.flush()
+    del values
+
+    total = int(offsets[-1])
+    for name, shape, dtype in (('X', (total, sequence_length), np.float32),
+                               ('y', (total, prediction_horizon), np.float32),
+                               ('is_anomaly', (total,), np.int8)):
+        # Allocate the output file; workers open it in r+ mode
+        open_memmap(paths[name], mode='w+', dtype=dtype, shape=shape).flush()
+
+    tasks = []
+    for shard in _plan_shards(lengths, workers):
+        tasks.append({
+            'values_path': paths['values'],
+            'X_path': paths['X'],
+            'y_path': paths['y'],
+            'labels_path': paths['is_anomaly'],
+            'sequence_length': sequence_length,
+            'prediction_horizon': prediction_horizon,
+            'anomaly_window': anomaly_window,
+            'anomaly_quantile': anomaly_quantile,
+            'series': [
+                (int(input_offsets[i]), int(input_offsets[i + 1]), int(offsets[i]),
+                 float(scaling_by_metric[keys[i][2]]['X_min']),
+                 float(scaling_by_metric[keys[i][2]]['X_max']))
+                for i in shard
+            ]
+        })
+
+    if workers == 1:
+        for task in tasks:
+            _prepare_shard(task)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_prepare_shard, tasks))
+
+    return {
+        'X': np.load(paths['X'], mmap_mode='r'),
+        'y': np.load(paths['y'], mmap_mode='r'),
+        'is_anomaly': np.load(paths['is_anomaly'], mmap_mode='r'),
+        'keys': keys,
+        'offsets': offsets
+    }
+
+
+def scaling_from_series(series: Dict[tuple, np.ndarray]) -> Dict[str, dict]:
+    """Per-metric min/max over in-memory series, in the metric_ranges() format"""
+    ranges: Dict[str, Tuple[float, float]] = {}
+    for (_, _, metric_name), values in series.items():
+        if len(values) == 0:
+            continue
+        lo, hi = float(np.nanmin(values)), float(np.nanmax(values))
+        if metric_name in ranges:
+            lo, hi = min(lo, ranges[metric_name][0]), max(hi, ranges[metric_name][1])
+        ranges[metric_name] = (lo, hi)
+    return {
+        name: {'X_min': lo, 'X_max': hi, 'y_min': lo, 'y_max': hi}
+        for name, (lo, hi) in ranges.items()
+    }
@@ -0,0 +1,98 @@
+"""
+Streaming training pipeline across many pods and metrics
+
+Series are streamed from PostgreSQL one at a time (server-side cursor),
+put on the 30s serving grid, scaled with per-metric ranges computed in SQL,
+cut into sliding windows (skipping those that touch a collection gap) and
+fed to Keras through tf.data with shuffling and prefetch. The full corpus is
+never held in memory; every epoch re-streams it from the database.
+"""
+import zlib
+import numpy as np
+from datetime import datetime
+import tensorflow as tf
+from typing import Dict, Iterator, List, Tuple
+
+from model.data_loader import DataLoader, complete_window_starts, resample_series, sequence_views
+
+
+def is_validation_series(key: tuple, validation_fraction: float) -> bool:
+    """Assign whole series to validation by hashing their key, so splits are stable"""
+    bucket = zlib.crc32('/'.join(key).encode()) % 1000
+    return bucket < validation_fraction * 1000
+
+
+def series_window_chunks(loader: DataLoader, metric_names: List[str],
+                         scaling_by_metric: Dict[str, dict],
+                         sequence_length: int = 60,
+                         prediction_horizon: int = 10,
+                         hours_back: int = 24,
+                         namespace: str = None,
+                         validation: bool = False,
+                         validation_fraction: float = 0.2,
+                         chunk_size: int = 1024,
+                         since: datetime = None,
+                         until: datetime = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield normalized (X, y) window chunks, one series at a time
+
+    Args:
+        since, until: Optional timestamp bounds passed to stream_series()
+
+    Returns:
+        Iterator of X (chunk, sequence_length, 1) and y (chunk, prediction_horizon)
+    """
+    bounds = {}
+    if since is not None or until is not None:
+        bounds = {'since': since, 'until': until}
+
+    for key, timestamps, values in loader.stream_series(metric_names, namespace, hours_back, **bounds):
+        if is_validation_series(key, validation_fraction) != validation:
+            continue
+
+        # Same grid and gap filling as /predict; longer gaps stay NaN
+        _, values = resample_series(timestamps, values)
+        params = scaling_by_metric[key[2]]
+        scaled = ((values - params['X_min']) / (params['X_max'] - params['X_min'] + 1e-8)).astype(np.float32)
+        X, y = sequence_views(scaled, sequence_length, prediction_horizon)
+        starts = complete_window_starts(values, sequence_length, prediction_horizon)
+
+        for start in range(0, len(starts), chunk_size):
+            chunk = starts[start:start + chunk_size]
+            yield X[chunk, :, np.newaxis], y[chunk]
+
+
+def build_dataset(loader: DataLoader, metric_names: List[str],
+                  scaling_by_metric: Dict[str, dict],
+                  sequence_length: int = 60,
+                  prediction_horizon: int = 10,
+                  hours_back: int = 24,
+                  namespace: str = None,
+                  validation: bool = False,
+                  batch_size: int = 32,
+                  shuffle_buffer: int = 10000,
+                  since: datetime = None,
+                  until: datetime = None) -> tf.data.Dataset:
+    """
+    Build a prefetching tf.data pipeline over every matching series
+
+    Training data is shuffled through a bounded buffer, which mixes windows
+    from neighbouring series without materializing the corpus.
+    """
+    signature = (
+        tf.TensorSpec(shape=(None, sequence_length, 1), dtype=tf.float32),
+        tf.TensorSpec(shape=(None, prediction_horizon), dtype=tf.float32)
+    )
+    dataset = tf.data.Dataset.from_generator(
+        lambda: series_window_chunks(
+            loader, metric_names, scaling_by_metric,
+            sequence_length, prediction_horizon, hours_back, namespace,
+            validation=validation, since=since, until=until
+        ),
+        output_signature=signature
+    )
+
+    dataset = dataset.unbatch()
+    if not validation:
+        dataset = dataset.shuffle(shuffle_buffer)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
@@ -1,28 +1,51 @@
 import sys
 import os
+import argparse
+import tempfile
+from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from model.data_loader import DataLoader
+from model.data_loader import DataLoader, complete_window_starts, resample_series
 from model.lstm_model import LSTMPredictor
+from model.numpy_inference import export_weights
+from model.series_scaling import SeriesScaling, multivariate_windows
+from training.pipeline import build_dataset, is_validation_series
+from training.parallel_prep import prepare_parallel, scaling_from_series
+from training.dataset_cache import DatasetCache
 import numpy as np
+import tensorflow as tf
 from sklearn.model_selection import train_test_split
 import matplotlib.pyplot as plt
 
-def main():
-    print("Starting LSTM model training...")
-    
-    # Database configuration
-    db_config = {
-        'host': 'localhost',
-        'port': 5432,
-        'user': 'healx_user',
-        'password': 'healx_pass_dev_only',
-        'dbname': 'healx'
-    }
-    
-    # Initialize data loader
-    loader = DataLoader(db_config)
-    
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the LSTM memory predictor")
+    parser.add_argument('--stream', action='store_true',
+                        help="Feed training batches through tf.data instead of materializing all sequences")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--all-pods', action='store_true',
+                        help="Stream every pod's series from the database instead of one pod")
+    parser.add_argument('--metrics', nargs='+', default=['memory_usage_mb', 'cpu_usage'],
+                        help="Metrics to train on with --all-pods or --multivariate")
+    parser.add_argument('--multivariate', action='store_true',
+                        help="Train one model over all --metrics per pod, scaled per (pod, namespace)")
+    parser.add_argument('--namespace', default=None,
+                        help="Restrict --all-pods to one namespace")
+    parser.add_argument('--hours-back', type=int, default=24)
+    parser.add_argument('--prep-workers', type=int, default=0,
+                        help="With --all-pods, prepare windows with this many processes into memory-mapped arrays")
+    parser.add_argument('--prep-dir', default=None,
+                        help="Directory for the prepared arrays (default: a temp dir)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="With --all-pods, keep series in a memory-mapped cache here and only fetch new rows")
+    parser.add_argument('--no-refresh', action='store_true',
+                        help="Use the dataset cache as is, without querying the database")
+    parser.add_argument('--finetune', action='store_true',
+                        help="Continue training the saved model on data newer than its watermark")
+    parser.add_argument('--finetune-epochs', type=int, default=5)
+    return parser.parse_args()
+
+def train_single_series(args, loader, predictor):
+    """Train on one pod's metric loaded into memory"""
     # Load metrics
     print("Loading data from database...")
     df = loader.load_metrics(
@@ -34,19 +57,59 @@ def main():
     
     print(f"Loaded {len(df)} data points")
     
-    # Prepare sequences
+    # Fixed 30s grid: double writes collapse, short gaps are interpolated
+    # and windows touching longer gaps are skipped
+    df = loader.resample_metrics(df)
+    
+    # Prepare sequences (strided views, no copy)
     print("Preparing sequences...")
     X, y = loader.prepare_sequences(
         df, 
         sequence_length=60,  # 30 minutes of data (30s intervals)
         prediction_horizon=10  # Predict next 5 minutes
     )
+    starts = complete_window_starts(df['metric_value'].values, 60, 10)
     
-    print(f"Created {len(X)} sequences")
+    print(f"Created {len(starts)} sequences ({len(X) - len(starts)} skipped over gaps)")
     
+    if args.stream:
+        # Split sequence start positions and materialize one batch at a time,
+        # so memory stays flat as the history grows
+        values = df['metric_value'].values
+        scaling_params = loader.compute_scaling_params(X, y)
+        train_idx, val_idx = train_test_split(
+            starts, test_size=0.2, random_state=42
+        )
+        
+        print(f"Training set: {len(train_idx)} samples")
+        print(f"Validation set: {len(val_idx)} samples")
+        
+        train_dataset = predictor.dataset_from_generator(
+            lambda: loader.iter_sequence_batches(
+                values, train_idx, 60, 10, scaling_params,
+                batch_size=args.batch_size, shuffle=True
+            )
+        )
+        val_dataset = predictor.dataset_from_generator(
+            lambda: loader.iter_sequence_batches(
+                values, val_idx, 60, 10, scaling_params,
+                batch_size=args.batch_size
+            )
+        )
+        
+        predictor.set_scaling_params(scaling_params)
+        
+        print("Training model (streaming)...")
+        history = predictor.train_on_dataset(train_dataset, val_dataset, epochs=50)
+        
+        X_test, y_test = next(loader.iter_sequence_batches(
+            values, val_idx[:1], 60, 10, scaling_params
+        ))
+        return history, X_test[0, :, 0], y_test[0]
+        
     # Normalize
     print("Normalizing data...")
-    X_norm, y_norm, scaling_params = loader.normalize_data(X, y)
+    X_norm, y_norm, scaling_params = loader.normalize_data(X[starts], y[starts])
     
     # Split into train and validation
     X_train, X_val, y_train, y_val = train_test_split(
@@ -56,14 +119,6 @@ def main():
     print(f"Training set: {len(X_train)} samples")
     print(f"Validation set: {len(X_val)} samples")
     
-    # Create and train model
-    print("Building LSTM model...")
-    predictor = LSTMPredictor(
-        sequence_length=60,
-        prediction_horizon=10,
-        lstm_units=64
-    )
-    
     predictor.set_scaling_params(scaling_params)
     
     print("Training model...")
@@ -71,17 +126,266 @@ def main():
         X_train, y_train,
         X_val, y_val,
         epochs=50,
-        batch_size=32
+        batch_size=args.batch_size
     )
     
-    # Save model
+    return history, X_val[0], y_val[0]
+
+def set_multi_metric_scaling(predictor, metric_names, scaling_by_metric):
+    """Store per-metric scaling params on the predictor"""
+    missing = [m for m in metric_names if m not in scaling_by_metric]
+    if missing:
+        raise ValueError(f"No data for metrics: {', '.join(missing)}")
+        
+    # Top-level params stay those of the first metric so single-metric
+    # consumers keep working; per-metric params live under 'metrics'
+    scaling_params = dict(scaling_by_metric[metric_names[0]])
+    scaling_params['metrics'] = scaling_by_metric
+    predictor.set_scaling_params(scaling_params)
+
+def train_all_series_prepared(args, loader, predictor):
+    """Prepare every series in parallel into memory-mapped arrays, then train from them"""
+    print("Loading all series...")
+    # On the serving grid; windows touching long gaps are skipped in preparation
+    series = {
+        key: resample_series(timestamps, values)[1]
+        for key, timestamps, values in loader.stream_series(args.metrics, args.namespace, args.hours_back)
+    }
+    scaling_by_metric = scaling_from_series(series)
+    set_multi_metric_scaling(predictor, args.metrics, scaling_by_metric)
+    
+    prep_dir = args.prep_dir or tempfile.mkdtemp(prefix='healx_prep_')
+    print(f"Preparing {len(series)} series with {args.prep_workers} workers into {prep_dir}...")
+    prepared = prepare_parallel(series, prep_dir, scaling_by_metric, workers=args.prep_workers)
+    del series
+    
+    X, y = prepared['X'], prepared['y']
+    train_idx, val_idx = train_test_split(
+        np.arange(len(X)), test_size=0.2, random_state=42
+    )
+    print(f"Training set: {len(train_idx)} samples")
+    print(f"Validation set: {len(val_idx)} samples")
+    
+    def batches(indices, shuffle):
+        def generate():
+            order = np.random.permutation(indices) if shuffle else indices
+            for start in range(0, len(order), args.batch_size):
+                # Sorted reads are sequential on the memory-mapped file
+                batch = np.sort(order[start:start + args.batch_size])
+                yield X[batch][..., np.newaxis], y[batch]
+        return generate
+        
+    print("Training model (prepared series)...")
+    history = predictor.train_on_dataset(
+        predictor.dataset_from_generator(batches(train_idx, shuffle=True)),
+        predictor.dataset_from_generator(batches(val_idx, shuffle=False)),
+        epochs=50
+    )
+    
+    return history, np.asarray(X[val_idx[0]]), np.asarray(y[val_idx[0]])
+
+def finetune_all_series(args, loader, predictor, model_path):
+    """
+    Continue training the saved model on rows newer than its training watermark
+    
+    Scaling parameters are kept as they are so inputs stay consistent with
+    what the model learned; the watermark advances with the saved model.
+    Returns None, leaving the model untouched, when the new rows do not
+    yet fill a training and a validation window.
+    """
+    print(f"Loading {model_path} for fine-tuning...")
+    predictor.load_model(model_path, for_training=True)
+    if not predictor.training_watermark:
+        raise ValueError("Saved model has no training watermark, run a full --all-pods training first")
+        
+    previous = datetime.fromisoformat(predictor.training_watermark)
+    watermark = loader.latest_timestamp(args.metrics, args.namespace)
+    if watermark is None or watermark <= previous:
+        return None
+        
+    print(f"Fine-tuning on data from {previous} to {watermark}...")
+    scaling_by_metric = predictor.scaling_params.get('metrics') or {
+        m: predictor.scaling_params for m in args.metrics
+    }
+    
+    # Re-read just enough history before the watermark to fill the first windows
+    context = timedelta(seconds=30 * (predictor.sequence_length + predictor.prediction_horizon))
+    train_dataset, val_dataset = [
+        build_dataset(
+            loader, args.metrics, scaling_by_metric,
+            sequence_length=predictor.sequence_length,
+            prediction_horizon=predictor.prediction_horizon,
+            namespace=args.namespace, validation=validation,
+            batch_size=args.batch_size,
+            since=previous - context, until=watermark
+        )
+        for validation in (False, True)
+    ]
+    
+    # New rows too few for a complete window on either side; keep the
+    # watermark so the next run fine-tunes on them once there are more
+    first_batch = next(iter(train_dataset.take(1)), None)
+    if first_batch is None or next(iter(val_dataset.take(1)), None) is None:
+        return None
+        
+    history = predictor.finetune(train_dataset, val_dataset, epochs=args.finetune_epochs)
+    predictor.training_watermark = watermark.isoformat()
+    
+    X_test, y_test = first_batch
+    return history, X_test.numpy()[0, :, 0], y_test.numpy()[0]
+
+def train_all_series(args, loader, predictor):
+    """Train on every pod for the requested metrics, streamed from the database"""
+    print(f"Computing scaling ranges for {', '.join(args.metrics)}...")
+    scaling_by_metric = loader.metric_ranges(args.metrics, args.namespace, args.hours_back)
+    set_multi_metric_scaling(predictor, args.metrics, scaling_by_metric)
+    
+    datasets = [
+        build_dataset(
+            loader, args.metrics, scaling_by_metric,
+            sequence_length=60, prediction_horizon=10,
+            hours_back=args.hours_back, namespace=args.namespace,
+            validation=validation, batch_size=args.batch_size
+        )
+        for validation in (False, True)
+    ]
+    train_dataset, val_dataset = datasets
+    
+    print("Training model (streaming all series)...")
+    history = predictor.train_on_dataset(train_dataset, val_dataset, epochs=50)
+    
+    X_test, y_test = next(iter(val_dataset.take(1)))
+    return history, X_test.numpy()[0, :, 0], y_test.numpy()[0]
+
+def train_multivariate(args, loader, predictor):
+    """
+    Train one model that predicts every metric of a pod in a single forward pass
+    
+    Each (pod, namespace) is scaled with its own per-metric ranges, stored
+    in an array-backed SeriesScaling table next to the model.
+    """
+    print(f"Loading aligned {', '.join(args.metrics)} series...")
+    # Every metric on the fixed 30s grid; windows touching long gaps are skipped
+    series = {
+        key: np.stack([resample_series(timestamps, column)[1] for column in values.T], axis=1)
+        for key, timestamps, values in loader.stream_multivariate(args.metrics, args.namespace, args.hours_back)
+    }
+    scaling = SeriesScaling.fit(series, args.metrics)
+    predictor.series_scaling = scaling
+    set_multi_metric_scaling(predictor, args.metrics, scaling.metric_ranges())
+    predictor.scaling_params['features'] = list(args.metrics)
+    print(f"Fitted scaling for {len(scaling)} series")
+    
+    keys = list(series)
+    rows = scaling.rows([pod for pod, _ in keys], [namespace for _, namespace in keys])
+    
+    def chunks(validation):
+        def generate():
+            for key, row in zip(keys, rows):
+                if is_validation_series(key, 0.2) != validation:
+                    continue
+                X, y = multivariate_windows(series[key], predictor.sequence_length,
+                                            predictor.prediction_horizon)
+                starts = complete_window_starts(series[key], predictor.sequence_length,
+                                                predictor.prediction_horizon)
+                X, y = X[starts], y[starts]
+                if len(X) == 0:
+                    continue
+                series_rows = np.full(len(X), row)
+                # y is (samples, features, horizon); scale it feature-last
+                yield (scaling.normalize(X, series_rows),
+                       scaling.normalize(y.transpose(0, 2, 1), series_rows).transpose(0, 2, 1))
+        return generate
+        
+    def dataset(validation):
+        data = predictor.dataset_from_generator(chunks(validation)).unbatch()
+        if not validation:
+            data = data.shuffle(10000)
+        return data.batch(args.batch_size).prefetch(tf.data.AUTOTUNE)
+        
+    train_dataset, val_dataset = dataset(False), dataset(True)
+    
+    print("Training model (multivariate)...")
+    history = predictor.train_on_dataset(train_dataset, val_dataset, epochs=50)
+    
+    X_test, y_test = next(iter(val_dataset.take(1)))
+    return history, X_test.numpy()[0], y_test.numpy()[0]
+
+def main():
+    args = parse_args()
+    print("Starting LSTM model training...")
+    
+    # Database configuration
+    db_config = {
+        'host': 'localhost',
+        'port': 5432,
+        'user': 'healx_user',
+        'password': 'healx_pass_dev_only',
+        'dbname': 'healx'
+    }
+    
+    # Initialize data loader
+    loader = DataLoader(db_config)
+    
     model_dir = '../model/saved_models'
     os.makedirs(model_dir, exist_ok=True)
     model_path = os.path.join(model_dir, 'lstm_predictor.keras')
     
+    print("Building LSTM model...")
+    predictor = LSTMPredictor(
+        sequence_length=60,
+        prediction_horizon=10,
+        lstm_units=64,
+        n_features=len(args.metrics) if args.multivariate else 1
+    )
+    
+    if args.multivariate:
+        if args.finetune:
+            raise ValueError("--finetune is not supported with --multivariate")
+        watermark = loader.latest_timestamp(args.metrics, args.namespace)
+        if watermark is not None:
+            predictor.training_watermark = watermark.isoformat()
+        history, test_sequence, test_actual = train_multivariate(args, loader, predictor)
+    elif args.finetune:
+        result = finetune_all_series(args, loader, predictor, model_path)
+        if result is None:
+            print("Not enough new data since the last training run, model unchanged")
+            loader.close()
+            return
+        history, test_sequence, test_actual = result
+    elif args.all_pods:
+        # Series come from the database, or from the on-disk cache which
+        # only fetches rows newer than its watermark
+        source = loader
+        if args.cache_dir:
+            print(f"Loading series from dataset cache in {args.cache_dir}...")
+            source = DatasetCache(args.cache_dir, loader).load(
+                args.metrics, args.namespace, args.hours_back,
+                refresh=not args.no_refresh
+            )
+            print(f"Cache watermark: {source.watermark}")
+            watermark = source.watermark
+        else:
+            # Taken before streaming so a later --finetune never skips rows
+            watermark = loader.latest_timestamp(args.metrics, args.namespace)
+        if watermark is not None:
+            predictor.training_watermark = watermark.isoformat()
+            
+        if args.prep_workers:
+            history, test_sequence, test_actual = train_all_series_prepared(args, source, predictor)
+        else:
+            history, test_sequence, test_actual = train_all_series(args, source, predictor)
+    else:
+        history, test_sequence, test_actual = train_single_series(args, loader, predictor)
+    
+    # Save model
     print(f"Saving model to {model_path}")
     predictor.save_model(model_path)
     
+    # Export weights for the TensorFlow-free serving backend
+    weights_path = export_weights(model_path)
+    print(f"Exported serving weights to {weights_path}")
+    
     # Plot training history
     plt.figure(figsize=(12, 4))
     
@@ -107,18 +411,19 @@ def main():
     
     # Test prediction
     print("\nTesting prediction on validation data...")
-    test_idx = 0
-    test_sequence = X_val[test_idx]
-    test_actual = y_val[test_idx]
-    
     prediction = predictor.predict_single(test_sequence)
     
-    # Denormalize
-    prediction_denorm = predictor.denormalize(prediction)
-    actual_denorm = predictor.denormalize(test_actual)
-    
-    print(f"Predicted: {prediction_denorm[:5]}")
-    print(f"Actual: {actual_denorm[:5]}")
+    if args.multivariate:
+        # Scaling is per series, so compare in scaled units, one row per metric
+        print(f"Predicted (scaled): {prediction[:, :5]}")
+        print(f"Actual (scaled): {test_actual[:, :5]}")
+    else:
+        # Denormalize
+        prediction_denorm = predictor.denormalize(prediction)
+        actual_denorm = predictor.denormalize(test_actual)
+        
+        print(f"Predicted: {prediction_denorm[:5]}")
+        print(f"Actual: {actual_denorm[:5]}")
     
     loader.close()
     print("\nTraining complete!")